@@ -11,24 +11,48 @@ load_dotenv()
 # Root directory (parent of backend)
 ROOT_DIR = Path(__file__).resolve().parent.parent
 
-# Data directory
-DATA_DIR = ROOT_DIR / "DATA"
+# Data directory, overridable so offline runs and benchmarks can use a scratch directory
+DATA_DIR = Path(os.getenv("DATA_DIR", ROOT_DIR / "DATA"))
 
 # Upload directory
 UPLOAD_DIR = DATA_DIR / "uploaded_pdfs"
 
-# Ensure upload directory exists
+# Spool directory for uploads that are still being received
+SPOOL_DIR = UPLOAD_DIR / ".spool"
+
+# Ensure upload and spool directories exist
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+os.makedirs(SPOOL_DIR, exist_ok=True)
 
-# Metadata file path
+# Legacy metadata file path, migrated into the metadata store on first start
 METADATA_FILE = DATA_DIR / "metadata.json"
 
+# Metadata store (SQLite) path
+METADATA_DB_FILE = DATA_DIR / "metadata.sqlite3"
+
 # Client database file path
 CLIENT_DB_FILE = DATA_DIR / "client_database.json"
 
 # Gemini API Key
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
+# Gemini model names for the two LLM layers
+GEMINI_MODEL_NAME = "gemini-1.5-flash"
+GEMINI_PRO_MODEL_NAME = "gemini-1.5-pro-latest"
+
+# Model backend: "gemini" calls the Gemini API, "fake" answers locally for offline runs, benchmarks and CI
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "gemini").lower()
+
+# Fake model backend
+FAKE_MODEL_SEED = int(os.getenv("FAKE_MODEL_SEED", 0))  # Seeds the canned answers and the injected latency and errors
+FAKE_MODEL_LATENCY_DISTRIBUTION = os.getenv("FAKE_MODEL_LATENCY_DISTRIBUTION", "lognormal").lower()  # "fixed", "uniform" or "lognormal"
+FAKE_MODEL_LATENCY_MEAN = float(os.getenv("FAKE_MODEL_LATENCY_MEAN", 1.0))  # In seconds
+FAKE_MODEL_LATENCY_SPREAD = float(os.getenv("FAKE_MODEL_LATENCY_SPREAD", 0.5))  # Half-width in seconds (uniform) or sigma (lognormal)
+FAKE_MODEL_QUOTA_ERROR_RATE = float(os.getenv("FAKE_MODEL_QUOTA_ERROR_RATE", 0.0))  # Share of requests failing with a 429
+FAKE_MODEL_MALFORMED_RATE = float(os.getenv("FAKE_MODEL_MALFORMED_RATE", 0.0))  # Share of answers that are not clean JSON
+FAKE_MODEL_RETRIEVAL_RATE = float(os.getenv("FAKE_MODEL_RETRIEVAL_RATE", 0.3))  # Share of page and keyword pairs reported as found
+FAKE_MODEL_VALIDATION_RATE = float(os.getenv("FAKE_MODEL_VALIDATION_RATE", 0.8))  # Share of reported keywords validated
+
 # Logging configuration
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 LOGGING_CONFIG = {
@@ -69,12 +93,113 @@ LOGGING_CONFIG = {
 }
 
 # PDF extraction zoom level
-PDF_EXTRACTION_ZOOM = 2.0
+PDF_EXTRACTION_ZOOM = float(os.getenv("PDF_EXTRACTION_ZOOM", 2.0))
+
+# Page image encoding: "png", "jpeg" or "webp"
+PAGE_IMAGE_FORMAT = os.getenv("PAGE_IMAGE_FORMAT", "png").lower()
+
+# Quality used by the lossy page image formats (1-100)
+PAGE_IMAGE_QUALITY = int(os.getenv("PAGE_IMAGE_QUALITY", 85))
+
+# Render pages in grayscale, which is usually enough for newsprint
+PAGE_IMAGE_GRAYSCALE = os.getenv("PAGE_IMAGE_GRAYSCALE", "false").lower() == "true"
+
+# Number of worker processes used to rasterize PDF pages
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", os.cpu_count() or 1))
+
+# Number of pages handed to a rendering worker at a time
+PDF_EXTRACTION_CHUNK_SIZE = 4
+
+# File name of the original PDF stored next to its page images
+SOURCE_PDF_NAME = "source.pdf"
+
+# Size of the chunks read from an upload while spooling it to disk
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Number of background ingestion jobs extracted at the same time
+INGESTION_MAX_CONCURRENT_JOBS = 2
+
+# Number of finished ingestion jobs kept for status queries
+INGESTION_JOB_RETENTION = 200
 
 # Rate limiting configurations for the first model
-BATCH_SIZE = 15  # For gemini-1.5-flash
+BATCH_SIZE = 15  # Requests per interval for gemini-1.5-flash
 RATE_LIMIT_INTERVAL = 60  # In seconds
+TOKENS_PER_MINUTE = 1000000
+MAX_IN_FLIGHT = 8  # Concurrent requests, independent of the request rate
 
 # Rate limiting configurations for the second model
-BATCH_SIZE_PRO = 2  # For gemini-1.5-pro-latest
+BATCH_SIZE_PRO = 2  # Requests per interval for gemini-1.5-pro-latest
 RATE_LIMIT_INTERVAL_PRO = 60  # In seconds
+TOKENS_PER_MINUTE_PRO = 32000
+MAX_IN_FLIGHT_PRO = 2  # Concurrent requests, independent of the request rate
+
+# Adaptive rate control applied when a model reports quota errors (429)
+RATE_LIMIT_DECREASE_FACTOR = 0.5  # Request rate multiplier on each throttle
+RATE_LIMIT_INCREASE_STEP = 1  # Requests/minute regained per minute of successful requests
+RATE_LIMIT_MIN_FRACTION = 0.1  # Lowest request rate, as a fraction of the configured rate
+RATE_LIMIT_MAX_REQUEUES = 5  # Throttled attempts before the error is passed on
+RATE_LIMIT_BACKOFF_BASE = 2  # In seconds, doubled on each requeue
+RATE_LIMIT_BACKOFF_MAX = 60  # In seconds
+RATE_LIMIT_STATS_WINDOW = 300  # In seconds, window of the reported throttle rate
+
+# Text-layer keyword prefilter
+KEYWORD_PREFILTER_ENABLED = os.getenv("KEYWORD_PREFILTER_ENABLED", "true").lower() == "true"
+PAGE_TEXT_MIN_CHARS = 200  # Pages with less extracted text are treated as having no text layer
+PREFILTER_FUZZY_THRESHOLD = 0.85  # Similarity ratio (0-1) for fuzzy keyword matches
+
+# Standing queries: subscribed clients are analyzed in the background when a PDF is ingested
+STANDING_QUERIES_ENABLED = os.getenv("STANDING_QUERIES_ENABLED", "true").lower() == "true"
+STANDING_QUERY_MAX_CONCURRENT = 1  # PDFs analyzed at the same time
+STANDING_QUERY_RUN_RETENTION = 100  # Finished runs kept for status queries
+
+# Incremental queries: query versions whose processed page records are kept per client
+PROCESSED_PAGE_VERSIONS_PER_CLIENT = 3
+
+# Multi-page packing: several pages of the same PDF per layer one request
+LAYER_ONE_PACKING_ENABLED = os.getenv("LAYER_ONE_PACKING_ENABLED", "false").lower() == "true"
+LAYER_ONE_PACK_MAX_PAGES = 4
+LAYER_ONE_PACK_MAX_IMAGES = 8
+LAYER_ONE_PACK_MAX_TOKENS = 4000  # Estimated input tokens of the images of one request
+LAYER_ONE_PACK_LINGER_SECONDS = 0.25  # How long a pack waits for more pages
+
+# Local validation of layer one answers: keywords with enough local evidence skip layer two
+LOCAL_VALIDATION_ENABLED = os.getenv("LOCAL_VALIDATION_ENABLED", "true").lower() == "true"
+LOCAL_VALIDATION_ARTICLE_WEIGHT = 0.5  # Evidence weight of a keyword found in the headline or summary of its articles
+LOCAL_VALIDATION_PAGE_TEXT_WEIGHT = 0.5  # Evidence weight of a keyword found in the page's text layer
+LOCAL_VALIDATION_MIN_CONFIDENCE = 1.0  # Keywords with less evidence are escalated to layer two
+
+# Layer two batching: several pages' layer one answers per layer two request
+LAYER_TWO_BATCHING_ENABLED = os.getenv("LAYER_TWO_BATCHING_ENABLED", "true").lower() == "true"
+LAYER_TWO_BATCH_MAX_PAGES = 8
+LAYER_TWO_BATCH_MAX_TOKENS = 6000  # Estimated input tokens of the layer one answers of one request
+LAYER_TWO_BATCH_LINGER_SECONDS = 0.5  # How long a batch waits for more pages
+
+# Article-region cropping: send only the page regions that mention a keyword
+REGION_CROPPING_ENABLED = os.getenv("REGION_CROPPING_ENABLED", "true").lower() == "true"
+REGION_MERGE_MARGIN = 6  # In PDF points; blocks closer than this belong to the same region
+REGION_MIN_CHARS = 80  # Smaller text regions are not cropped on their own
+REGION_TARGET_SIZE = 1600  # In pixels, for the longest side of a cropped region
+REGION_MIN_ZOOM = 1.0
+REGION_MAX_ZOOM = 3.0
+REGION_MAX_PER_PAGE = 4  # More matching regions than this send the full page
+REGION_MAX_COVERAGE = 0.6  # Matching regions covering more of the page than this send the full page
+
+# Full-text index of page text
+TEXT_INDEX_FILE = DATA_DIR / "text_index.sqlite3"
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 200
+
+# Retries of failed page analyses within a query
+QUERY_RETRY_MAX_ATTEMPTS = 3  # Retries per page
+QUERY_RETRY_BUDGET_RATIO = 0.25  # Retries per page in the query, shared by all pages
+QUERY_RETRY_BUDGET_MIN = 5  # Smallest retry budget of a query
+QUERY_RETRY_BACKOFF_BASE = 2  # In seconds, doubled on each retry
+QUERY_RETRY_BACKOFF_MAX = 60  # In seconds
+QUERY_DEADLINE_SECONDS = 1800  # No retries are started after this time
+
+# Page analysis result cache
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_FILE = DATA_DIR / "result_cache.sqlite3"
+RESULT_CACHE_MAX_ENTRIES = 50000
+RESULT_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60  # One week
@@ -1,8 +1,8 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from .routes import upload, query, delete, clients, pdfs
-from .utils.general_utils import load_metadata
+from .routes import upload, query, delete, clients, pdfs, jobs, status, search
+from .utils.general_utils import get_pdf_count
 from .config import LOGGING_CONFIG
 from .utils.custom_exceptions import (
     PDFUploadError,
@@ -14,9 +14,9 @@ from .utils.custom_exceptions import (
     RateLimitExceededError
 )
 from .models.system_prompt import save_system_prompt, get_system_prompt, get_additional_query
-import asyncio
-from .utils.request_pipeline import request_worker
-from .utils.request_pipeline_pro import request_worker_pro
+from .utils.request_pipeline import start_request_workers, stop_request_workers
+from .services.page_renderer import shutdown_render_executor
+from .utils.result_cache import evict_results
 import logging
 from logging.config import dictConfig
 from typing import Dict
@@ -42,6 +42,9 @@ app.include_router(query.router)
 app.include_router(delete.router)
 app.include_router(clients.router)
 app.include_router(pdfs.router)
+app.include_router(jobs.router)
+app.include_router(status.router)
+app.include_router(search.router)
 
 @app.exception_handler(PDFUploadError)
 @app.exception_handler(PDFProcessingError)
@@ -76,12 +79,22 @@ async def startup_event() -> None:
     """
     Startup event handler for the FastAPI application.
     """
-    # Load existing metadata on startup
-    load_metadata()
+    # Open the metadata store on startup (migrating metadata.json if present)
+    get_pdf_count()
+    # Drop expired page analyses from the result cache
+    evict_results()
     logger.info("Application started")
-    # Start the request workers
-    asyncio.create_task(request_worker())       # For gemini-1.5-flash
-    asyncio.create_task(request_worker_pro())   # For gemini-1.5-pro-latest
+    # Start the request schedulers of both models
+    start_request_workers()
+
+@app.on_event("shutdown")
+async def shutdown_event() -> None:
+    """
+    Shutdown event handler for the FastAPI application.
+    """
+    await stop_request_workers()
+    shutdown_render_executor()
+    logger.info("Application stopped")
 
 @app.get("/system-prompt")
 async def get_system_prompt_route() -> Dict[str, str]:
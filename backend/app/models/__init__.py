@@ -1 +1 @@
-from . import gemini_model, gemini_model_pro, system_prompt
\ No newline at end of file
+from . import model_backend, fake_model, system_prompt, response_schema
\ No newline at end of file
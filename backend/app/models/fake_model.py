@@ -0,0 +1,300 @@
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+from typing import Dict, Any, List
+from google.api_core import exceptions as google_exceptions
+from ..config import (
+    FAKE_MODEL_SEED,
+    FAKE_MODEL_LATENCY_DISTRIBUTION,
+    FAKE_MODEL_LATENCY_MEAN,
+    FAKE_MODEL_LATENCY_SPREAD,
+    FAKE_MODEL_QUOTA_ERROR_RATE,
+    FAKE_MODEL_MALFORMED_RATE,
+    FAKE_MODEL_RETRIEVAL_RATE,
+    FAKE_MODEL_VALIDATION_RATE
+)
+
+# Prompt lines the fake model reads its page context from, e.g. "Page: 3" or "Keywords: a, b"
+PROMPT_FIELD_PATTERN = re.compile(r"^\s*(Publication|Edition|Date|Page|Pages|Keywords):[ \t]*(.*?)\s*$", re.MULTILINE)
+
+# Keywords of a "Keywords:" line, each with the client tag batch queries append, e.g. "budget [acme, globex]"
+KEYWORD_PATTERN = re.compile(r"[^,\[]+(?:\[[^\]]*\])?")
+
+# Marker of the layer one answers sent to the second LLM layer
+JSON_INPUT_MARKER = "JSON Input:"
+
+# Tokens Gemini counts for an image part, used for the reported usage
+IMAGE_TOKENS = 258
+
+# Ways an injected malformed answer deviates from clean JSON
+MALFORMED_KINDS = ("fenced", "prose", "truncated", "garbage")
+
+class FakeUsageMetadata:
+    """
+    Token usage reported with a fake answer, estimated from the text length.
+    """
+
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count: int = prompt_token_count
+        self.candidates_token_count: int = candidates_token_count
+        self.total_token_count: int = prompt_token_count + candidates_token_count
+
+class FakeResponse:
+    """
+    Answer of the fake model, exposing the attributes of a Gemini response the pipeline reads.
+    """
+
+    def __init__(self, text: str, prompt_token_count: int):
+        self.text: str = text
+        self.usage_metadata = FakeUsageMetadata(prompt_token_count, max(1, len(text) // 4))
+
+class FakeModel:
+    """
+    Local stand-in for a Gemini model, so the app can run offline for benchmarks and CI.
+
+    Answers are canned but follow the prompts: layer one prompts report each keyword as found
+    on a page with FAKE_MODEL_RETRIEVAL_RATE, and layer two prompts validate each reported
+    keyword with FAKE_MODEL_VALIDATION_RATE. Both decisions are hashed from the seed, the page
+    and the keyword, so the same page always gets the same answer, whether it is sent alone,
+    packed or batched. Latency, quota errors (429) and malformed answers are drawn from a
+    random generator seeded with the same seed.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        seed: int = FAKE_MODEL_SEED,
+        latency_distribution: str = FAKE_MODEL_LATENCY_DISTRIBUTION,
+        latency_mean: float = FAKE_MODEL_LATENCY_MEAN,
+        latency_spread: float = FAKE_MODEL_LATENCY_SPREAD,
+        quota_error_rate: float = FAKE_MODEL_QUOTA_ERROR_RATE,
+        malformed_rate: float = FAKE_MODEL_MALFORMED_RATE,
+        retrieval_rate: float = FAKE_MODEL_RETRIEVAL_RATE,
+        validation_rate: float = FAKE_MODEL_VALIDATION_RATE
+    ):
+        """
+        Initializes the fake model.
+
+        Args:
+            model_name (str): The name of the model the fake stands in for.
+            seed (int): Seeds the canned answers and the injected latency and errors.
+            latency_distribution (str): "fixed", "uniform" or "lognormal".
+            latency_mean (float): The mean latency of a request, in seconds.
+            latency_spread (float): The half-width of the uniform distribution in seconds,
+                or the sigma of the lognormal distribution.
+            quota_error_rate (float): The share of requests failing with a quota error.
+            malformed_rate (float): The share of answers that are not clean JSON.
+            retrieval_rate (float): The share of page and keyword pairs reported as found.
+            validation_rate (float): The share of reported keywords validated.
+
+        Raises:
+            ValueError: If the latency distribution is unknown.
+        """
+        if latency_distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown fake model latency distribution: {latency_distribution}")
+        self.model_name: str = model_name
+        self.seed: int = seed
+        self.latency_distribution: str = latency_distribution
+        self.latency_mean: float = latency_mean
+        self.latency_spread: float = latency_spread
+        self.quota_error_rate: float = quota_error_rate
+        self.malformed_rate: float = malformed_rate
+        self.retrieval_rate: float = retrieval_rate
+        self.validation_rate: float = validation_rate
+        self._random = random.Random(f"{seed}|{model_name}")
+        self._lock = threading.Lock()
+        self._stats: Dict[str, int] = {
+            "requests": 0,
+            "quota_errors": 0,
+            "malformed_answers": 0
+        }
+
+    def _draw(self, *parts: Any) -> float:
+        """
+        Returns a number in [0, 1) that depends only on the seed and the given parts.
+        """
+        key = "|".join(str(part) for part in (self.seed, *parts))
+        return int(hashlib.sha256(key.encode("utf-8")).hexdigest()[:8], 16) / 0x100000000
+
+    def sample_latency(self) -> float:
+        """
+        Draws the latency of a request from the configured distribution.
+
+        Returns:
+            float: The latency in seconds.
+        """
+        if self.latency_mean <= 0:
+            return 0.0
+        with self._lock:
+            if self.latency_distribution == "uniform":
+                return max(0.0, self._random.uniform(self.latency_mean - self.latency_spread, self.latency_mean + self.latency_spread))
+            if self.latency_distribution == "lognormal" and self.latency_spread > 0:
+                # Chosen so the distribution's mean is latency_mean
+                mu = math.log(self.latency_mean) - self.latency_spread ** 2 / 2
+                return self._random.lognormvariate(mu, self.latency_spread)
+        return self.latency_mean
+
+    def analyze_page(self, context: str, page_number: str, keywords: List[str]) -> Dict[str, Any]:
+        """
+        Builds the canned layer one answer of a page.
+
+        Args:
+            context (str): The publication, edition and date of the page.
+            page_number (str): The page number.
+            keywords (List[str]): The keywords of the query.
+
+        Returns:
+            Dict[str, Any]: The answer, with one article for each keyword reported as found.
+        """
+        found = [
+            {
+                "keyword": keyword,
+                "articles": [{
+                    "headline": f"{keyword} in the news",
+                    "summary": f"An article on page {page_number} reports on {keyword}."
+                }]
+            }
+            for keyword in keywords
+            if self._draw("retrieval", context, page_number, keyword) < self.retrieval_rate
+        ]
+        if not found:
+            return {"retrieval": False}
+        return {"retrieval": True, "keywords": found}
+
+    def validate_page(self, first_response: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Builds the canned layer two answer for the layer one answer of a page.
+
+        Args:
+            first_response (Dict[str, Any]): The layer one answer of the page.
+
+        Returns:
+            Dict[str, Any]: A validation of each keyword of the answer.
+        """
+        validations = []
+        for entry in first_response.get("keywords") or []:
+            if not isinstance(entry, dict):
+                continue
+            keyword = str(entry.get("keyword", ""))
+            articles = entry.get("articles") or [{}]
+            headline = articles[0].get("headline", "") if isinstance(articles[0], dict) else ""
+            valid = self._draw("validation", keyword, headline) < self.validation_rate
+            validations.append({
+                "keyword": keyword,
+                "valid": valid,
+                "reason": f"The keyword '{keyword}' is {'' if valid else 'not '}present in the article."
+            })
+        return {"keyword_validation": validations}
+
+    def build_answer(self, prompt: str) -> Dict[str, Any]:
+        """
+        Builds the canned answer to a prompt of either LLM layer, packed and batched prompts included.
+
+        Args:
+            prompt (str): The text parts of the request.
+
+        Returns:
+            Dict[str, Any]: The answer.
+        """
+        if JSON_INPUT_MARKER in prompt:
+            first_responses = json.loads(prompt.split(JSON_INPUT_MARKER, 1)[1])
+            if "retrieval" in first_responses or "keywords" in first_responses:
+                return self.validate_page(first_responses)
+            # A batched validation, keyed by entry id
+            return {"pages": [
+                {"entry": entry, **self.validate_page(first_response)}
+                for entry, first_response in first_responses.items()
+            ]}
+
+        # The last occurrence wins, so the prompt lines override anything the system prompt mentions
+        fields = {name: value for name, value in PROMPT_FIELD_PATTERN.findall(prompt)}
+        context = "|".join(fields.get(name, "") for name in ("Publication", "Edition", "Date"))
+        # Tags are split off, as the batch prompt asks keywords to be reported without them
+        keywords = [tagged.split("[", 1)[0].strip() for tagged in KEYWORD_PATTERN.findall(fields.get("Keywords", ""))]
+        keywords = [keyword for keyword in keywords if keyword]
+        if "Pages" in fields:
+            page_numbers = [number.strip() for number in fields["Pages"].split(",") if number.strip()]
+            return {"pages": [
+                {"page": int(number) if number.isdigit() else number, **self.analyze_page(context, number, keywords)}
+                for number in page_numbers
+            ]}
+        return self.analyze_page(context, fields.get("Page", ""), keywords)
+
+    def malform(self, text: str) -> str:
+        """
+        Turns a JSON answer into one of the malformed answers models give.
+
+        Args:
+            text (str): The JSON answer.
+
+        Returns:
+            str: The answer wrapped in a markdown fence or prose, truncated, or replaced by prose.
+        """
+        with self._lock:
+            kind = self._random.choice(MALFORMED_KINDS)
+            self._stats[f"malformed_{kind}"] = self._stats.get(f"malformed_{kind}", 0) + 1
+        if kind == "fenced":
+            return f"```json\n{text}\n```"
+        if kind == "prose":
+            return f"Here is the analysis you asked for:\n{text}\nLet me know if you need anything else."
+        if kind == "truncated":
+            return text[:max(1, len(text) * 2 // 3)]
+        return "I am sorry, but I cannot analyze this request."
+
+    async def generate_content_async(self, contents: List[Any], **kwargs: Any) -> FakeResponse:
+        """
+        Answers a request like GenerativeModel.generate_content_async, without network access.
+
+        Args:
+            contents (List[Any]): The request parts; image parts are ignored.
+            **kwargs (Any): Ignored, accepted for compatibility with the Gemini client.
+
+        Returns:
+            FakeResponse: The answer.
+
+        Raises:
+            google_exceptions.ResourceExhausted: For the injected quota errors.
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+            throttled = self._random.random() < self.quota_error_rate
+            malformed = self._random.random() < self.malformed_rate
+        if throttled:
+            with self._lock:
+                self._stats["quota_errors"] += 1
+            raise google_exceptions.ResourceExhausted(f"429 Quota exceeded for {self.model_name} (fake model)")
+
+        await asyncio.sleep(self.sample_latency())
+
+        prompt = "\n".join(part for part in contents if isinstance(part, str))
+        text = json.dumps(self.build_answer(prompt))
+        if malformed:
+            with self._lock:
+                self._stats["malformed_answers"] += 1
+            text = self.malform(text)
+        image_count = sum(1 for part in contents if not isinstance(part, str))
+        return FakeResponse(text, max(1, len(prompt) // 4) + image_count * IMAGE_TOKENS)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the fake model's configuration and counters.
+
+        Returns:
+            Dict[str, Any]: The model name, the latency distribution and injection rates, and the
+                number of requests, injected quota errors and malformed answers of each kind.
+        """
+        with self._lock:
+            counters = dict(self._stats)
+        return {
+            "model": self.model_name,
+            "latency_distribution": self.latency_distribution,
+            "latency_mean": self.latency_mean,
+            "latency_spread": self.latency_spread,
+            "quota_error_rate": self.quota_error_rate,
+            "malformed_rate": self.malformed_rate,
+            **counters
+        }
@@ -1,5 +1,5 @@
 import google.generativeai as genai
-from ..config import GEMINI_API_KEY
+from ..config import GEMINI_API_KEY, GEMINI_MODEL_NAME
 import logging
 from typing import Dict, Any
 
@@ -18,7 +18,7 @@ generation_config: Dict[str, Any] = {
 }
 
 model = genai.GenerativeModel(
-    model_name="gemini-1.5-flash",
+    model_name=GEMINI_MODEL_NAME,
     generation_config=generation_config,
 )
 
@@ -1,7 +1,7 @@
 # backend/app/models/gemini_model_pro.py
 
 import google.generativeai as genai
-from ..config import GEMINI_API_KEY
+from ..config import GEMINI_API_KEY, GEMINI_PRO_MODEL_NAME
 import logging
 from typing import Dict, Any
 
@@ -20,7 +20,7 @@ generation_config_pro: Dict[str, Any] = {
 }
 
 model_pro = genai.GenerativeModel(
-    model_name="gemini-1.5-pro-latest",
+    model_name=GEMINI_PRO_MODEL_NAME,
     generation_config=generation_config_pro,
 )
 
@@ -0,0 +1,84 @@
+import logging
+from typing import Dict, Any, List, Protocol
+from ..config import MODEL_BACKEND, GEMINI_MODEL_NAME, GEMINI_PRO_MODEL_NAME
+
+logger = logging.getLogger(__name__)
+
+# Supported values of MODEL_BACKEND
+MODEL_BACKENDS = ("gemini", "fake")
+
+class ModelBackend(Protocol):
+    """
+    Interface of the models the request schedulers send requests to.
+    """
+
+    async def generate_content_async(self, contents: List[Any], **kwargs: Any) -> Any:
+        """
+        Sends a request to the model.
+
+        Args:
+            contents (List[Any]): The request parts (text and inline images).
+
+        Returns:
+            Any: The response, with its answer in a "text" attribute.
+        """
+        ...
+
+def create_model(model_name: str) -> ModelBackend:
+    """
+    Returns the model used for a Gemini model name, according to MODEL_BACKEND.
+
+    The Gemini modules are imported here, so the Gemini client is only configured when it is used.
+
+    Args:
+        model_name (str): GEMINI_MODEL_NAME or GEMINI_PRO_MODEL_NAME.
+
+    Returns:
+        ModelBackend: The model.
+
+    Raises:
+        ValueError: If MODEL_BACKEND or the model name is unknown.
+    """
+    if MODEL_BACKEND not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model backend: {MODEL_BACKEND}")
+    if model_name not in (GEMINI_MODEL_NAME, GEMINI_PRO_MODEL_NAME):
+        raise ValueError(f"Unknown model: {model_name}")
+
+    if MODEL_BACKEND == "fake":
+        from .fake_model import FakeModel
+        logger.warning(f"Using the fake model backend for {model_name}, no requests are sent to Gemini")
+        return FakeModel(model_name)
+    if model_name == GEMINI_PRO_MODEL_NAME:
+        from .gemini_model_pro import model_pro
+        return model_pro
+    from .gemini_model import model
+    return model
+
+def get_model_names() -> List[str]:
+    """
+    Returns the names identifying the models of both LLM layers in cache keys and query versions.
+
+    Answers of the fake backend are kept apart from those of the real models.
+
+    Returns:
+        List[str]: The model names, prefixed with the backend unless it is "gemini".
+    """
+    names = [GEMINI_MODEL_NAME, GEMINI_PRO_MODEL_NAME]
+    if MODEL_BACKEND == "gemini":
+        return names
+    return [f"{MODEL_BACKEND}:{name}" for name in names]
+
+def get_backend_stats(models: List[Any]) -> Dict[str, Any]:
+    """
+    Returns the model backend in use and the counters of models that report them.
+
+    Args:
+        models (List[Any]): The models of the request schedulers.
+
+    Returns:
+        Dict[str, Any]: The backend name and the stats of each model providing get_stats.
+    """
+    return {
+        "backend": MODEL_BACKEND,
+        "models": [model.get_stats() for model in models if hasattr(model, "get_stats")]
+    }
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List
+
+class ResponseModel(BaseModel):
+    """
+    Base of the answer models. Fields the models do not declare are kept, since the system
+    prompts can be edited to ask for more.
+    """
+    model_config = ConfigDict(extra="allow")
+
+class Article(ResponseModel):
+    """
+    Pydantic model for an article found by the first LLM layer.
+    """
+    headline: str
+    summary: str = ""
+
+class KeywordArticles(ResponseModel):
+    """
+    Pydantic model for a keyword and the articles mentioning it.
+    """
+    keyword: str
+    articles: List[Article]
+
+class LayerOneResponse(ResponseModel):
+    """
+    Pydantic model for the answer of the first LLM layer for one page.
+    """
+    retrieval: bool
+    keywords: List[KeywordArticles] = []
+
+class KeywordValidation(ResponseModel):
+    """
+    Pydantic model for the validation of one keyword by the second LLM layer.
+    """
+    keyword: str
+    valid: bool
+    reason: str = ""
+
+class LayerTwoResponse(ResponseModel):
+    """
+    Pydantic model for the answer of the second LLM layer for one page.
+    """
+    keyword_validation: List[KeywordValidation] = []
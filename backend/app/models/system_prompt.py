@@ -1,10 +1,10 @@
 import json
-from pathlib import Path
 from typing import Tuple
+from ..config import DATA_DIR
 
-# Update the path to point to the root directory
-SYSTEM_PROMPT_FILE = Path(__file__).parent.parent.parent / "DATA" / "system_prompt.json"
-SECOND_SYSTEM_PROMPT_FILE = Path(__file__).parent.parent.parent / "DATA" / "second_system_prompt.json"
+# Prompt files live in the data directory, so they follow the DATA_DIR override
+SYSTEM_PROMPT_FILE = DATA_DIR / "system_prompt.json"
+SECOND_SYSTEM_PROMPT_FILE = DATA_DIR / "second_system_prompt.json"
 
 DEFAULT_SYSTEM_PROMPT: str = """
 You are an AI assistant specialized in analyzing newspaper pages. Your task is to examine the given newspaper page image and respond to queries about its content. Follow these guidelines:
@@ -1 +1 @@
-from . import upload, query, delete, clients, pdfs
\ No newline at end of file
+from . import upload, query, delete, clients, pdfs, jobs, status, search
\ No newline at end of file
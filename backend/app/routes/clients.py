@@ -1,10 +1,17 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, BackgroundTasks
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+import asyncio
 import json
 import logging
 from ..config import CLIENT_DB_FILE
 from ..utils.general_utils import load_clients
+from ..utils.keyword_matcher import build_client_matcher
+from ..utils.metadata_store import (
+    get_client_hits, delete_client_hits, get_standing_results, delete_standing_results,
+    delete_processed_pages
+)
+from ..services.client_matching import rematch_client, rematch_all_pdfs
 from ..utils.custom_exceptions import ClientManagementError, ResourceNotFoundError
 
 logger = logging.getLogger(__name__)
@@ -18,10 +25,12 @@ class Client(BaseModel):
     name: str
     keywords: List[str]
     details: str
+    subscribed: bool = False
 
 def save_clients(clients: Dict[str, Any]) -> None:
     """
-    Saves the clients dictionary to the client_database.json file.
+    Saves the clients dictionary to the client_database.json file and recompiles
+    the keyword matcher used at ingestion.
 
     Args:
         clients (Dict[str, Any]): Dictionary containing client data.
@@ -30,17 +39,20 @@ def save_clients(clients: Dict[str, Any]) -> None:
         with open(CLIENT_DB_FILE, 'w') as f:
             json.dump(clients, f)
         logger.info(f"Saved {len(clients)} clients to {CLIENT_DB_FILE}")
+        build_client_matcher(clients)
     except Exception as e:
         logger.error(f"Failed to save clients: {str(e)}")
         raise ClientManagementError(f"Failed to save clients: {str(e)}")
 
 @router.post("/clients")
-async def add_client(client: Client) -> Dict[str, str]:
+async def add_client(client: Client, background_tasks: BackgroundTasks) -> Dict[str, str]:
     """
-    Adds a new client to the database.
+    Adds a new client to the database and matches its keywords against the stored PDFs
+    in the background.
 
     Args:
         client (Client): Client data to be added.
+        background_tasks (BackgroundTasks): Runs the keyword matching after the response.
 
     Returns:
         Dict[str, str]: A dictionary containing a success message.
@@ -56,9 +68,11 @@ async def add_client(client: Client) -> Dict[str, str]:
     try:
         clients[client.name] = {
             "keywords": client.keywords,
-            "details": client.details
+            "details": client.details,
+            "subscribed": client.subscribed
         }
         save_clients(clients)
+        background_tasks.add_task(rematch_client, client.name, client.keywords)
         return {"message": f"Client {client.name} added successfully"}
     except Exception as e:
         logger.error(f"Failed to add client {client.name}: {str(e)}")
@@ -83,13 +97,15 @@ async def get_clients() -> Dict[str, List[Dict[str, Any]]]:
         raise ClientManagementError(f"Failed to retrieve clients: {str(e)}")
 
 @router.put("/clients/{client_name}")
-async def update_client(client_name: str, client: Client) -> Dict[str, str]:
+async def update_client(client_name: str, client: Client, background_tasks: BackgroundTasks) -> Dict[str, str]:
     """
-    Updates an existing client in the database.
+    Updates an existing client in the database and rematches its keywords against
+    the stored PDFs in the background.
 
     Args:
         client_name (str): Name of the client to be updated.
         client (Client): Updated client data.
+        background_tasks (BackgroundTasks): Runs the keyword matching after the response.
 
     Returns:
         Dict[str, str]: A dictionary containing a success message.
@@ -105,9 +121,11 @@ async def update_client(client_name: str, client: Client) -> Dict[str, str]:
     try:
         clients[client_name] = {
             "keywords": client.keywords,
-            "details": client.details
+            "details": client.details,
+            "subscribed": client.subscribed
         }
         save_clients(clients)
+        background_tasks.add_task(rematch_client, client_name, client.keywords)
         return {"message": f"Client {client_name} updated successfully"}
     except Exception as e:
         logger.error(f"Failed to update client {client_name}: {str(e)}")
@@ -116,7 +134,7 @@ async def update_client(client_name: str, client: Client) -> Dict[str, str]:
 @router.delete("/clients/{client_name}")
 async def delete_client(client_name: str) -> Dict[str, str]:
     """
-    Deletes a client from the database.
+    Deletes a client, its page hits, standing query results and processed page records from the database.
 
     Args:
         client_name (str): Name of the client to be deleted.
@@ -135,7 +153,89 @@ async def delete_client(client_name: str) -> Dict[str, str]:
     try:
         del clients[client_name]
         save_clients(clients)
+        delete_client_hits(client_name)
+        delete_standing_results(client_name)
+        delete_processed_pages(client_name)
         return {"message": f"Client {client_name} deleted successfully"}
     except Exception as e:
         logger.error(f"Failed to delete client {client_name}: {str(e)}")
-        raise ClientManagementError(f"Failed to delete client {client_name}: {str(e)}")
\ No newline at end of file
+        raise ClientManagementError(f"Failed to delete client {client_name}: {str(e)}")
+
+@router.get("/clients/{client_name}/hits")
+async def get_client_page_hits(
+    client_name: str,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Retrieves the pages the client's keywords were found on at ingestion, newest editions first.
+
+    Args:
+        client_name (str): Name of the client.
+        date_from (Optional[str]): The earliest publication date (YYYY-MM-DD), inclusive.
+        date_to (Optional[str]): The latest publication date (YYYY-MM-DD), inclusive.
+
+    Returns:
+        Dict[str, Any]: The client name and, for each page, its id, matched keywords and PDF metadata.
+
+    Raises:
+        ResourceNotFoundError: If the client is not found.
+    """
+    if client_name not in load_clients():
+        raise ResourceNotFoundError("Client", client_name)
+    hits = get_client_hits(client_name, date_from, date_to)
+    for hit in hits:
+        hit["page_id"] = f"{hit['pdf_id']}_{hit['page_number']}"
+    return {"client": client_name, "hits": hits}
+
+@router.get("/clients/{client_name}/results")
+async def get_client_standing_results(
+    client_name: str,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    retrieved_only: bool = True
+) -> Dict[str, Any]:
+    """
+    Retrieves the stored standing query results of a subscribed client, newest editions first.
+
+    Args:
+        client_name (str): Name of the client.
+        date_from (Optional[str]): The earliest publication date (YYYY-MM-DD), inclusive.
+        date_to (Optional[str]): The latest publication date (YYYY-MM-DD), inclusive.
+        retrieved_only (bool, optional): Whether to return only the pages where a keyword was found.
+            Defaults to True.
+
+    Returns:
+        Dict[str, Any]: The client name, whether it is subscribed and, for each page, both LLM
+            responses and the PDF metadata.
+
+    Raises:
+        ResourceNotFoundError: If the client is not found.
+    """
+    clients = load_clients()
+    if client_name not in clients:
+        raise ResourceNotFoundError("Client", client_name)
+    return {
+        "client": client_name,
+        "subscribed": bool(clients[client_name].get("subscribed")),
+        "responses": get_standing_results(client_name, date_from, date_to, retrieved_only)
+    }
+
+@router.post("/clients/hits/rebuild")
+async def rebuild_client_hits() -> Dict[str, Any]:
+    """
+    Recomputes the page hits of every client across all stored PDFs.
+
+    Returns:
+        Dict[str, Any]: A success message and the number of PDFs matched.
+
+    Raises:
+        ClientManagementError: If the rebuild fails.
+    """
+    try:
+        build_client_matcher(load_clients())
+        result = await asyncio.to_thread(rematch_all_pdfs)
+    except Exception as e:
+        logger.error(f"Failed to rebuild client page hits: {str(e)}")
+        raise ClientManagementError(f"Failed to rebuild client page hits: {str(e)}")
+    return {"message": "Client page hits rebuilt", **result}
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 import shutil
 from typing import Dict
-from ..utils.general_utils import load_metadata, save_metadata
+from ..utils.general_utils import get_pdf_metadata, remove_pdf_metadata
+from ..utils.text_index import remove_pdf_pages
 from ..config import UPLOAD_DIR
 from ..utils.custom_exceptions import ResourceNotFoundError, PDFProcessingError
 import logging
@@ -13,7 +14,7 @@ router = APIRouter()
 @router.delete("/delete-pdf/{pdf_id}")
 async def delete_pdf(pdf_id: str) -> Dict[str, str]:
     """
-    Deletes a PDF and its associated metadata.
+    Deletes a PDF, its associated metadata and its pages in the text index.
 
     Args:
         pdf_id (str): The unique identifier of the PDF to be deleted.
@@ -25,9 +26,7 @@ async def delete_pdf(pdf_id: str) -> Dict[str, str]:
         ResourceNotFoundError: If the PDF is not found.
         PDFProcessingError: If there's an error deleting the PDF.
     """
-    metadata = load_metadata()
-    
-    if pdf_id not in metadata['pdfs']:
+    if get_pdf_metadata(pdf_id) is None:
         raise ResourceNotFoundError("PDF", pdf_id)
     
     try:
@@ -37,10 +36,10 @@ async def delete_pdf(pdf_id: str) -> Dict[str, str]:
             shutil.rmtree(pdf_dir)
         
         # Remove the PDF from metadata
-        del metadata['pdfs'][pdf_id]
+        remove_pdf_metadata(pdf_id)
         
-        # Save updated metadata
-        save_metadata(metadata)
+        # Remove the PDF's pages from the text index
+        remove_pdf_pages(pdf_id)
         
         logger.info(f"PDF with id {pdf_id} has been deleted")
         return {"message": f"PDF with id {pdf_id} has been deleted"}
@@ -0,0 +1,49 @@
+from fastapi import APIRouter
+from typing import Dict, List, Any
+from ..services.ingestion_jobs import get_job, list_jobs
+from ..services.standing_queries import list_runs
+from ..utils.custom_exceptions import ResourceNotFoundError
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/jobs")
+async def get_jobs() -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Retrieves all tracked ingestion jobs.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: A dictionary containing the status of each job.
+    """
+    return {"jobs": [job.to_dict() for job in list_jobs()]}
+
+@router.get("/jobs/standing-queries")
+async def get_standing_query_runs() -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Retrieves the tracked standing query runs of newly ingested PDFs.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: A dictionary containing the status of each run.
+    """
+    return {"runs": [run.to_dict() for run in list_runs()]}
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str) -> Dict[str, Any]:
+    """
+    Retrieves the status and progress of an ingestion job.
+
+    Args:
+        job_id (str): The identifier of the job.
+
+    Returns:
+        Dict[str, Any]: The job status, pages done, pages per second and, once completed, the PDF id.
+
+    Raises:
+        ResourceNotFoundError: If the job is not found.
+    """
+    job = get_job(job_id)
+    if job is None:
+        raise ResourceNotFoundError("Job", job_id)
+    return job.to_dict()
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
-from ..utils.general_utils import load_metadata
-from ..utils.custom_exceptions import PDFProcessingError
+from ..utils.general_utils import load_metadata, get_pdf_metadata
+from ..utils.metadata_store import get_pdf_client_hits
+from ..utils.custom_exceptions import PDFProcessingError, ResourceNotFoundError
 import logging
 from typing import Dict, List, Any
 
@@ -35,4 +36,22 @@ async def list_pdfs() -> Dict[str, List[Dict[str, Any]]]:
         return {"pdfs": pdf_list}
     except Exception as e:
         logger.error(f"Error fetching PDF list: {str(e)}")
-        raise PDFProcessingError(f"Error fetching PDF list: {str(e)}")
\ No newline at end of file
+        raise PDFProcessingError(f"Error fetching PDF list: {str(e)}")
+
+@router.get("/pdfs/{pdf_id}/clients")
+async def get_pdf_clients(pdf_id: str) -> Dict[str, Any]:
+    """
+    Retrieves the clients whose keywords were found in a PDF at ingestion.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+
+    Returns:
+        Dict[str, Any]: The PDF id and, for each matching client, the matched keywords by page number.
+
+    Raises:
+        ResourceNotFoundError: If the PDF is not found.
+    """
+    if get_pdf_metadata(pdf_id) is None:
+        raise ResourceNotFoundError("PDF", pdf_id)
+    return {"pdf_id": pdf_id, "clients": get_pdf_client_hits(pdf_id)}
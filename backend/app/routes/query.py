@@ -1,28 +1,256 @@
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, AsyncIterator, Coroutine, Literal, Tuple
 import asyncio
-from ..models.system_prompt import get_system_prompt, get_additional_query
-from ..utils.general_utils import load_metadata, get_pdf_count
-from ..utils.retry_processor import identify_failed_responses, retry_failed_responses
+import json
+import time
+from ..models.system_prompt import get_additional_query
+from ..utils.general_utils import find_pdf_metadata
+from ..services.keyword_prefilter import select_candidate_pages
+from ..services.page_processor import build_query_version
+from ..utils.metadata_store import get_processed_pages, put_processed_pages
+from ..utils.keyword_matcher import normalize_text, CLIENT_TAG_PATTERN
+from ..utils.retry_processor import identify_failed_responses, process_page_with_retry, RetryBudget
 from ..utils.custom_exceptions import QueryProcessingError, RateLimitExceededError
 import logging
-from ..services.page_processor import process_page
+from ..config import KEYWORD_PREFILTER_ENABLED
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-class QueryRequest(BaseModel):
+# Media types of the streaming query formats
+STREAM_MEDIA_TYPES: Dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+class QueryScope(BaseModel):
+    """
+    Pydantic model for the PDF scope and page selection options shared by query requests.
+    """
+    date_from: Optional[str] = None
+    date_to: Optional[str] = None
+    publications: List[str] = []
+    editions: List[str] = []
+    pdf_ids: List[str] = []
+    prefilter: bool = KEYWORD_PREFILTER_ENABLED
+    fuzzy: bool = False
+
+class QueryRequest(QueryScope):
     """
     Pydantic model for query request data.
     """
     client: str
     keywords: List[str]
     additional_query: str = ""
+    incremental: bool = False
+
+class BatchClientQuery(BaseModel):
+    """
+    Pydantic model for one client of a batch query.
+    """
+    client: str
+    keywords: List[str]
+    additional_query: str = ""
+
+class BatchQueryRequest(QueryScope):
+    """
+    Pydantic model for a query run for several clients at once.
+    """
+    clients: List[BatchClientQuery]
+
+def select_pdfs(request: QueryScope) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolves the scope of a query to the metadata of the PDFs it covers.
+
+    Args:
+        request (QueryScope): The query request with its date-range, publication,
+            edition and PDF id filters.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The metadata of each PDF in scope by PDF id.
+    """
+    return find_pdf_metadata(
+        date_from=request.date_from,
+        date_to=request.date_to,
+        publications=request.publications,
+        editions=request.editions,
+        pdf_ids=request.pdf_ids
+    )
+
+def build_full_query(request: QueryRequest) -> str:
+    """
+    Builds the query text sent to the first LLM layer for every page.
+
+    Args:
+        request (QueryRequest): The query request.
+
+    Returns:
+        str: The default additional query, the request's additional query and the keywords.
+    """
+    default_additional_query = get_additional_query()
+    return f"{default_additional_query} {request.additional_query}\nKeywords: {', '.join(request.keywords)}"
+
+async def select_pages(
+    request: QueryScope,
+    pdfs: Dict[str, Dict[str, Any]],
+    keywords: List[str]
+) -> Optional[Dict[str, List[int]]]:
+    """
+    Runs the keyword prefilter over the PDFs in scope if the request enables it.
+
+    Args:
+        request (QueryScope): The query request.
+        pdfs (Dict[str, Dict[str, Any]]): The metadata of each PDF in scope by PDF id.
+        keywords (List[str]): The keywords the pages must mention.
+
+    Returns:
+        Optional[Dict[str, List[int]]]: The candidate page numbers of each PDF, or None
+            if every page is to be analyzed.
+    """
+    if not request.prefilter:
+        return None
+    return await asyncio.to_thread(select_candidate_pages, pdfs, keywords, request.fuzzy)
+
+def count_pages(pdfs: Dict[str, Dict[str, Any]]) -> int:
+    """
+    Returns the total number of pages of the given PDFs.
+    """
+    return sum(pdf_data.get("total_pages", 0) for pdf_data in pdfs.values())
+
+def get_all_pages(pdfs: Dict[str, Dict[str, Any]]) -> Dict[str, List[int]]:
+    """
+    Returns every page number of the given PDFs.
+    """
+    return {pdf_id: list(range(1, pdf_data.get("total_pages", 0) + 1)) for pdf_id, pdf_data in pdfs.items()}
+
+def exclude_processed_pages(
+    pdfs: Dict[str, Dict[str, Any]],
+    pages: Optional[Dict[str, List[int]]],
+    processed: Dict[str, Dict[int, Dict[str, Any]]]
+) -> Optional[Dict[str, List[int]]]:
+    """
+    Removes the pages a client's query has already analyzed from the page selection.
+
+    Args:
+        pdfs (Dict[str, Dict[str, Any]]): The metadata of each PDF in scope by PDF id.
+        pages (Optional[Dict[str, List[int]]]): The selected page numbers of each PDF, or None for all pages.
+        processed (Dict[str, Dict[int, Dict[str, Any]]]): The stored responses of the processed pages by PDF id.
+
+    Returns:
+        Optional[Dict[str, List[int]]]: The selected page numbers that were not processed yet.
+    """
+    if not processed:
+        return pages
+    if pages is None:
+        pages = get_all_pages(pdfs)
+    return {
+        pdf_id: [page_num for page_num in page_numbers if page_num not in processed.get(pdf_id, {})]
+        for pdf_id, page_numbers in pages.items()
+    }
+
+def record_processed_pages(client: str, query_version: str, responses: List[Dict[str, Any]]) -> None:
+    """
+    Stores the responses of the pages a client's query analyzed successfully.
+
+    Pages whose answer was truncated are left out, so the next incremental query analyzes them again.
+
+    Args:
+        client (str): The name of the client.
+        query_version (str): The version of the query.
+        responses (List[Dict[str, Any]]): The valid page processing results.
+    """
+    pages: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    for response in responses:
+        if not response.get("page_id") or response.get("truncated"):
+            continue
+        pdf_id, page_num = response["page_id"].rsplit("_", 1)
+        pages.setdefault(pdf_id, {})[int(page_num)] = format_page_response(response)
+    if pages:
+        put_processed_pages(client, query_version, pages)
+
+def build_page_tasks(
+    pdfs: Dict[str, Dict[str, Any]],
+    full_query: str,
+    client: str,
+    pages: Optional[Dict[str, List[int]]] = None,
+    keywords: Optional[List[str]] = None,
+    fuzzy: bool = False
+) -> List[Coroutine[Any, Any, Dict[str, Any]]]:
+    """
+    Creates one processing coroutine for every selected page of the given PDFs.
+
+    Failed pages are retried as soon as they fail, within one retry budget shared
+    by all pages of the query.
+
+    Args:
+        pdfs (Dict[str, Dict[str, Any]]): The metadata of each PDF in scope by PDF id.
+        full_query (str): The query to be applied to every page.
+        client (str): The name of the client.
+        pages (Optional[Dict[str, List[int]]]): The 1-based page numbers to process for
+            each PDF, as selected by the keyword prefilter. Defaults to all pages.
+        keywords (Optional[List[str]]): The keywords used to select article regions to crop.
+            Defaults to none, which sends full pages.
+        fuzzy (bool, optional): Whether region selection allows approximate matches. Defaults to False.
+
+    Returns:
+        List[Coroutine[Any, Any, Dict[str, Any]]]: The page processing coroutines.
+    """
+    if pages is None:
+        pages = get_all_pages(pdfs)
+    budget = RetryBudget.for_pages(sum(len(page_numbers) for page_numbers in pages.values()))
+    tasks = []
+    for pdf_id, pdf_data in pdfs.items():
+        page_numbers = pages.get(pdf_id, [])
+        logger.info(f"Processing PDF {pdf_id}: {len(page_numbers)} of {pdf_data.get('total_pages', 0)} pages")
+
+        for page_num in page_numbers:
+            page = {
+                "id": f"{pdf_id}_{page_num}",
+                "number": page_num,
+                "pdf_data": pdf_data,
+                "keywords": keywords or [],
+                "fuzzy": fuzzy
+            }
+            tasks.append(process_page_with_retry(page, pdf_data, full_query, client, budget))
+    return tasks
+
+def format_page_response(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduces a page processing result to the fields returned to the client.
+
+    Args:
+        response (Dict[str, Any]): The result of process_page.
+
+    Returns:
+        Dict[str, Any]: The page id and both LLM responses.
+    """
+    return {
+        "page_id": response.get("page_id"),
+        "first_response": response.get("first_response"),
+        "second_response": response.get("second_response")
+    }
+
+def format_failed_page(response: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Reduces a failed page processing result to the fields returned to the client.
+
+    Args:
+        response (Dict[str, Any]): The final result of process_page_with_retry.
+
+    Returns:
+        Dict[str, Any]: The page id, the last error and the number of retries.
+    """
+    return {
+        "page_id": response.get("page_id"),
+        "error": response.get("error", "Invalid response"),
+        "retries": response.get("retries", 0)
+    }
 
 @router.post("/query")
-async def query_pdf(request: QueryRequest) -> Dict[str, List[Dict[str, Any]]]:
+async def query_pdf(request: QueryRequest) -> Dict[str, Any]:
     """
     Processes a query request for PDF analysis.
 
@@ -30,69 +258,330 @@ async def query_pdf(request: QueryRequest) -> Dict[str, List[Dict[str, Any]]]:
     processing pages, and returning the results.
 
     Args:
-        request (QueryRequest): The query request containing client, keywords, and additional query.
+        request (QueryRequest): The query request containing client, keywords, additional query,
+            optional date-range, publication, edition and PDF id filters, the keyword
+            prefilter options and whether to analyze only the pages not processed yet.
 
     Returns:
-        Dict[str, List[Dict[str, Any]]]: A dictionary containing a list of responses for each processed page.
+        Dict[str, Any]: A dictionary containing a list of responses for each processed page,
+            the pages that still failed after their retries, the number of pages skipped
+            by the keyword prefilter and the number of stored responses reused.
 
     Raises:
         QueryProcessingError: If an error occurs during query processing.
     """
     client = request.client
-    keywords = request.keywords
-    additional_query = request.additional_query
     responses: List[Dict[str, Any]] = []
     
     logger.info(f"Received query for client: {client}")
     
     try:
-        metadata = load_metadata()
-        extracted_pages = metadata.get("pdfs", {})
-        pdf_count = get_pdf_count()
-        logger.info(f"Total PDFs in metadata: {pdf_count}")
+        extracted_pages = select_pdfs(request)
         
-        system_prompt = get_system_prompt()
-        default_additional_query = get_additional_query()
-        
-        full_query = f"{default_additional_query} {additional_query}\nKeywords: {', '.join(keywords)}"
+        full_query = build_full_query(request)
         
         logger.info(f"Number of PDFs to process: {len(extracted_pages)}")
         
         if len(extracted_pages) == 0:
-            logger.warning("No PDFs found in metadata. Check if PDFs are being properly saved.")
+            logger.warning("No PDFs found in the query scope. Check the filters and if PDFs are being properly saved.")
             return {"responses": [], "message": "No PDFs found to process"}
         
-        tasks = []
-        for pdf_id, pdf_data in extracted_pages.items():
-            total_pages = pdf_data.get("total_pages", 0)
-            logger.info(f"Processing PDF {pdf_id} with {total_pages} pages")
-            
-            for page_num in range(total_pages):
-                page = {
-                    "id": f"{pdf_id}_{page_num+1}",
-                    "number": page_num+1,
-                    "pdf_data": pdf_data
-                }
-                tasks.append(process_page(page, pdf_data, full_query, client))
+        selected_pages = await select_pages(request, extracted_pages, request.keywords)
+
+        # Incremental queries reuse the stored responses of pages analyzed for the same query version
+        query_version = build_query_version(request.additional_query, request.keywords)
+        processed_pages = {}
+        if request.incremental:
+            processed_pages = await asyncio.to_thread(get_processed_pages, client, query_version, list(extracted_pages))
+        reused_responses = [response for pages in processed_pages.values() for response in pages.values()]
+        selected_pages = exclude_processed_pages(extracted_pages, selected_pages, processed_pages)
+
+        tasks = build_page_tasks(extracted_pages, full_query, client, selected_pages, request.keywords, request.fuzzy)
         
         responses = await asyncio.gather(*tasks)
         
         valid_responses, failed_responses = identify_failed_responses(responses)
+        await asyncio.to_thread(record_processed_pages, client, query_version, valid_responses)
         
         if failed_responses:
-            retried_responses = await retry_failed_responses(failed_responses, full_query, client)
-            valid_responses.extend(retried_responses)
+            logger.warning(f"{len(failed_responses)} pages failed after retries")
         
-        logger.info(f"Query processing complete. Total responses: {len(valid_responses)}")
-        return {"responses": [
-            {
-                "page_id": r.get("page_id"),
-                "first_response": r.get("first_response"),
-                "second_response": r.get("second_response")
-            } 
-            for r in valid_responses if r.get("page_id")
-        ]}
+        logger.info(f"Query processing complete. Total responses: {len(valid_responses)}, reused: {len(reused_responses)}")
+        return {
+            "responses": reused_responses + [format_page_response(r) for r in valid_responses if r.get("page_id")],
+            "failed_pages": [format_failed_page(r) for r in failed_responses],
+            "pages_skipped": count_pages(extracted_pages) - len(tasks) - len(reused_responses),
+            "pages_reused": len(reused_responses)
+        }
 
     except Exception as e:
         logger.error(f"An error occurred during query processing: {str(e)}")
-        raise QueryProcessingError(f"An error occurred during query processing: {str(e)}")
\ No newline at end of file
+        raise QueryProcessingError(f"An error occurred during query processing: {str(e)}")
+
+def encode_stream_record(record: Dict[str, Any], output_format: str) -> str:
+    """
+    Encodes a streamed query record as an NDJSON line or a Server-Sent Event.
+
+    Args:
+        record (Dict[str, Any]): The record, with its kind in the "type" field.
+        output_format (str): "ndjson" or "sse".
+
+    Returns:
+        str: The encoded record.
+    """
+    data = json.dumps(record)
+    if output_format == "sse":
+        return f"event: {record['type']}\ndata: {data}\n\n"
+    return f"{data}\n"
+
+async def stream_query_results(request: QueryRequest, output_format: str) -> AsyncIterator[str]:
+    """
+    Processes a query and yields each page's result as soon as it is available,
+    followed by a summary record.
+
+    Pages are retried as soon as they fail, like in /query, so a page's record is
+    streamed once its last attempt is done. Incremental queries stream the stored
+    responses of the pages already processed first, marked as reused.
+
+    Args:
+        request (QueryRequest): The query request.
+        output_format (str): "ndjson" or "sse".
+
+    Yields:
+        str: Encoded "page" and "failed" records, then one "summary" record (or an "error" record).
+            The summary's "pages_returned" counts the pages analyzed by this query.
+    """
+    client = request.client
+    start_time = time.monotonic()
+    first_result_time: Optional[float] = None
+    pages_returned = 0
+    pages_failed = 0
+    reused_responses: List[Dict[str, Any]] = []
+    tasks: List[asyncio.Future] = []
+
+    logger.info(f"Received streaming query for client: {client}")
+
+    try:
+        extracted_pages = select_pdfs(request)
+        full_query = build_full_query(request)
+        selected_pages = await select_pages(request, extracted_pages, request.keywords)
+
+        # Incremental queries reuse the stored responses of pages analyzed for the same query version
+        query_version = build_query_version(request.additional_query, request.keywords)
+        if request.incremental:
+            processed_pages = await asyncio.to_thread(get_processed_pages, client, query_version, list(extracted_pages))
+            reused_responses = [response for pages in processed_pages.values() for response in pages.values()]
+            selected_pages = exclude_processed_pages(extracted_pages, selected_pages, processed_pages)
+        for response in reused_responses:
+            if first_result_time is None:
+                first_result_time = time.monotonic() - start_time
+            yield encode_stream_record({"type": "page", **response, "reused": True}, output_format)
+
+        tasks = [
+            asyncio.ensure_future(task)
+            for task in build_page_tasks(extracted_pages, full_query, client, selected_pages, request.keywords, request.fuzzy)
+        ]
+
+        for next_result in asyncio.as_completed(tasks):
+            response = await next_result
+            valid, failed = identify_failed_responses([response])
+            # Recorded page by page, so an interrupted stream keeps the pages already analyzed
+            await asyncio.to_thread(record_processed_pages, client, query_version, valid)
+            for r in valid:
+                if first_result_time is None:
+                    first_result_time = time.monotonic() - start_time
+                pages_returned += 1
+                yield encode_stream_record({"type": "page", **format_page_response(r)}, output_format)
+            for r in failed:
+                pages_failed += 1
+                yield encode_stream_record({"type": "failed", **format_failed_page(r)}, output_format)
+
+        logger.info(f"Streaming query complete. Total responses: {pages_returned}")
+        yield encode_stream_record({
+            "type": "summary",
+            "pdfs_total": len(extracted_pages),
+            "pages_total": len(tasks),
+            "pages_skipped": count_pages(extracted_pages) - len(tasks) - len(reused_responses),
+            "pages_reused": len(reused_responses),
+            "pages_returned": pages_returned,
+            "pages_failed": pages_failed,
+            "time_to_first_result": round(first_result_time, 3) if first_result_time is not None else None,
+            "elapsed_seconds": round(time.monotonic() - start_time, 3)
+        }, output_format)
+
+    except Exception as e:
+        logger.error(f"An error occurred during streaming query processing: {str(e)}")
+        yield encode_stream_record({
+            "type": "error",
+            "error": f"Query Processing Error: An error occurred during query processing: {str(e)}"
+        }, output_format)
+    finally:
+        # Stop outstanding page work if the client went away
+        for task in tasks:
+            task.cancel()
+
+@router.post("/query/stream")
+async def query_pdf_stream(request: QueryRequest, format: Literal["ndjson", "sse"] = "ndjson") -> StreamingResponse:
+    """
+    Processes a query request and streams each page's result as soon as it is ready.
+
+    Args:
+        request (QueryRequest): The query request, as for /query.
+        format (Literal["ndjson", "sse"], optional): "ndjson" (one JSON object per line) or
+            "sse" (Server-Sent Events). Defaults to "ndjson".
+
+    Returns:
+        StreamingResponse: The stream of page records followed by a summary record.
+    """
+    return StreamingResponse(
+        stream_query_results(request, format),
+        media_type=STREAM_MEDIA_TYPES[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def merge_client_keywords(clients: List[BatchClientQuery]) -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    Merges the keywords of several clients.
+
+    Keywords are deduplicated case- and diacritic-insensitively, keeping the first spelling.
+
+    Args:
+        clients (List[BatchClientQuery]): The clients of the batch query.
+
+    Returns:
+        Tuple[List[str], Dict[str, List[str]]]: The merged keywords, and the names of the
+            clients of each keyword by normalized keyword.
+    """
+    keywords: List[str] = []
+    keyword_clients: Dict[str, List[str]] = {}
+    for client in clients:
+        for keyword in client.keywords:
+            normalized = normalize_text(keyword)
+            if not normalized.strip():
+                continue
+            if normalized not in keyword_clients:
+                keyword_clients[normalized] = []
+                keywords.append(keyword)
+            if client.client not in keyword_clients[normalized]:
+                keyword_clients[normalized].append(client.client)
+    return keywords, keyword_clients
+
+def build_batch_query(request: BatchQueryRequest, keywords: List[str], keyword_clients: Dict[str, List[str]]) -> str:
+    """
+    Builds the query text sent to the first LLM layer for every page of a batch query.
+
+    Args:
+        request (BatchQueryRequest): The batch query request.
+        keywords (List[str]): The merged keywords.
+        keyword_clients (Dict[str, List[str]]): The clients of each keyword by normalized keyword.
+
+    Returns:
+        str: The default additional query, each client's additional query and the keywords
+            tagged with their clients.
+    """
+    default_additional_query = get_additional_query()
+    client_queries = "\n".join(
+        f"For {client.client}: {client.additional_query}" for client in request.clients if client.additional_query
+    )
+    tagged_keywords = ", ".join(
+        f"{keyword} [{', '.join(keyword_clients[normalize_text(keyword)])}]" for keyword in keywords
+    )
+    return (
+        f"{default_additional_query}\n{client_queries}\n"
+        f"Each keyword is followed by the clients it belongs to in brackets; report keywords without the brackets.\n"
+        f"Keywords: {tagged_keywords}"
+    )
+
+def get_keyword_clients(keyword: Any, keyword_clients: Dict[str, List[str]]) -> List[str]:
+    """
+    Returns the clients of a keyword reported by a model, ignoring case, diacritics and client tags.
+    """
+    if not isinstance(keyword, str):
+        return []
+    return keyword_clients.get(normalize_text(CLIENT_TAG_PATTERN.sub("", keyword)), [])
+
+def route_page_response(response: Dict[str, Any], client: str, keyword_clients: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    Extracts one client's part of a page result of a batch query.
+
+    Only the keywords of the client are kept in both LLM responses, and retrieval is
+    false when none of them was found on the page.
+
+    Args:
+        response (Dict[str, Any]): The page result for the merged keywords.
+        client (str): The name of the client.
+        keyword_clients (Dict[str, List[str]]): The clients of each keyword by normalized keyword.
+
+    Returns:
+        Dict[str, Any]: The page id and both LLM responses for the client.
+    """
+    routed = format_page_response(response)
+    first_response = routed.get("first_response")
+    if isinstance(first_response, dict):
+        keywords = [
+            {**keyword, "keyword": CLIENT_TAG_PATTERN.sub("", keyword["keyword"])}
+            for keyword in first_response.get("keywords", [])
+            if client in get_keyword_clients(keyword.get("keyword"), keyword_clients)
+        ]
+        routed["first_response"] = {**first_response, "retrieval": bool(keywords), "keywords": keywords}
+        if not keywords:
+            routed["second_response"] = None
+
+    second_response = routed.get("second_response")
+    if isinstance(second_response, dict) and "keyword_validation" in second_response:
+        routed["second_response"] = {
+            **second_response,
+            "keyword_validation": [
+                validation for validation in second_response["keyword_validation"]
+                if client in get_keyword_clients(validation.get("keyword"), keyword_clients)
+            ]
+        }
+    return routed
+
+@router.post("/query/batch")
+async def query_pdf_batch(request: BatchQueryRequest) -> Dict[str, Any]:
+    """
+    Processes a query for several clients with one analysis per page.
+
+    Every page is analyzed once for the merged keywords of all clients, and each keyword's
+    articles are routed back to the clients it belongs to, so LLM calls scale with the number
+    of pages rather than pages times clients.
+
+    Args:
+        request (BatchQueryRequest): The clients with their keywords and additional queries, and
+            the date-range, publication, edition and PDF id filters and prefilter options.
+
+    Returns:
+        Dict[str, Any]: The page responses of each client, the pages that still failed after
+            their retries and the number of pages analyzed and skipped.
+
+    Raises:
+        QueryProcessingError: If an error occurs during query processing.
+    """
+    client_names = [client.client for client in request.clients]
+    logger.info(f"Received batch query for clients: {', '.join(client_names)}")
+
+    try:
+        extracted_pages = select_pdfs(request)
+        keywords, keyword_clients = merge_client_keywords(request.clients)
+        full_query = build_batch_query(request, keywords, keyword_clients)
+
+        selected_pages = await select_pages(request, extracted_pages, keywords)
+        tasks = build_page_tasks(extracted_pages, full_query, ", ".join(client_names), selected_pages, keywords, request.fuzzy)
+        responses = await asyncio.gather(*tasks)
+
+        valid_responses, failed_responses = identify_failed_responses(responses)
+        logger.info(f"Batch query processing complete. {len(valid_responses)} pages analyzed for {len(client_names)} clients")
+        return {
+            "clients": {
+                name: {"responses": [route_page_response(r, name, keyword_clients) for r in valid_responses if r.get("page_id")]}
+                for name in client_names
+            },
+            "failed_pages": [format_failed_page(r) for r in failed_responses],
+            "pages_analyzed": len(tasks),
+            "pages_skipped": count_pages(extracted_pages) - len(tasks)
+        }
+
+    except Exception as e:
+        logger.error(f"An error occurred during batch query processing: {str(e)}")
+        raise QueryProcessingError(f"An error occurred during batch query processing: {str(e)}")
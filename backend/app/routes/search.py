@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Query
+from typing import Dict, List, Any, Literal, Optional
+import asyncio
+import time
+from ..services.keyword_prefilter import rebuild_text_index
+from ..utils.general_utils import get_pdf_metadata
+from ..utils.text_index import build_match_expression, search_pages, get_index_stats
+from ..utils.custom_exceptions import QueryProcessingError
+from ..config import SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1),
+    match: Literal["all", "any"] = "all",
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    pdf_ids: Optional[List[str]] = Query(None)
+) -> Dict[str, Any]:
+    """
+    Searches the text of every ingested page.
+
+    Args:
+        q (str): The search terms; double-quoted parts are matched as phrases.
+        match (Literal["all", "any"], optional): Whether pages must contain all terms or any of them.
+            Defaults to "all".
+        limit (int, optional): The maximum number of pages returned. Defaults to SEARCH_DEFAULT_LIMIT.
+        pdf_ids (Optional[List[str]]): Restricts the search to these PDFs.
+
+    Returns:
+        Dict[str, Any]: The matching pages, best first, with their snippet and PDF metadata,
+            and the search time in milliseconds.
+
+    Raises:
+        QueryProcessingError: If the search fails.
+    """
+    start_time = time.perf_counter()
+    try:
+        hits = await asyncio.to_thread(
+            search_pages, build_match_expression(q, match_all=match == "all"), pdf_ids, limit
+        )
+    except Exception as e:
+        logger.error(f"Error searching page text for {q!r}: {str(e)}")
+        raise QueryProcessingError(f"Error searching page text: {str(e)}")
+
+    pdf_metadata: Dict[str, Optional[Dict[str, Any]]] = {}
+    for hit in hits:
+        if hit["pdf_id"] not in pdf_metadata:
+            pdf_metadata[hit["pdf_id"]] = get_pdf_metadata(hit["pdf_id"])
+        pdf_data = pdf_metadata[hit["pdf_id"]] or {}
+        hit["publication_name"] = pdf_data.get("publication_name")
+        hit["edition"] = pdf_data.get("edition")
+        hit["date"] = pdf_data.get("date")
+
+    return {
+        "query": q,
+        "results": hits,
+        "elapsed_ms": round((time.perf_counter() - start_time) * 1000, 2)
+    }
+
+@router.get("/search/stats")
+async def get_search_stats() -> Dict[str, int]:
+    """
+    Retrieves the size of the text index.
+
+    Returns:
+        Dict[str, int]: The number of indexed PDFs, pages and pages with a text layer.
+    """
+    return get_index_stats()
+
+@router.post("/search/rebuild")
+async def rebuild_search_index() -> Dict[str, Any]:
+    """
+    Rebuilds the text index from the page texts of every stored PDF.
+
+    Returns:
+        Dict[str, Any]: A success message and the number of PDFs indexed.
+
+    Raises:
+        QueryProcessingError: If the rebuild fails.
+    """
+    try:
+        result = await asyncio.to_thread(rebuild_text_index)
+    except Exception as e:
+        logger.error(f"Error rebuilding the text index: {str(e)}")
+        raise QueryProcessingError(f"Error rebuilding the text index: {str(e)}")
+    return {"message": "Text index rebuilt", **result}
@@ -0,0 +1,43 @@
+from fastapi import APIRouter
+from typing import Dict, List, Any
+from ..utils.request_pipeline import flash_scheduler, pro_scheduler
+from ..services.llm_layer_one import layer_one_packer
+from ..services.llm_layer_two import layer_two_batcher
+from ..services.local_validation import get_local_validation_stats
+from ..utils.response_parser import get_parsing_stats
+from ..models.model_backend import get_backend_stats
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/status/pipelines")
+async def get_pipeline_status() -> Dict[str, Any]:
+    """
+    Retrieves the state of the request schedulers of both models, of the model backend,
+    of layer one packing, of local validation and of layer two batching.
+
+    Returns:
+        Dict[str, Any]: For each model: the current and configured request rate, queue length,
+            requests in flight, and throttle counters and rate; the model backend in use; and the packing,
+            local validation and batching counters.
+    """
+    return {
+        "pipelines": [flash_scheduler.get_stats(), pro_scheduler.get_stats()],
+        "model_backend": get_backend_stats([flash_scheduler.model, pro_scheduler.model]),
+        "layer_one_packing": layer_one_packer.get_stats(),
+        "local_validation": get_local_validation_stats(),
+        "layer_two_batching": layer_two_batcher.get_stats()
+    }
+
+@router.get("/status/parsing")
+async def get_parsing_status() -> Dict[str, Any]:
+    """
+    Retrieves how the answers of both LLM layers were parsed.
+
+    Returns:
+        Dict[str, Any]: The JSON parser in use and, for each layer, the counts of answers parsed
+            strictly, salvaged and failed, and the salvage rate.
+    """
+    return get_parsing_stats()
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, File, UploadFile, Form
 from ..services.pdf_processor import PDFProcessor
+from ..services.ingestion_jobs import submit_ingestion_job
 from ..utils.custom_exceptions import PDFUploadError, PDFProcessingError
 import logging
 
@@ -13,22 +14,26 @@ async def upload_pdf(
     file: UploadFile = File(...),
     publication_name: str = Form(...),
     edition: str = Form(...),
-    date: str = Form(...)
+    date: str = Form(...),
+    background: bool = Form(False)
 ):
     """
     Handles the upload of a PDF file along with its metadata.
 
     This function processes the uploaded PDF, extracts its pages,
-    and saves the associated metadata.
+    and saves the associated metadata. When `background` is set, the
+    extraction runs as an ingestion job and the job id is returned
+    immediately; progress is available from `/jobs/{job_id}`.
 
     Args:
         file (UploadFile): The PDF file to be uploaded.
         publication_name (str): The name of the publication.
         edition (str): The edition of the publication.
         date (str): The date of the publication.
+        background (bool): Whether to extract the pages in a background job.
 
     Returns:
-        dict: A dictionary containing the PDF ID and a success message.
+        dict: A dictionary containing the PDF ID (or job ID) and a success message.
 
     Raises:
         PDFUploadError: If there's an error during the upload process.
@@ -38,28 +43,32 @@ async def upload_pdf(
     logger.info(f"Publication Name: {publication_name}")
     logger.info(f"Edition: {edition}")
     logger.info(f"Date: {date}")
-    
+
     if file.content_type != "application/pdf":
         logger.warning(f"Rejected file: {file.filename} (not a PDF)")
         raise PDFUploadError("Only PDF files are allowed")
-    
+
     try:
-        # Read the uploaded file content
-        pdf_content = await file.read()
-        
         # Generate a unique identifier for this PDF
         pdf_id = pdf_processor.generate_pdf_id()
-        
-        # Extract pages and save images
-        total_pages = pdf_processor.extract_pages(pdf_content, pdf_id)
-        
-        # Update metadata
-        pdf_processor.update_metadata(pdf_id, publication_name, edition, date, total_pages)
-        
+
+        # Stream the PDF to disk so the rendering workers can open it by path
+        pdf_path, file_size, sha256 = await pdf_processor.save_upload(file, pdf_id)
+
+        if background:
+            job = submit_ingestion_job(
+                pdf_processor, pdf_path, pdf_id, file.filename, publication_name, edition, date,
+                file_size, sha256
+            )
+            return {"job_id": job.job_id, "status": job.status, "message": "PDF uploaded, page extraction queued"}
+
+        # Extract pages and update metadata
+        await pdf_processor.process_pdf(pdf_path, pdf_id, publication_name, edition, date, file_size, sha256)
+
         logger.info(f"Successfully processed PDF: {file.filename}")
         logger.info(f"Metadata file location: {pdf_processor.metadata_file}")
-        
+
         return {"pdf_id": pdf_id, "message": "PDF uploaded and pages extracted successfully"}
     except Exception as e:
         logger.error(f"Error in upload_pdf: {str(e)}")
-        raise PDFProcessingError(f"Error processing PDF: {str(e)}")
\ No newline at end of file
+        raise PDFProcessingError(f"Error processing PDF: {str(e)}")
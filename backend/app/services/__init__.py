@@ -1 +1 @@
-from . import llm_layer_one, llm_layer_two, pdf_processor, page_processor
\ No newline at end of file
+from . import llm_layer_one, llm_layer_two, pdf_processor, page_processor, page_renderer, page_encoder, ingestion_jobs, keyword_prefilter, client_matching, region_cropper, standing_queries, local_validation
\ No newline at end of file
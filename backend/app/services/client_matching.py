@@ -0,0 +1,96 @@
+import logging
+from typing import Dict, List
+from .keyword_prefilter import get_page_text_path
+from ..utils.file_utils import load_text
+from ..utils.general_utils import load_metadata
+from ..utils.keyword_matcher import KeywordMatcher, get_client_matcher
+from ..utils.metadata_store import put_pdf_client_hits, put_client_hits
+from ..utils.text_index import build_keywords_expression, search_pages, get_indexed_pdf_ids
+
+logger = logging.getLogger(__name__)
+
+def _match_pages(
+    matcher: KeywordMatcher,
+    pdf_id: str,
+    page_numbers: List[int]
+) -> Dict[str, Dict[int, List[str]]]:
+    """
+    Runs a matcher over the stored texts of some pages of a PDF.
+
+    Returns:
+        Dict[str, Dict[int, List[str]]]: The matched keywords of each page number by client name.
+    """
+    hits: Dict[str, Dict[int, List[str]]] = {}
+    for page_number in page_numbers:
+        text = load_text(get_page_text_path(pdf_id, page_number))
+        if not text:
+            continue
+        for client_name, keywords in matcher.match(text).items():
+            hits.setdefault(client_name, {})[page_number] = keywords
+    return hits
+
+def match_pdf_clients(pdf_id: str, total_pages: int) -> Dict[str, int]:
+    """
+    Matches the keywords of every client against the pages of a PDF in one pass per page
+    and stores the client page hits.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        total_pages (int): The number of pages of the PDF.
+
+    Returns:
+        Dict[str, int]: The number of matching pages of each client with at least one hit.
+    """
+    hits = _match_pages(get_client_matcher(), pdf_id, list(range(1, total_pages + 1)))
+    put_pdf_client_hits(pdf_id, hits)
+    logger.info(f"Matched {len(hits)} clients against PDF {pdf_id}")
+    return {client_name: len(pages) for client_name, pages in hits.items()}
+
+def rematch_client(client_name: str, keywords: List[str]) -> int:
+    """
+    Recomputes the page hits of one client across all stored PDFs after its keywords changed.
+
+    The full-text index narrows the pages to scan; PDFs missing from the index are scanned fully.
+
+    Args:
+        client_name (str): The name of the client.
+        keywords (List[str]): The client's keywords.
+
+    Returns:
+        int: The number of matching pages.
+    """
+    matcher = KeywordMatcher({client_name: keywords})
+    pdfs = load_metadata()['pdfs']
+    candidates: Dict[str, List[int]] = {
+        pdf_id: list(range(1, pdf_data.get("total_pages", 0) + 1))
+        for pdf_id, pdf_data in pdfs.items()
+    }
+    for pdf_id in get_indexed_pdf_ids(list(pdfs)):
+        candidates[pdf_id] = []
+    for hit in search_pages(build_keywords_expression(keywords), limit=None, snippet_tokens=1):
+        if hit["pdf_id"] in candidates:
+            candidates[hit["pdf_id"]].append(hit["page_number"])
+
+    client_hits: Dict[str, Dict[int, List[str]]] = {}
+    for pdf_id, page_numbers in candidates.items():
+        pages = _match_pages(matcher, pdf_id, page_numbers).get(client_name)
+        if pages:
+            client_hits[pdf_id] = pages
+    put_client_hits(client_name, client_hits)
+
+    page_count = sum(len(pages) for pages in client_hits.values())
+    logger.info(f"Rematched client {client_name}: {page_count} pages in {len(client_hits)} PDFs")
+    return page_count
+
+def rematch_all_pdfs() -> Dict[str, int]:
+    """
+    Recomputes the client page hits of every stored PDF with the current matcher.
+
+    Returns:
+        Dict[str, int]: The number of PDFs matched.
+    """
+    pdfs = load_metadata()['pdfs']
+    for pdf_id, pdf_data in pdfs.items():
+        match_pdf_clients(pdf_id, pdf_data.get("total_pages", 0))
+    logger.info(f"Rematched clients against {len(pdfs)} PDFs")
+    return {"pdfs_matched": len(pdfs)}
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+from .pdf_processor import PDFProcessor
+from ..config import INGESTION_MAX_CONCURRENT_JOBS, INGESTION_JOB_RETENTION
+
+logger = logging.getLogger(__name__)
+
+class IngestionJob:
+    """
+    Tracks the state and progress of a background PDF ingestion.
+    """
+
+    def __init__(
+        self,
+        pdf_id: str,
+        filename: str,
+        publication_name: str,
+        edition: str,
+        date: str,
+        file_size: Optional[int] = None,
+        sha256: Optional[str] = None
+    ):
+        """
+        Initializes a queued ingestion job.
+
+        Args:
+            pdf_id (str): The identifier the PDF will be stored under.
+            filename (str): The name of the uploaded file.
+            publication_name (str): The name of the publication.
+            edition (str): The edition of the publication.
+            date (str): The date of the publication.
+            file_size (Optional[int]): The size of the PDF file in bytes.
+            sha256 (Optional[str]): The SHA-256 checksum of the PDF file.
+        """
+        self.job_id: str = str(uuid.uuid4())
+        self.pdf_id: str = pdf_id
+        self.filename: str = filename
+        self.publication_name: str = publication_name
+        self.edition: str = edition
+        self.date: str = date
+        self.file_size: Optional[int] = file_size
+        self.sha256: Optional[str] = sha256
+        self.status: str = "queued"
+        self.pages_total: int = 0
+        self.pages_done: int = 0
+        self.error: Optional[str] = None
+        self.created_at: float = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def update_progress(self, pages_done: int, pages_total: int) -> None:
+        """
+        Records extraction progress reported by the page renderer.
+
+        Args:
+            pages_done (int): The number of pages extracted so far.
+            pages_total (int): The total number of pages in the PDF.
+        """
+        self.pages_done = pages_done
+        self.pages_total = pages_total
+
+    def pages_per_second(self) -> float:
+        """
+        Returns the extraction throughput of the job so far.
+
+        Returns:
+            float: Pages extracted per second since the job started.
+        """
+        if self.started_at is None:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return round(self.pages_done / elapsed, 2) if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns a JSON-serializable view of the job.
+
+        Returns:
+            Dict[str, Any]: The job status, progress and, once completed, the PDF id.
+        """
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "filename": self.filename,
+            "publication_name": self.publication_name,
+            "edition": self.edition,
+            "date": self.date,
+            "file_size": self.file_size,
+            "sha256": self.sha256,
+            "pages_total": self.pages_total,
+            "pages_done": self.pages_done,
+            "pages_per_second": self.pages_per_second(),
+            "pdf_id": self.pdf_id if self.status == "completed" else None,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+# Jobs by id, oldest first
+_jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+
+# Limits how many PDFs are extracted at the same time
+_job_slots = asyncio.Semaphore(INGESTION_MAX_CONCURRENT_JOBS)
+
+# Keeps references to running tasks so they are not garbage collected
+_running_tasks: Set[asyncio.Task] = set()
+
+def _prune_jobs() -> None:
+    """
+    Drops the oldest finished jobs once more than INGESTION_JOB_RETENTION are tracked.
+    """
+    finished = [job_id for job_id, job in _jobs.items() if job.status in ("completed", "failed")]
+    for job_id in finished[:max(0, len(_jobs) - INGESTION_JOB_RETENTION)]:
+        del _jobs[job_id]
+
+async def _run_job(job: IngestionJob, pdf_processor: PDFProcessor, pdf_path: Path) -> None:
+    """
+    Runs a queued ingestion job once a job slot is available.
+
+    Args:
+        job (IngestionJob): The job to run.
+        pdf_processor (PDFProcessor): The processor used for extraction and metadata.
+        pdf_path (Path): The path of the stored PDF file.
+    """
+    async with _job_slots:
+        job.status = "running"
+        job.started_at = time.time()
+        logger.info(f"Ingestion job {job.job_id} started for PDF {job.pdf_id}")
+        try:
+            await pdf_processor.process_pdf(
+                pdf_path, job.pdf_id, job.publication_name, job.edition, job.date,
+                file_size=job.file_size,
+                sha256=job.sha256,
+                progress_callback=job.update_progress
+            )
+            job.status = "completed"
+            logger.info(f"Ingestion job {job.job_id} completed: {job.pages_done} pages, {job.pages_per_second()} pages/s")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Ingestion job {job.job_id} failed: {str(e)}")
+        finally:
+            job.finished_at = time.time()
+
+def submit_ingestion_job(
+    pdf_processor: PDFProcessor,
+    pdf_path: Path,
+    pdf_id: str,
+    filename: str,
+    publication_name: str,
+    edition: str,
+    date: str,
+    file_size: Optional[int] = None,
+    sha256: Optional[str] = None
+) -> IngestionJob:
+    """
+    Schedules the ingestion of a stored PDF in the background.
+
+    Args:
+        pdf_processor (PDFProcessor): The processor used for extraction and metadata.
+        pdf_path (Path): The path of the stored PDF file.
+        pdf_id (str): The unique identifier for the PDF.
+        filename (str): The name of the uploaded file.
+        publication_name (str): The name of the publication.
+        edition (str): The edition of the publication.
+        date (str): The date of the publication.
+        file_size (Optional[int]): The size of the PDF file in bytes.
+        sha256 (Optional[str]): The SHA-256 checksum of the PDF file.
+
+    Returns:
+        IngestionJob: The queued job.
+    """
+    job = IngestionJob(pdf_id, filename, publication_name, edition, date, file_size, sha256)
+    _jobs[job.job_id] = job
+    _prune_jobs()
+
+    task = asyncio.create_task(_run_job(job, pdf_processor, pdf_path))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+
+    logger.info(f"Queued ingestion job {job.job_id} for {filename}")
+    return job
+
+def get_job(job_id: str) -> Optional[IngestionJob]:
+    """
+    Returns an ingestion job by id.
+
+    Args:
+        job_id (str): The job identifier.
+
+    Returns:
+        Optional[IngestionJob]: The job, or None if it is unknown or was pruned.
+    """
+    return _jobs.get(job_id)
+
+def list_jobs() -> List[IngestionJob]:
+    """
+    Returns all tracked ingestion jobs, oldest first.
+
+    Returns:
+        List[IngestionJob]: The tracked jobs.
+    """
+    return list(_jobs.values())
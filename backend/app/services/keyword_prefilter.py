@@ -0,0 +1,179 @@
+import difflib
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
+from ..utils.file_utils import load_text
+from ..utils.keyword_matcher import normalize_text
+from ..utils.general_utils import load_metadata
+from ..utils.text_index import (
+    index_pdf_pages,
+    clear_index,
+    get_indexed_pdf_ids,
+    build_keywords_expression,
+    search_pages,
+    get_pages_without_text
+)
+from ..config import UPLOAD_DIR, PAGE_TEXT_MIN_CHARS, PREFILTER_FUZZY_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+def get_page_text_path(pdf_id: str, page_number: int) -> Path:
+    """
+    Returns the path of the stored text layer of a page.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        page_number (int): The 1-based page number.
+
+    Returns:
+        Path: The path of the page text.
+    """
+    return Path(UPLOAD_DIR) / pdf_id / f"{page_number}.txt"
+
+def has_text_layer(text: Optional[str]) -> bool:
+    """
+    Tells whether a page's extracted text is usable for prefiltering.
+
+    Args:
+        text (Optional[str]): The extracted text, or None if none was stored.
+
+    Returns:
+        bool: False for missing text and for pages with fewer than PAGE_TEXT_MIN_CHARS
+            non-blank characters, such as scanned pages.
+    """
+    return text is not None and len("".join(text.split())) >= PAGE_TEXT_MIN_CHARS
+
+def _fuzzy_contains(normalized_text: str, normalized_keyword: str, threshold: float) -> bool:
+    """
+    Tells whether any word sequence of the text is similar to the keyword.
+    """
+    keyword_words = normalized_keyword.split()
+    text_words = normalized_text.split()
+    size = len(keyword_words)
+    candidates: Set[str] = {" ".join(text_words[i:i + size]) for i in range(len(text_words) - size + 1)}
+    return bool(difflib.get_close_matches(" ".join(keyword_words), candidates, n=1, cutoff=threshold))
+
+def match_keywords(text: str, keywords: List[str], fuzzy: bool = False) -> List[str]:
+    """
+    Returns the keywords found in a text.
+
+    Matching is case- and diacritic-insensitive and on whole words. With fuzzy matching,
+    keywords are also matched by word sequences whose similarity ratio reaches
+    PREFILTER_FUZZY_THRESHOLD, which tolerates OCR errors and inflections.
+
+    Args:
+        text (str): The text to search.
+        keywords (List[str]): The keywords to look for.
+        fuzzy (bool, optional): Whether to allow approximate matches. Defaults to False.
+
+    Returns:
+        List[str]: The matched keywords, in the order given.
+    """
+    normalized_text = normalize_text(text)
+    matched = []
+    for keyword in keywords:
+        normalized_keyword = normalize_text(keyword)
+        if not normalized_keyword.strip():
+            continue
+        if normalized_keyword in normalized_text or (
+            fuzzy and _fuzzy_contains(normalized_text, normalized_keyword, PREFILTER_FUZZY_THRESHOLD)
+        ):
+            matched.append(keyword)
+    return matched
+
+def is_candidate_page(pdf_id: str, page_number: int, keywords: List[str], fuzzy: bool = False) -> bool:
+    """
+    Tells whether a page has to be analyzed by the LLM for the given keywords.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        page_number (int): The 1-based page number.
+        keywords (List[str]): The keywords of the query.
+        fuzzy (bool, optional): Whether to allow approximate matches. Defaults to False.
+
+    Returns:
+        bool: True if the page's text layer mentions a keyword, or if the page has no
+            usable text layer and can only be judged by the LLM.
+    """
+    text = load_text(get_page_text_path(pdf_id, page_number))
+    if not has_text_layer(text):
+        return True
+    return bool(match_keywords(text, keywords, fuzzy))
+
+def index_pdf_text(pdf_id: str, total_pages: int) -> None:
+    """
+    Adds the stored page texts of a PDF to the full-text index, replacing any previous entries.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        total_pages (int): The number of pages of the PDF.
+    """
+    pages: Dict[int, Optional[str]] = {}
+    for page_number in range(1, total_pages + 1):
+        text = load_text(get_page_text_path(pdf_id, page_number))
+        pages[page_number] = text if has_text_layer(text) else None
+    index_pdf_pages(pdf_id, pages)
+    logger.info(f"Indexed text of PDF {pdf_id}: {sum(t is not None for t in pages.values())} of {total_pages} pages")
+
+def rebuild_text_index() -> Dict[str, int]:
+    """
+    Rebuilds the full-text index from the page texts of every stored PDF.
+
+    Returns:
+        Dict[str, int]: The number of PDFs indexed.
+    """
+    clear_index()
+    pdfs = load_metadata()['pdfs']
+    for pdf_id, pdf_data in pdfs.items():
+        index_pdf_text(pdf_id, pdf_data.get("total_pages", 0))
+    logger.info(f"Rebuilt text index over {len(pdfs)} PDFs")
+    return {"pdfs_indexed": len(pdfs)}
+
+def _select_with_index(pdf_ids: List[str], keywords: List[str]) -> Dict[str, List[int]]:
+    """
+    Selects candidate pages of indexed PDFs: pages matching a keyword in the full-text
+    index and pages without a usable text layer.
+    """
+    selected: Dict[str, Set[int]] = {pdf_id: set() for pdf_id in pdf_ids}
+    for hit in search_pages(build_keywords_expression(keywords), pdf_ids=pdf_ids, limit=None, snippet_tokens=1):
+        selected[hit["pdf_id"]].add(hit["page_number"])
+    for page in get_pages_without_text(pdf_ids):
+        selected[page["pdf_id"]].add(page["page_number"])
+    return {pdf_id: sorted(pages) for pdf_id, pages in selected.items()}
+
+def select_candidate_pages(
+    pdfs: Dict[str, Dict[str, Any]],
+    keywords: List[str],
+    fuzzy: bool = False
+) -> Dict[str, List[int]]:
+    """
+    Selects the pages of the given PDFs that have to be sent to the LLM.
+
+    Exact matching uses the full-text index for the PDFs it contains; fuzzy matching
+    and PDFs missing from the index fall back to scanning the stored page texts.
+    Call it from a worker thread for large scopes.
+
+    Args:
+        pdfs (Dict[str, Dict[str, Any]]): The metadata of each PDF in scope by PDF id.
+        keywords (List[str]): The keywords of the query.
+        fuzzy (bool, optional): Whether to allow approximate matches. Defaults to False.
+
+    Returns:
+        Dict[str, List[int]]: The 1-based candidate page numbers of each PDF by PDF id.
+    """
+    indexed_pdf_ids = get_indexed_pdf_ids(list(pdfs)) if keywords and not fuzzy else []
+    candidates = _select_with_index(indexed_pdf_ids, keywords) if indexed_pdf_ids else {}
+    total_pages = 0
+    for pdf_id, pdf_data in pdfs.items():
+        page_numbers = range(1, pdf_data.get("total_pages", 0) + 1)
+        total_pages += len(page_numbers)
+        if pdf_id in candidates:
+            continue
+        if keywords:
+            candidates[pdf_id] = [n for n in page_numbers if is_candidate_page(pdf_id, n, keywords, fuzzy)]
+        else:
+            candidates[pdf_id] = list(page_numbers)
+
+    selected = sum(len(pages) for pages in candidates.values())
+    logger.info(f"Keyword prefilter selected {selected} of {total_pages} pages")
+    return candidates
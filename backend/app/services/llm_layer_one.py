@@ -1,64 +1,136 @@
-import json
+import asyncio
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, List, Set, Tuple
 from ..models.system_prompt import get_system_prompt
 from ..utils.request_pipeline import add_request_to_queue
+from ..utils.request_scheduler import estimate_tokens
+from ..utils.response_parser import parse_layer_one_response, parse_packed_response, ResponseParseError
+from ..config import (
+    LAYER_ONE_PACKING_ENABLED,
+    LAYER_ONE_PACK_MAX_PAGES,
+    LAYER_ONE_PACK_MAX_IMAGES,
+    LAYER_ONE_PACK_MAX_TOKENS,
+    LAYER_ONE_PACK_LINGER_SECONDS
+)
 
 logger = logging.getLogger(__name__)
 
-async def analyze_page_with_llm_one(page: Dict[str, Any], pdf_data: Dict[str, Any], query: str, client_name: str) -> Dict[str, Any]:
+# Appended to the system prompt when several pages share one request
+PACKED_RESPONSE_INSTRUCTIONS: str = """
+The images above belong to several pages of the same edition. The images of each page follow a line "Page N:".
+Analyze every page separately and return a single JSON object of the form:
+
+{
+  "pages": [
+    {"page": N, "retrieval": boolean, "keywords": [...]}
+  ]
+}
+
+with exactly one entry per page, where "retrieval" and "keywords" follow the structure described above for that page alone.
+"""
+
+def load_page_images(page: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
-    Analyzes a single page using the first LLM layer.
+    Reads the images to send for a page.
 
-    This function processes a page image using the Gemini model, applying the system prompt
-    and the given query to extract relevant information.
+    Args:
+        page (Dict[str, Any]): Dictionary containing page information, including its images
+            or the image path.
+
+    Returns:
+        List[Dict[str, Any]]: One image part (MIME type and data) per image.
+
+    Raises:
+        FileNotFoundError: If an image file does not exist.
+    """
+    images = page.get('images') or [{"path": page['image_path'], "mime_type": page.get('mime_type', "image/png")}]
+    parts = []
+    for image in images:
+        if not os.path.exists(image['path']):
+            raise FileNotFoundError(f"Image file not found: {image['path']}")
+        with open(image['path'], 'rb') as img_file:
+            parts.append({
+                "mime_type": image['mime_type'],
+                "data": img_file.read()
+            })
+    return parts
+
+def get_page_note(page: Dict[str, Any]) -> str:
+    """
+    Describes the images of a page when cropped article regions are sent instead of the full page.
+    """
+    images = page.get('images')
+    if images and images[0]['path'] != page.get('image_path'):
+        return f"Images: {len(images)} article regions cropped from this page"
+    return ""
+
+def finalize_response(page: Dict[str, Any], response_json: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds the layer one result of a page from its parsed JSON answer.
+
+    Keywords without articles are dropped, and retrieval is set to false when none remain.
 
     Args:
-        page (Dict[str, Any]): Dictionary containing page information, including the image path.
+        page (Dict[str, Any]): Dictionary containing page information.
+        response_json (Dict[str, Any]): The model's answer for the page.
+
+    Returns:
+        Dict[str, Any]: The page id and the cleaned first response.
+    """
+    # Filter out keywords with empty article arrays
+    if "keywords" in response_json:
+        response_json["keywords"] = [
+            keyword for keyword in response_json["keywords"]
+            if keyword.get("articles") and len(keyword["articles"]) > 0
+        ]
+
+    # If all keywords were filtered out, set retrieval to false
+    if not response_json.get("keywords"):
+        response_json["retrieval"] = False
+
+    return {
+        "page_id": page['id'],
+        "first_response": response_json
+    }
+
+async def analyze_single_page(page: Dict[str, Any], pdf_data: Dict[str, Any], query: str, client_name: str) -> Dict[str, Any]:
+    """
+    Analyzes a single page with one request to the first LLM layer.
+
+    Args:
+        page (Dict[str, Any]): Dictionary containing page information, including its images.
         pdf_data (Dict[str, Any]): Metadata about the PDF containing the page.
         query (str): The query to be applied to the page.
         client_name (str): The name of the client for whom the analysis is being performed.
 
     Returns:
         Dict[str, Any]: A dictionary containing the analysis results or error information.
-
-    Raises:
-        Exception: If there's an error during the analysis process.
     """
     try:
         logger.info(f"LLM Layer One: Processing page {page['id']}")
-        image_path = page['image_path']
-
-        if not os.path.exists(image_path):
-            logger.error(f"LLM Layer One: Image file not found: {image_path}")
+        try:
+            content: List[Any] = load_page_images(page)
+        except FileNotFoundError as e:
+            logger.error(f"LLM Layer One: {str(e)}")
             return {
                 "page_id": page['id'],
-                "error": f"Image file not found: {image_path}"
+                "error": str(e)
             }
 
-        with open(image_path, 'rb') as img_file:
-            img_byte_arr = img_file.read()
-
         system_prompt = get_system_prompt()
-        content = [
-            {
-                "mime_type": "image/png",
-                "data": img_byte_arr
-            },
+        content.append(
             f"""
             {system_prompt}
             Publication: {pdf_data['publication_name']}
             Edition: {pdf_data['edition']}
             Date: {pdf_data['date']}
             Page: {page['number']}
-            
+            {get_page_note(page)}
+
             Query: {query}
             """
-        ]
-
-        # Import the model here to avoid circular imports
-        from ..models.gemini_model import model
+        )
 
         # Add the request to the queue and await the result
         future = add_request_to_queue(content)
@@ -67,27 +139,16 @@ async def analyze_page_with_llm_one(page: Dict[str, Any], pdf_data: Dict[str, An
         response_text = response.text
         logger.info(f"LLM Layer One: Successfully processed page {page['id']}")
 
-        # Parse the response JSON
+        # Parse the response JSON, salvaging fenced, wrapped and truncated answers
         try:
-            response_json = json.loads(response_text)
-            
-            # Filter out keywords with empty article arrays
-            if "keywords" in response_json:
-                response_json["keywords"] = [
-                    keyword for keyword in response_json["keywords"]
-                    if keyword.get("articles") and len(keyword["articles"]) > 0
-                ]
-            
-            # If all keywords were filtered out, set retrieval to false
-            if not response_json.get("keywords"):
-                response_json["retrieval"] = False
-
-            return {
-                "page_id": page['id'],
-                "first_response": response_json
-            }
+            response_json, truncated = parse_layer_one_response(response_text)
+            result = finalize_response(page, response_json)
+            if truncated:
+                # Incomplete, so the result is neither cached nor recorded as processed
+                result["truncated"] = True
+            return result
 
-        except json.JSONDecodeError:
+        except ResponseParseError:
             logger.error(f"LLM Layer One: Invalid JSON response for page {page['id']}")
             return {
                 "page_id": page['id'],
@@ -100,4 +161,225 @@ async def analyze_page_with_llm_one(page: Dict[str, Any], pdf_data: Dict[str, An
         return {
             "page_id": page['id'],
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+async def analyze_packed_pages(
+    pages: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]],
+    pdf_data: Dict[str, Any],
+    query: str
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Analyzes several pages of the same PDF with one request to the first LLM layer.
+
+    Args:
+        pages (List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]): Each page with its image parts.
+        pdf_data (Dict[str, Any]): Metadata about the PDF containing the pages.
+        query (str): The query to be applied to the pages.
+
+    Returns:
+        Dict[int, Dict[str, Any]]: The layer one result of each page found in the answer, by page number.
+
+    Raises:
+        Exception: If the request fails or the answer cannot be split into pages.
+    """
+    content: List[Any] = []
+    notes = []
+    for page, parts in pages:
+        content.append(f"Page {page['number']}:")
+        content.extend(parts)
+        note = get_page_note(page)
+        if note:
+            notes.append(f"Page {page['number']}: {note}")
+
+    system_prompt = get_system_prompt()
+    page_numbers = ", ".join(str(page['number']) for page, _ in pages)
+    page_notes = "\n".join(notes)
+    content.append(
+        f"""
+        {system_prompt}
+        {PACKED_RESPONSE_INSTRUCTIONS}
+        Publication: {pdf_data['publication_name']}
+        Edition: {pdf_data['edition']}
+        Date: {pdf_data['date']}
+        Pages: {page_numbers}
+        {page_notes}
+
+        Query: {query}
+        """
+    )
+
+    response = await add_request_to_queue(content)
+
+    pages_by_number = {page['number']: page for page, _ in pages}
+    results: Dict[int, Dict[str, Any]] = {}
+    for key, entry in parse_packed_response(response.text, "page", "layer_one"):
+        try:
+            page_number = int(key)
+        except (TypeError, ValueError):
+            continue
+        if page_number in pages_by_number and page_number not in results:
+            results[page_number] = finalize_response(pages_by_number[page_number], entry)
+    return results
+
+class LayerOnePacker:
+    """
+    Groups concurrent layer one requests for pages of the same PDF, query and client into
+    packed requests, within a page, image and token budget.
+
+    A pack is sent when it is full or LAYER_ONE_PACK_LINGER_SECONDS after its first page
+    arrived. Pages missing from a packed answer, or all pages of a pack whose answer
+    cannot be split, are sent again as single-page requests.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = LAYER_ONE_PACK_MAX_PAGES,
+        max_images: int = LAYER_ONE_PACK_MAX_IMAGES,
+        max_tokens: int = LAYER_ONE_PACK_MAX_TOKENS,
+        linger_seconds: float = LAYER_ONE_PACK_LINGER_SECONDS
+    ):
+        """
+        Initializes the packer.
+
+        Args:
+            max_pages (int): The maximum number of pages per request.
+            max_images (int): The maximum number of images per request.
+            max_tokens (int): The maximum estimated input tokens of the images of a request.
+            linger_seconds (float): How long a pack waits for more pages before it is sent.
+        """
+        self.max_pages: int = max_pages
+        self.max_images: int = max_images
+        self.max_tokens: int = max_tokens
+        self.linger_seconds: float = linger_seconds
+        self._packs: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        self._running: Set[asyncio.Task] = set()
+        self.packed_requests: int = 0
+        self.fallback_pages: int = 0
+
+    async def submit(self, page: Dict[str, Any], pdf_data: Dict[str, Any], query: str, client_name: str) -> Dict[str, Any]:
+        """
+        Adds a page to the pack of its PDF, query and client and waits for its result.
+
+        Args:
+            page (Dict[str, Any]): Dictionary containing page information, including its images.
+            pdf_data (Dict[str, Any]): Metadata about the PDF containing the page.
+            query (str): The query to be applied to the page.
+            client_name (str): The name of the client.
+
+        Returns:
+            Dict[str, Any]: The layer one result of the page.
+        """
+        try:
+            parts = load_page_images(page)
+        except FileNotFoundError as e:
+            logger.error(f"LLM Layer One: {str(e)}")
+            return {"page_id": page['id'], "error": str(e)}
+
+        tokens = estimate_tokens(parts)
+        key = (page['id'].rsplit('_', 1)[0], query, client_name)
+        pack = self._packs.get(key)
+        if pack and (
+            len(pack["pages"]) >= self.max_pages
+            or pack["images"] + len(parts) > self.max_images
+            or pack["tokens"] + tokens > self.max_tokens
+        ):
+            self._flush(key)
+            pack = None
+        if pack is None:
+            loop = asyncio.get_running_loop()
+            pack = {"pdf_data": pdf_data, "query": query, "client_name": client_name, "pages": [], "images": 0, "tokens": 0}
+            pack["timer"] = loop.call_later(self.linger_seconds, self._flush, key)
+            self._packs[key] = pack
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        pack["pages"].append((page, parts, future))
+        pack["images"] += len(parts)
+        pack["tokens"] += tokens
+        if len(pack["pages"]) >= self.max_pages:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: Tuple[str, str, str]) -> None:
+        """
+        Sends the pending pack of a key.
+        """
+        pack = self._packs.pop(key, None)
+        if pack is None:
+            return
+        pack["timer"].cancel()
+        task = asyncio.create_task(self._run_pack(pack))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_pack(self, pack: Dict[str, Any]) -> None:
+        """
+        Sends a pack and resolves the futures of its pages, falling back to single-page requests.
+        """
+        entries = pack["pages"]
+        pdf_data, query, client_name = pack["pdf_data"], pack["query"], pack["client_name"]
+        results: Dict[int, Dict[str, Any]] = {}
+
+        if len(entries) > 1:
+            try:
+                self.packed_requests += 1
+                results = await analyze_packed_pages([(page, parts) for page, parts, _ in entries], pdf_data, query)
+                logger.info(f"LLM Layer One: Processed {len(results)} of {len(entries)} pages in one request")
+            except Exception as e:
+                logger.warning(f"LLM Layer One: Packed request for {len(entries)} pages failed, sending them separately: {str(e)}")
+
+        try:
+            fallback = [page for page, _, _ in entries if page['number'] not in results]
+            if len(entries) > 1:
+                self.fallback_pages += len(fallback)
+            fallback_results = await asyncio.gather(
+                *(analyze_single_page(page, pdf_data, query, client_name) for page in fallback)
+            )
+            for page, result in zip(fallback, fallback_results):
+                results[page['number']] = result
+        finally:
+            # Never leave a page waiting, even if the pack was cancelled
+            for page, _, future in entries:
+                if not future.done():
+                    future.set_result(results.get(page['number'], {"page_id": page['id'], "error": "Packed request was cancelled"}))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the packing configuration and counters.
+
+        Returns:
+            Dict[str, Any]: Whether packing is enabled, the pack budgets, the number of packed
+                requests sent and the number of pages that fell back to single-page requests.
+        """
+        return {
+            "enabled": LAYER_ONE_PACKING_ENABLED,
+            "max_pages": self.max_pages,
+            "max_images": self.max_images,
+            "max_tokens": self.max_tokens,
+            "packed_requests": self.packed_requests,
+            "fallback_pages": self.fallback_pages,
+            "pending_packs": len(self._packs)
+        }
+
+# Packer shared by all queries
+layer_one_packer = LayerOnePacker()
+
+async def analyze_page_with_llm_one(page: Dict[str, Any], pdf_data: Dict[str, Any], query: str, client_name: str) -> Dict[str, Any]:
+    """
+    Analyzes a single page using the first LLM layer.
+
+    This function processes a page image using the Gemini model, applying the system prompt
+    and the given query to extract relevant information. With LAYER_ONE_PACKING_ENABLED,
+    the page may share its request with other pages of the same PDF.
+
+    Args:
+        page (Dict[str, Any]): Dictionary containing page information, including the image path.
+        pdf_data (Dict[str, Any]): Metadata about the PDF containing the page.
+        query (str): The query to be applied to the page.
+        client_name (str): The name of the client for whom the analysis is being performed.
+
+    Returns:
+        Dict[str, Any]: A dictionary containing the analysis results or error information.
+    """
+    if LAYER_ONE_PACKING_ENABLED:
+        return await layer_one_packer.submit(page, pdf_data, query, client_name)
+    return await analyze_single_page(page, pdf_data, query, client_name)
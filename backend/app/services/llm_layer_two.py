@@ -1,14 +1,48 @@
 # backend/app/services/llm_layer_two.py
 
+import asyncio
 import json
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Set, Tuple
 from ..models.system_prompt import get_second_system_prompt
-from ..utils.request_pipeline_pro import add_request_to_queue_pro
+from ..utils.request_pipeline import add_request_to_queue_pro, request_priority
+from ..utils.request_scheduler import estimate_tokens
+from ..utils.response_parser import parse_layer_two_response, parse_packed_response, ResponseParseError
+from ..config import (
+    LAYER_TWO_BATCHING_ENABLED,
+    LAYER_TWO_BATCH_MAX_PAGES,
+    LAYER_TWO_BATCH_MAX_TOKENS,
+    LAYER_TWO_BATCH_LINGER_SECONDS
+)
 
 logger = logging.getLogger(__name__)
 
-async def validate_llm_one_response(page_id: str, llm_one_response: Dict[str, Any], client_name: str) -> Dict[str, Any]:
+# Appended to the second system prompt when several pages share one request
+BATCHED_VALIDATION_INSTRUCTIONS: str = """
+The JSON input holds the first-layer answers of several pages, keyed by entry id.
+Validate every entry separately and return a single JSON object of the form:
+
+{
+  "pages": [
+    {"entry": "...", "keyword_validation": [...]}
+  ]
+}
+
+with exactly one item per entry id, where "keyword_validation" follows the structure described above for that entry alone.
+"""
+
+async def validate_single_page(page_id: str, llm_one_response: Dict[str, Any], client_name: str) -> Dict[str, Any]:
+    """
+    Validates the layer one answer of a single page with one request to the second LLM layer.
+
+    Args:
+        page_id (str): The id of the page.
+        llm_one_response (Dict[str, Any]): The first response of the page.
+        client_name (str): The name of the client for whom the validation is being performed.
+
+    Returns:
+        Dict[str, Any]: The page id and the second response, or error information.
+    """
     try:
         logger.info(f"LLM Layer Two: Validating response for page {page_id}")
         second_system_prompt = get_second_system_prompt()
@@ -26,15 +60,18 @@ async def validate_llm_one_response(page_id: str, llm_one_response: Dict[str, An
         second_response_text = second_response.text
         logger.info(f"LLM Layer Two: Raw response for page {page_id}: {second_response_text}")
 
-        # Parse the second response JSON
+        # Parse the second response JSON, salvaging fenced, wrapped and truncated answers
         try:
-            second_response_json = json.loads(second_response_text)
+            second_response_json, truncated = parse_layer_two_response(second_response_text)
             logger.info(f"LLM Layer Two: Successfully validated page {page_id}")
-            return {
+            result = {
                 "page_id": page_id,
                 "second_response": second_response_json
             }
-        except json.JSONDecodeError as json_error:
+            if truncated:
+                result["truncated"] = True
+            return result
+        except ResponseParseError as json_error:
             logger.error(f"LLM Layer Two: Invalid JSON response for page {page_id}. Error: {str(json_error)}")
             return {
                 "page_id": page_id,
@@ -48,3 +85,190 @@ async def validate_llm_one_response(page_id: str, llm_one_response: Dict[str, An
             "page_id": page_id,
             "error": str(e)
         }
+
+def build_batch_input(pages: List[Tuple[str, Dict[str, Any]]]) -> str:
+    """
+    Builds the JSON input of a batched validation request.
+
+    The answers are keyed by their position in the batch rather than by page id, since
+    concurrent queries of different clients can submit the same page.
+
+    Args:
+        pages (List[Tuple[str, Dict[str, Any]]]): Each page id with its first response.
+
+    Returns:
+        str: The first responses keyed by entry id.
+    """
+    return f"JSON Input:\n{json.dumps({str(index): response for index, (_, response) in enumerate(pages)})}"
+
+async def validate_batched_pages(pages: List[Tuple[str, Dict[str, Any]]]) -> Dict[int, Dict[str, Any]]:
+    """
+    Validates the layer one answers of several pages with one request to the second LLM layer.
+
+    Args:
+        pages (List[Tuple[str, Dict[str, Any]]]): Each page id with its first response.
+
+    Returns:
+        Dict[int, Dict[str, Any]]: The layer two result of each entry found in the answer, by its
+            position in pages.
+
+    Raises:
+        Exception: If the request fails or the answer cannot be split into pages.
+    """
+    content = [
+        f"{get_second_system_prompt()}\n{BATCHED_VALIDATION_INSTRUCTIONS}",
+        build_batch_input(pages)
+    ]
+    response = await add_request_to_queue_pro(content)
+
+    results: Dict[int, Dict[str, Any]] = {}
+    for key, entry in parse_packed_response(response.text, "entry", "layer_two"):
+        index = int(key) if str(key).isdigit() else -1
+        if 0 <= index < len(pages) and index not in results:
+            results[index] = {"page_id": pages[index][0], "second_response": entry}
+    return results
+
+class LayerTwoBatcher:
+    """
+    Groups concurrent layer two validations into keyed batched requests, within a page
+    and token budget.
+
+    Validations are grouped by request priority, so background work never delays an
+    interactive batch. A batch is sent when it is full or LAYER_TWO_BATCH_LINGER_SECONDS
+    after its first page arrived. Pages missing from a batched answer, or all pages of a
+    batch whose answer cannot be split, are validated again on their own.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = LAYER_TWO_BATCH_MAX_PAGES,
+        max_tokens: int = LAYER_TWO_BATCH_MAX_TOKENS,
+        linger_seconds: float = LAYER_TWO_BATCH_LINGER_SECONDS
+    ):
+        """
+        Initializes the batcher.
+
+        Args:
+            max_pages (int): The maximum number of pages per request.
+            max_tokens (int): The maximum estimated input tokens of the answers of a request.
+            linger_seconds (float): How long a batch waits for more pages before it is sent.
+        """
+        self.max_pages: int = max_pages
+        self.max_tokens: int = max_tokens
+        self.linger_seconds: float = linger_seconds
+        self._batches: Dict[int, Dict[str, Any]] = {}
+        self._running: Set[asyncio.Task] = set()
+        self.batched_requests: int = 0
+        self.fallback_pages: int = 0
+
+    async def submit(self, page_id: str, llm_one_response: Dict[str, Any], client_name: str) -> Dict[str, Any]:
+        """
+        Adds a page to the pending batch of the current request priority and waits for its result.
+
+        Args:
+            page_id (str): The id of the page.
+            llm_one_response (Dict[str, Any]): The first response of the page.
+            client_name (str): The name of the client.
+
+        Returns:
+            Dict[str, Any]: The layer two result of the page.
+        """
+        tokens = estimate_tokens([json.dumps(llm_one_response)])
+        key = request_priority.get()
+        batch = self._batches.get(key)
+        if batch and (len(batch["pages"]) >= self.max_pages or batch["tokens"] + tokens > self.max_tokens):
+            self._flush(key)
+            batch = None
+        if batch is None:
+            loop = asyncio.get_running_loop()
+            batch = {"pages": [], "tokens": 0}
+            batch["timer"] = loop.call_later(self.linger_seconds, self._flush, key)
+            self._batches[key] = batch
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        batch["pages"].append((page_id, llm_one_response, client_name, future))
+        batch["tokens"] += tokens
+        if len(batch["pages"]) >= self.max_pages:
+            self._flush(key)
+        return await future
+
+    def _flush(self, key: int) -> None:
+        """
+        Sends the pending batch of a priority.
+        """
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        batch["timer"].cancel()
+        task = asyncio.create_task(self._run_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: Dict[str, Any]) -> None:
+        """
+        Sends a batch and resolves the futures of its pages, falling back to single-page requests.
+        """
+        entries = batch["pages"]
+        # Results by position in the batch, since the same page may be submitted by several queries
+        results: Dict[int, Dict[str, Any]] = {}
+
+        if len(entries) > 1:
+            try:
+                self.batched_requests += 1
+                results = await validate_batched_pages([(page_id, response) for page_id, response, _, _ in entries])
+                logger.info(f"LLM Layer Two: Validated {len(results)} of {len(entries)} pages in one request")
+            except Exception as e:
+                logger.warning(f"LLM Layer Two: Batched request for {len(entries)} pages failed, sending them separately: {str(e)}")
+
+        try:
+            fallback = [index for index in range(len(entries)) if index not in results]
+            if len(entries) > 1:
+                self.fallback_pages += len(fallback)
+            fallback_results = await asyncio.gather(
+                *(validate_single_page(*entries[index][:3]) for index in fallback)
+            )
+            for index, result in zip(fallback, fallback_results):
+                results[index] = result
+        finally:
+            # Never leave a page waiting, even if the batch was cancelled
+            for index, (page_id, _, _, future) in enumerate(entries):
+                if not future.done():
+                    future.set_result(results.get(index, {"page_id": page_id, "error": "Batched request was cancelled"}))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the batching configuration and counters.
+
+        Returns:
+            Dict[str, Any]: Whether batching is enabled, the batch budgets, the number of batched
+                requests sent and the number of pages that fell back to single-page requests.
+        """
+        return {
+            "enabled": LAYER_TWO_BATCHING_ENABLED,
+            "max_pages": self.max_pages,
+            "max_tokens": self.max_tokens,
+            "batched_requests": self.batched_requests,
+            "fallback_pages": self.fallback_pages,
+            "pending_batches": len(self._batches)
+        }
+
+# Batcher shared by all queries
+layer_two_batcher = LayerTwoBatcher()
+
+async def validate_llm_one_response(page_id: str, llm_one_response: Dict[str, Any], client_name: str) -> Dict[str, Any]:
+    """
+    Validates the layer one answer of a page using the second LLM layer.
+
+    With LAYER_TWO_BATCHING_ENABLED, the page may share its request with other pages.
+
+    Args:
+        page_id (str): The id of the page.
+        llm_one_response (Dict[str, Any]): The first response of the page.
+        client_name (str): The name of the client for whom the validation is being performed.
+
+    Returns:
+        Dict[str, Any]: The page id and the second response, or error information.
+    """
+    if LAYER_TWO_BATCHING_ENABLED:
+        return await layer_two_batcher.submit(page_id, llm_one_response, client_name)
+    return await validate_single_page(page_id, llm_one_response, client_name)
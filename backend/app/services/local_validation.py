@@ -0,0 +1,172 @@
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from pydantic import ValidationError
+from .keyword_prefilter import get_page_text_path, has_text_layer, match_keywords
+from ..models.response_schema import LayerOneResponse, KeywordArticles
+from ..utils.file_utils import load_text
+from ..utils.keyword_matcher import normalize_text, CLIENT_TAG_PATTERN
+from ..config import (
+    LOCAL_VALIDATION_ENABLED,
+    LOCAL_VALIDATION_ARTICLE_WEIGHT,
+    LOCAL_VALIDATION_PAGE_TEXT_WEIGHT,
+    LOCAL_VALIDATION_MIN_CONFIDENCE
+)
+
+logger = logging.getLogger(__name__)
+
+# Counters of the local validation stage
+_stats: Dict[str, int] = {
+    "pages_checked": 0,
+    "pages_validated_locally": 0,
+    "pages_escalated": 0,
+    "keywords_validated_locally": 0,
+    "keywords_escalated": 0,
+    "schema_failures": 0
+}
+
+def get_query_keyword(reported_keyword: str, keywords: List[str]) -> Optional[str]:
+    """
+    Returns the query keyword a keyword reported by the model stands for.
+
+    Args:
+        reported_keyword (str): The keyword reported by the first LLM layer, possibly tagged with clients.
+        keywords (List[str]): The keywords of the query.
+
+    Returns:
+        Optional[str]: The query keyword equal to the reported one, ignoring case and diacritics,
+            or None if the model reported a keyword that was not asked for.
+    """
+    normalized = normalize_text(CLIENT_TAG_PATTERN.sub("", reported_keyword))
+    return next((keyword for keyword in keywords if normalize_text(keyword) == normalized), None)
+
+def get_keyword_confidence(
+    keyword: str,
+    entry: KeywordArticles,
+    page_text: Optional[str],
+    fuzzy: bool = False
+) -> Tuple[float, List[str]]:
+    """
+    Scores the local evidence that a keyword reported for a page is valid.
+
+    Args:
+        keyword (str): The query keyword.
+        entry (KeywordArticles): The keyword's entry in the layer one answer.
+        page_text (Optional[str]): The page's text layer, or None if it has no usable text layer.
+        fuzzy (bool, optional): Whether the page text may match approximately. Defaults to False.
+
+    Returns:
+        Tuple[float, List[str]]: The confidence and a description of each piece of evidence found.
+    """
+    confidence = 0.0
+    evidence = []
+    article_text = "\n".join(f"{article.headline}\n{article.summary}" for article in entry.articles)
+    if match_keywords(article_text, [keyword]):
+        confidence += LOCAL_VALIDATION_ARTICLE_WEIGHT
+        evidence.append("its articles")
+    if page_text is not None and match_keywords(page_text, [keyword], fuzzy):
+        confidence += LOCAL_VALIDATION_PAGE_TEXT_WEIGHT
+        evidence.append("the page text")
+    return confidence, evidence
+
+def validate_locally(
+    page: Dict[str, Any],
+    first_response: Dict[str, Any]
+) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Validates the keywords of a layer one answer with local evidence before layer two.
+
+    The answer must match the layer one schema. Each keyword that was asked for is scored
+    with get_keyword_confidence; keywords reaching LOCAL_VALIDATION_MIN_CONFIDENCE are
+    validated locally, and the others are left to the second LLM layer.
+
+    Args:
+        page (Dict[str, Any]): Dictionary containing page information, including the query keywords.
+        first_response (Dict[str, Any]): The first response of the page, with retrieval true.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]: The keyword validations made
+            locally, and the first response reduced to the keywords to escalate, or None if
+            every keyword was validated locally.
+    """
+    if not LOCAL_VALIDATION_ENABLED:
+        return [], first_response
+
+    _stats["pages_checked"] += 1
+    try:
+        response = LayerOneResponse.model_validate(first_response)
+    except ValidationError as e:
+        _stats["schema_failures"] += 1
+        _stats["pages_escalated"] += 1
+        logger.info(f"Local validation: answer for page {page['id']} does not match the schema, escalating: {e.error_count()} errors")
+        return [], first_response
+
+    pdf_id = page['id'].rsplit('_', 1)[0]
+    page_text = load_text(get_page_text_path(pdf_id, page['number']))
+    if not has_text_layer(page_text):
+        page_text = None
+
+    validations: List[Dict[str, Any]] = []
+    escalated: List[Dict[str, Any]] = []
+    for entry, raw_entry in zip(response.keywords, first_response.get("keywords", [])):
+        keyword = get_query_keyword(entry.keyword, page.get('keywords', []))
+        confidence, evidence = (0.0, []) if keyword is None else get_keyword_confidence(
+            keyword, entry, page_text, page.get('fuzzy', False)
+        )
+        if confidence >= LOCAL_VALIDATION_MIN_CONFIDENCE:
+            validations.append({
+                "keyword": entry.keyword,
+                "valid": True,
+                "reason": f"The keyword '{keyword}' is present in {' and '.join(evidence)}.",
+                "validated_by": "local"
+            })
+        else:
+            escalated.append(raw_entry)
+
+    _stats["keywords_validated_locally"] += len(validations)
+    _stats["keywords_escalated"] += len(escalated)
+    if not escalated:
+        _stats["pages_validated_locally"] += 1
+        logger.info(f"Local validation: all {len(validations)} keywords of page {page['id']} validated locally")
+        return validations, None
+
+    _stats["pages_escalated"] += 1
+    logger.info(f"Local validation: escalating {len(escalated)} of {len(response.keywords)} keywords of page {page['id']}")
+    return validations, {**first_response, "keywords": escalated}
+
+def merge_validations(local_validations: List[Dict[str, Any]], llm_two_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Adds the keyword validations made locally to a layer two result.
+
+    Args:
+        local_validations (List[Dict[str, Any]]): The keyword validations made locally.
+        llm_two_result (Dict[str, Any]): The result of the second LLM layer for the escalated keywords.
+
+    Returns:
+        Dict[str, Any]: The layer two result covering all keywords of the page.
+    """
+    second_response = llm_two_result.get("second_response")
+    if not local_validations or not isinstance(second_response, dict):
+        return llm_two_result
+    return {
+        **llm_two_result,
+        "second_response": {
+            **second_response,
+            "keyword_validation": local_validations + list(second_response.get("keyword_validation") or [])
+        }
+    }
+
+def get_local_validation_stats() -> Dict[str, Any]:
+    """
+    Returns the local validation policy and counters.
+
+    Returns:
+        Dict[str, Any]: Whether local validation is enabled, the evidence weights and minimum
+            confidence, and the page and keyword counters.
+    """
+    return {
+        "enabled": LOCAL_VALIDATION_ENABLED,
+        "article_weight": LOCAL_VALIDATION_ARTICLE_WEIGHT,
+        "page_text_weight": LOCAL_VALIDATION_PAGE_TEXT_WEIGHT,
+        "min_confidence": LOCAL_VALIDATION_MIN_CONFIDENCE,
+        **_stats
+    }
@@ -0,0 +1,122 @@
+import io
+import logging
+from pathlib import Path
+from typing import Callable, Dict, Any
+import fitz  # PyMuPDF
+from PIL import Image
+from ..config import UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+def _encode_png(pix: fitz.Pixmap, quality: int) -> bytes:
+    """
+    Encodes a pixmap as PNG with MuPDF's native encoder.
+    """
+    return pix.tobytes("png")
+
+def _encode_jpeg(pix: fitz.Pixmap, quality: int) -> bytes:
+    """
+    Encodes a pixmap as JPEG with MuPDF's native encoder.
+    """
+    return pix.tobytes("jpg", jpg_quality=quality)
+
+def _encode_webp(pix: fitz.Pixmap, quality: int) -> bytes:
+    """
+    Encodes a pixmap as WebP with Pillow, wrapping the pixmap buffer without copying it.
+    """
+    mode = "L" if pix.n == 1 else "RGB"
+    img = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride, 1)
+    buffer = io.BytesIO()
+    img.save(buffer, format="WEBP", quality=quality, method=4)
+    return buffer.getvalue()
+
+# Registered page image encoders by format name
+PAGE_ENCODERS: Dict[str, Dict[str, Any]] = {
+    "png": {"encode": _encode_png, "extension": "png", "mime_type": "image/png"},
+    "jpeg": {"encode": _encode_jpeg, "extension": "jpg", "mime_type": "image/jpeg"},
+    "webp": {"encode": _encode_webp, "extension": "webp", "mime_type": "image/webp"},
+}
+
+def register_page_encoder(
+    image_format: str,
+    encode: Callable[[fitz.Pixmap, int], bytes],
+    extension: str,
+    mime_type: str
+) -> None:
+    """
+    Registers an additional page image encoder.
+
+    Args:
+        image_format (str): The name used to select the encoder in configuration.
+        encode (Callable[[fitz.Pixmap, int], bytes]): Function encoding a pixmap at a given quality.
+        extension (str): File extension of the encoded images.
+        mime_type (str): MIME type sent to the LLM for the encoded images.
+    """
+    PAGE_ENCODERS[image_format] = {"encode": encode, "extension": extension, "mime_type": mime_type}
+
+def _get_encoder(image_format: str) -> Dict[str, Any]:
+    """
+    Returns the encoder entry for a format.
+
+    Raises:
+        ValueError: If the format is not registered.
+    """
+    try:
+        return PAGE_ENCODERS[image_format.lower()]
+    except KeyError:
+        raise ValueError(f"Unsupported page image format: {image_format}")
+
+def encode_pixmap(pix: fitz.Pixmap, image_format: str, quality: int) -> bytes:
+    """
+    Encodes a rendered page pixmap in the given format.
+
+    Args:
+        pix (fitz.Pixmap): The rendered page.
+        image_format (str): The name of the encoder to use.
+        quality (int): The quality for lossy formats (1-100).
+
+    Returns:
+        bytes: The encoded image.
+
+    Raises:
+        ValueError: If the format is not registered.
+    """
+    return _get_encoder(image_format)["encode"](pix, quality)
+
+def get_image_extension(image_format: str) -> str:
+    """
+    Returns the file extension used for images of the given format.
+
+    Args:
+        image_format (str): The name of the encoder.
+
+    Returns:
+        str: The file extension, without the dot.
+    """
+    return _get_encoder(image_format)["extension"]
+
+def get_image_mime_type(image_format: str) -> str:
+    """
+    Returns the MIME type of images of the given format.
+
+    Args:
+        image_format (str): The name of the encoder.
+
+    Returns:
+        str: The MIME type.
+    """
+    return _get_encoder(image_format)["mime_type"]
+
+def get_page_image_path(pdf_id: str, page_number: int, image_format: str = "png") -> Path:
+    """
+    Returns the path of a stored page image.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        page_number (int): The 1-based page number.
+        image_format (str, optional): The format the page was stored in. Defaults to "png".
+
+    Returns:
+        Path: The path of the page image.
+    """
+    return Path(UPLOAD_DIR) / pdf_id / f"{page_number}.{get_image_extension(image_format)}"
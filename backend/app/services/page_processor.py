@@ -1,16 +1,96 @@
+import asyncio
+import json
 import os
 import logging
-from typing import Dict, Any
-from ..config import UPLOAD_DIR
+from typing import Dict, Any, List
+from .page_encoder import get_page_image_path, get_image_mime_type
+from .region_cropper import load_page_regions, select_regions, get_region_images
+from .local_validation import validate_locally, merge_validations
+from ..models.system_prompt import get_system_prompt, get_second_system_prompt, get_additional_query
+from ..models.model_backend import get_model_names
+from ..utils.file_utils import hash_file
+from ..utils.keyword_matcher import normalize_text
+from ..utils.result_cache import make_cache_key, get_cached_result, store_result
+from ..config import RESULT_CACHE_ENABLED, REGION_CROPPING_ENABLED
 
 logger = logging.getLogger(__name__)
 
+def build_page_cache_key(page: Dict[str, Any], pdf_data: Dict[str, Any], query: str) -> str:
+    """
+    Builds the result cache key of a page analysis.
+
+    The key covers the images sent for the page, both system prompts, the page context
+    sent to the model, the full query and the names of both models.
+
+    Args:
+        page (Dict[str, Any]): Dictionary containing page information, including its images.
+        pdf_data (Dict[str, Any]): Metadata about the PDF containing the page.
+        query (str): The query to be applied to the page.
+
+    Returns:
+        str: The cache key.
+    """
+    prompts = [
+        get_system_prompt(),
+        get_second_system_prompt(),
+        f"{pdf_data.get('publication_name')}|{pdf_data.get('edition')}|{pdf_data.get('date')}|{page['number']}"
+    ]
+    image_hashes = [hash_file(image['path']) for image in page['images']]
+    return make_cache_key(image_hashes, prompts, query, get_model_names())
+
+def build_query_version(additional_query: str, keywords: List[str]) -> str:
+    """
+    Builds the version of a client's query that processed page records are kept under.
+
+    The version covers both system prompts, the default and the request's additional query,
+    the set of keywords (ignoring order, case and diacritics) and the names of both models,
+    so changing any of them makes the earlier records stale.
+
+    Args:
+        additional_query (str): The additional query of the request.
+        keywords (List[str]): The keywords of the request.
+
+    Returns:
+        str: The query version.
+    """
+    prompts = [get_system_prompt(), get_second_system_prompt(), get_additional_query()]
+    keyword_set = sorted({normalize_text(keyword).strip() for keyword in keywords})
+    query = json.dumps([additional_query, keyword_set], ensure_ascii=False)
+    return make_cache_key([], prompts, query, get_model_names())
+
+async def select_page_images(page: Dict[str, Any], image_format: str) -> List[Dict[str, str]]:
+    """
+    Returns the images to send for a page: the crops of its regions mentioning one of
+    the page's keywords, or the full page image when no suitable regions are found.
+
+    Args:
+        page (Dict[str, Any]): Dictionary containing page information, including the keywords
+            and the full page image.
+        image_format (str): The format of the page's images.
+
+    Returns:
+        List[Dict[str, str]]: The path and MIME type of each image to send.
+    """
+    pdf_id = page['id'].rsplit('_', 1)[0]
+    regions = load_page_regions(pdf_id, page['number'])
+    selected = select_regions(regions, page['keywords'], page.get('fuzzy', False)) if regions else None
+    if not selected:
+        return page['images']
+    try:
+        images = await get_region_images(pdf_id, page['number'], selected, image_format)
+    except Exception as e:
+        logger.error(f"Failed to crop regions of page {page['id']}, sending the full page: {str(e)}")
+        return page['images']
+    logger.info(f"Sending regions {[region['id'] for region in selected]} of page {page['id']}")
+    return images
+
 async def process_page(page: Dict[str, Any], pdf_data: Dict[str, Any], query: str, client_name: str) -> Dict[str, Any]:
     """
     Processes a single page through both LLM layers.
 
-    This function coordinates the processing of a page through the first LLM layer for analysis
-    and the second LLM layer for validation if necessary.
+    This function coordinates the processing of a page through the first LLM layer for analysis,
+    local validation of the keywords found, and the second LLM layer for the keywords that
+    could not be validated locally.
 
     Args:
         page (Dict[str, Any]): Dictionary containing page information.
@@ -26,19 +106,36 @@ async def process_page(page: Dict[str, Any], pdf_data: Dict[str, Any], query: st
     """
     try:
         logger.info(f"Processing page {page['id']}")
-        # Update this line to construct the image path
-        image_path = os.path.join(UPLOAD_DIR, page['id'].split('_')[0], f"{page['number']}.png")
+        # Pages are stored in the format recorded at ingestion (PNG for older uploads)
+        image_format = pdf_data.get("image_format", "png")
+        image_path = str(get_page_image_path(page['id'].split('_')[0], page['number'], image_format))
         
         # Add this line to check if the image file exists
         if not os.path.exists(image_path):
             logger.error(f"Image file not found: {image_path}")
             return {
                 "page_id": page['id'],
-                "error": f"Image file not found: {image_path}"
+                "error": f"Image file not found: {image_path}",
+                "retryable": False
             }
 
-        # Add the image_path to the page dictionary
+        # Add the image_path and its MIME type to the page dictionary
         page['image_path'] = image_path
+        page['mime_type'] = get_image_mime_type(image_format)
+        page['images'] = [{"path": image_path, "mime_type": page['mime_type']}]
+
+        # Send only the article regions mentioning a keyword when the page was segmented
+        if REGION_CROPPING_ENABLED and page.get('keywords'):
+            page['images'] = await select_page_images(page, image_format)
+
+        # Serve repeated analyses from the result cache; hashing and SQLite run off the event loop
+        cache_key = None
+        if RESULT_CACHE_ENABLED:
+            cache_key = await asyncio.to_thread(build_page_cache_key, page, pdf_data, query)
+            cached_result = await asyncio.to_thread(get_cached_result, cache_key)
+            if cached_result is not None:
+                logger.info(f"Result cache hit for page {page['id']}")
+                return {**cached_result, "page_id": page['id'], "cached": True}
 
         from .llm_layer_one import analyze_page_with_llm_one
         from .llm_layer_two import validate_llm_one_response
@@ -51,17 +148,27 @@ async def process_page(page: Dict[str, Any], pdf_data: Dict[str, Any], query: st
 
         # Check if retrieval is true
         if llm_one_result["first_response"].get("retrieval"):
-            # Process with LLM Layer Two
-            llm_two_result = await validate_llm_one_response(
-                page_id=page['id'],
-                llm_one_response=llm_one_result["first_response"],
-                client_name=client_name
-            )
-            # Merge results
-            return {**llm_one_result, **llm_two_result}
+            # Validate locally first and escalate only the uncertain keywords
+            local_validations, escalated_response = validate_locally(page, llm_one_result["first_response"])
+            if escalated_response is None:
+                result = {**llm_one_result, "second_response": {"keyword_validation": local_validations}}
+            else:
+                # Process with LLM Layer Two
+                llm_two_result = await validate_llm_one_response(
+                    page_id=page['id'],
+                    llm_one_response=escalated_response,
+                    client_name=client_name
+                )
+                # Merge results
+                result = {**llm_one_result, **merge_validations(local_validations, llm_two_result)}
         else:
             # No need to process with the second LLM
-            return llm_one_result
+            result = llm_one_result
+
+        # Truncated answers are incomplete and analyzed again next time
+        if cache_key and not result.get("error") and not result.get("truncated"):
+            await asyncio.to_thread(store_result, cache_key, result)
+        return result
 
     except Exception as e:
         logger.error(f"Error processing page {page['id']}: {str(e)}")
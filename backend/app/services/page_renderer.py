@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+import fitz  # PyMuPDF
+from .page_encoder import encode_pixmap, get_image_extension
+from .region_cropper import segment_page_regions, save_page_regions
+from ..utils.file_utils import save_image_bytes, save_text
+from ..config import (
+    PDF_EXTRACTION_ZOOM,
+    PDF_EXTRACTION_WORKERS,
+    PDF_EXTRACTION_CHUNK_SIZE,
+    PAGE_IMAGE_FORMAT,
+    PAGE_IMAGE_QUALITY,
+    PAGE_IMAGE_GRAYSCALE
+)
+
+logger = logging.getLogger(__name__)
+
+# Process pool shared by all uploads, created on first use
+_executor: Optional[ProcessPoolExecutor] = None
+
+def get_render_executor() -> ProcessPoolExecutor:
+    """
+    Returns the process pool used for page rasterization, creating it if needed.
+
+    The pool uses the "spawn" start method so workers never inherit the event loop,
+    open sockets or gRPC threads of the API process.
+
+    Returns:
+        ProcessPoolExecutor: The shared rendering process pool.
+    """
+    global _executor
+    if _executor is None:
+        workers = max(1, PDF_EXTRACTION_WORKERS)
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        logger.info(f"Started page rendering pool with {workers} workers")
+    return _executor
+
+def shutdown_render_executor() -> None:
+    """
+    Shuts down the rendering process pool if it was started.
+    """
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        logger.info("Page rendering pool shut down")
+
+def split_page_ranges(total_pages: int, chunk_size: int) -> List[Tuple[int, int]]:
+    """
+    Splits a page count into contiguous half-open ranges.
+
+    Args:
+        total_pages (int): The number of pages in the document.
+        chunk_size (int): The maximum number of pages per range.
+
+    Returns:
+        List[Tuple[int, int]]: A list of (start, stop) page index ranges.
+    """
+    chunk_size = max(1, chunk_size)
+    return [(start, min(start + chunk_size, total_pages)) for start in range(0, total_pages, chunk_size)]
+
+def render_page_range(
+    pdf_path: str,
+    output_dir: str,
+    start: int,
+    stop: int,
+    zoom: float,
+    image_format: str,
+    quality: int,
+    grayscale: bool
+) -> int:
+    """
+    Renders a range of pages of a PDF to encoded images and stores the text layer
+    and article regions of each page next to its image.
+
+    Runs inside a worker process: the document is opened from disk by each worker
+    so no page data has to be pickled across the process boundary. Pages are encoded
+    straight from the pixmap buffer, without an intermediate PIL copy.
+
+    Args:
+        pdf_path (str): Path of the PDF file on disk.
+        output_dir (str): Directory where the page images, texts and regions are written.
+        start (int): Index of the first page to render (0-based, inclusive).
+        stop (int): Index of the last page to render (0-based, exclusive).
+        zoom (float): Zoom factor applied when rasterizing.
+        image_format (str): The page image encoder to use.
+        quality (int): The quality for lossy formats.
+        grayscale (bool): Whether to render pages in grayscale.
+
+    Returns:
+        int: The number of pages rendered.
+    """
+    mat = fitz.Matrix(zoom, zoom)
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    extension = get_image_extension(image_format)
+    with fitz.open(pdf_path) as doc:
+        for page_num in range(start, stop):
+            page = doc.load_page(page_num)
+            pix = page.get_pixmap(matrix=mat, colorspace=colorspace, alpha=False)
+            data = encode_pixmap(pix, image_format, quality)
+            save_image_bytes(data, Path(output_dir) / f"{page_num + 1}.{extension}")
+            save_text(page.get_text("text"), Path(output_dir) / f"{page_num + 1}.txt")
+            save_page_regions(segment_page_regions(page), Path(output_dir) / f"{page_num + 1}.regions.json")
+    return stop - start
+
+def count_pages(pdf_path: Union[str, os.PathLike]) -> int:
+    """
+    Returns the number of pages of a PDF on disk.
+
+    Args:
+        pdf_path (Union[str, os.PathLike]): Path of the PDF file.
+
+    Returns:
+        int: The page count.
+    """
+    with fitz.open(pdf_path) as doc:
+        return len(doc)
+
+async def render_pdf(
+    pdf_path: Union[str, os.PathLike],
+    output_dir: Union[str, os.PathLike],
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    zoom: float = PDF_EXTRACTION_ZOOM,
+    image_format: str = PAGE_IMAGE_FORMAT,
+    quality: int = PAGE_IMAGE_QUALITY,
+    grayscale: bool = PAGE_IMAGE_GRAYSCALE
+) -> int:
+    """
+    Renders every page of a PDF to images using the rendering process pool.
+
+    The page list is split into ranges of PDF_EXTRACTION_CHUNK_SIZE pages which are
+    rendered concurrently; the event loop stays free while the workers run.
+
+    Args:
+        pdf_path (Union[str, os.PathLike]): Path of the PDF file on disk.
+        output_dir (Union[str, os.PathLike]): Directory where the page images are written.
+        progress_callback (Optional[Callable[[int, int], None]]): Called with the number of
+            pages rendered so far and the total page count whenever a range completes.
+        zoom (float, optional): Zoom factor applied when rasterizing. Defaults to PDF_EXTRACTION_ZOOM.
+        image_format (str, optional): The page image encoder. Defaults to PAGE_IMAGE_FORMAT.
+        quality (int, optional): The quality for lossy formats. Defaults to PAGE_IMAGE_QUALITY.
+        grayscale (bool, optional): Whether to render in grayscale. Defaults to PAGE_IMAGE_GRAYSCALE.
+
+    Returns:
+        int: The total number of pages rendered.
+
+    Raises:
+        Exception: If any worker fails to render its range, once the other ranges have
+            been cancelled or have finished.
+    """
+    get_image_extension(image_format)  # Fail fast on unknown formats
+    loop = asyncio.get_running_loop()
+    executor = get_render_executor()
+    total_pages = await loop.run_in_executor(executor, count_pages, str(pdf_path))
+    ranges = split_page_ranges(total_pages, PDF_EXTRACTION_CHUNK_SIZE)
+
+    worker_futures = [
+        executor.submit(
+            render_page_range, str(pdf_path), str(output_dir), start, stop,
+            zoom, image_format, quality, grayscale
+        )
+        for start, stop in ranges
+    ]
+    futures = [asyncio.wrap_future(future) for future in worker_futures]
+    if progress_callback:
+        progress_callback(0, total_pages)
+
+    pages_done = 0
+    try:
+        for future in asyncio.as_completed(futures):
+            pages_done += await future
+            if progress_callback:
+                progress_callback(pages_done, total_pages)
+    except BaseException:
+        # Ranges not started yet are cancelled and running ones awaited, so that no worker
+        # still writes into output_dir when the caller cleans it up
+        for worker_future in worker_futures:
+            worker_future.cancel()
+        await asyncio.gather(*futures, return_exceptions=True)
+        raise
+    logger.info(f"Rendered {pages_done} pages of {pdf_path} in {len(ranges)} ranges")
+    return total_pages
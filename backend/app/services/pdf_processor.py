@@ -1,12 +1,18 @@
+import asyncio
 import os
+import shutil
 import uuid
-import fitz  # PyMuPDF
-from PIL import Image
 from pathlib import Path
+from typing import Callable, Optional, Tuple
+from fastapi import UploadFile
 import logging
-from ..utils.file_utils import save_image
-from ..utils.general_utils import load_metadata, save_metadata
-from ..config import UPLOAD_DIR, METADATA_FILE, PDF_EXTRACTION_ZOOM
+from .page_renderer import render_pdf
+from .keyword_prefilter import index_pdf_text
+from .client_matching import match_pdf_clients
+from .standing_queries import schedule_standing_queries
+from ..utils.file_utils import spool_upload
+from ..utils.general_utils import add_pdf_metadata
+from ..config import UPLOAD_DIR, METADATA_DB_FILE, SOURCE_PDF_NAME, SPOOL_DIR, UPLOAD_CHUNK_SIZE, PAGE_IMAGE_FORMAT
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +26,7 @@ class PDFProcessor:
         Initializes the PDFProcessor with the upload directory and metadata file path.
         """
         self.upload_dir: Path = UPLOAD_DIR
-        self.metadata_file: Path = METADATA_FILE
+        self.metadata_file: Path = METADATA_DB_FILE
         os.makedirs(self.upload_dir, exist_ok=True)
 
     def generate_pdf_id(self) -> str:
@@ -32,14 +38,46 @@ class PDFProcessor:
         """
         return str(uuid.uuid4())
 
-    def extract_pages(self, pdf_content: bytes, pdf_id: str) -> int:
+    async def save_upload(self, file: UploadFile, pdf_id: str) -> Tuple[Path, int, str]:
         """
-        Extracts pages from a PDF and saves them as images.
+        Streams an uploaded PDF into the directory of the given PDF id.
 
         Args:
-            pdf_content (bytes): The content of the PDF file.
+            file (UploadFile): The uploaded PDF file.
             pdf_id (str): The unique identifier for the PDF.
 
+        Returns:
+            Tuple[Path, int, str]: The path of the stored PDF, its size in bytes and its SHA-256 checksum.
+        """
+        pdf_dir = Path(self.upload_dir) / pdf_id
+        os.makedirs(pdf_dir, exist_ok=True)
+        pdf_path = pdf_dir / SOURCE_PDF_NAME
+        try:
+            file_size, sha256 = await spool_upload(file, pdf_path, SPOOL_DIR, UPLOAD_CHUNK_SIZE)
+        except Exception:
+            shutil.rmtree(pdf_dir, ignore_errors=True)
+            raise
+        logger.info(f"Stored PDF {pdf_id} at {pdf_path} ({file_size} bytes, sha256 {sha256})")
+        return pdf_path, file_size, sha256
+
+    async def extract_pages(
+        self,
+        pdf_path: Path,
+        pdf_id: str,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """
+        Extracts pages from a stored PDF and saves them as images.
+
+        Rendering is delegated to the page rendering process pool, so awaiting this
+        method does not block the event loop.
+
+        Args:
+            pdf_path (Path): The path of the stored PDF file.
+            pdf_id (str): The unique identifier for the PDF.
+            progress_callback (Optional[Callable[[int, int], None]]): Receives the number of
+                pages extracted so far and the total page count.
+
         Returns:
             int: The total number of pages extracted.
 
@@ -47,24 +85,84 @@ class PDFProcessor:
             Exception: If there's an error during page extraction.
         """
         try:
-            with fitz.open(stream=pdf_content, filetype="pdf") as doc:
-                pdf_dir = Path(self.upload_dir) / pdf_id
-                os.makedirs(pdf_dir, exist_ok=True)
-
-                for page_num in range(len(doc)):
-                    page = doc.load_page(page_num)
-                    mat = fitz.Matrix(PDF_EXTRACTION_ZOOM, PDF_EXTRACTION_ZOOM)
-                    pix = page.get_pixmap(matrix=mat, alpha=False)
-                    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                    image_path = pdf_dir / f"{page_num + 1}.png"
-                    save_image(img, image_path)
-                logger.info(f"Extracted {len(doc)} pages from PDF {pdf_id}")
-                return len(doc)
+            pdf_dir = Path(self.upload_dir) / pdf_id
+            os.makedirs(pdf_dir, exist_ok=True)
+            total_pages = await render_pdf(pdf_path, pdf_dir, progress_callback)
+            logger.info(f"Extracted {total_pages} pages from PDF {pdf_id}")
+            return total_pages
         except Exception as e:
             logger.error(f"Failed to extract pages for PDF {pdf_id}: {str(e)}")
             raise e
 
-    def update_metadata(self, pdf_id: str, publication_name: str, edition: str, date: str, total_pages: int) -> None:
+    async def process_pdf(
+        self,
+        pdf_path: Path,
+        pdf_id: str,
+        publication_name: str,
+        edition: str,
+        date: str,
+        file_size: Optional[int] = None,
+        sha256: Optional[str] = None,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """
+        Runs the full ingestion of a stored PDF: page extraction, the metadata update,
+        the indexing of the page texts, the matching of every client's keywords and the
+        scheduling of the subscribed clients' standing queries.
+
+        The PDF directory is removed again if ingestion fails, so no half-extracted
+        editions are left behind.
+
+        Args:
+            pdf_path (Path): The path of the stored PDF file.
+            pdf_id (str): The unique identifier for the PDF.
+            publication_name (str): The name of the publication.
+            edition (str): The edition of the publication.
+            date (str): The date of the publication.
+            file_size (Optional[int]): The size of the PDF file in bytes.
+            sha256 (Optional[str]): The SHA-256 checksum of the PDF file.
+            progress_callback (Optional[Callable[[int, int], None]]): Receives the number of
+                pages extracted so far and the total page count.
+
+        Returns:
+            int: The total number of pages extracted.
+
+        Raises:
+            Exception: If there's an error during extraction or the metadata update.
+        """
+        try:
+            total_pages = await self.extract_pages(pdf_path, pdf_id, progress_callback)
+            self.update_metadata(pdf_id, publication_name, edition, date, total_pages, file_size, sha256, PAGE_IMAGE_FORMAT)
+        except Exception:
+            shutil.rmtree(Path(self.upload_dir) / pdf_id, ignore_errors=True)
+            raise
+
+        try:
+            await asyncio.to_thread(index_pdf_text, pdf_id, total_pages)
+        except Exception as e:
+            # The PDF stays usable; queries fall back to the stored page texts until the index is rebuilt
+            logger.error(f"Failed to index text of PDF {pdf_id}: {str(e)}")
+        try:
+            await asyncio.to_thread(match_pdf_clients, pdf_id, total_pages)
+        except Exception as e:
+            logger.error(f"Failed to match client keywords against PDF {pdf_id}: {str(e)}")
+        try:
+            schedule_standing_queries(pdf_id)
+        except Exception as e:
+            logger.error(f"Failed to schedule standing queries for PDF {pdf_id}: {str(e)}")
+        return total_pages
+
+    def update_metadata(
+        self,
+        pdf_id: str,
+        publication_name: str,
+        edition: str,
+        date: str,
+        total_pages: int,
+        file_size: Optional[int] = None,
+        sha256: Optional[str] = None,
+        image_format: str = "png"
+    ) -> None:
         """
         Updates the metadata for a processed PDF.
 
@@ -74,19 +172,23 @@ class PDFProcessor:
             edition (str): The edition of the publication.
             date (str): The date of the publication.
             total_pages (int): The total number of pages in the PDF.
+            file_size (Optional[int]): The size of the PDF file in bytes.
+            sha256 (Optional[str]): The SHA-256 checksum of the PDF file.
+            image_format (str, optional): The format the page images were stored in. Defaults to "png".
 
         Raises:
             Exception: If there's an error updating the metadata.
         """
         try:
-            metadata = load_metadata()
-            metadata['pdfs'][pdf_id] = {
+            add_pdf_metadata(pdf_id, {
                 "publication_name": publication_name,
                 "edition": edition,
                 "date": date,
-                "total_pages": total_pages
-            }
-            save_metadata(metadata)
+                "total_pages": total_pages,
+                "file_size": file_size,
+                "sha256": sha256,
+                "image_format": image_format
+            })
             logger.info(f"Updated metadata for PDF {pdf_id}")
         except Exception as e:
             logger.error(f"Failed to update metadata for PDF {pdf_id}: {str(e)}")
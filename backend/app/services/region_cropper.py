@@ -0,0 +1,259 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import fitz  # PyMuPDF
+from .page_encoder import encode_pixmap, get_image_extension, get_image_mime_type
+from .keyword_prefilter import match_keywords
+from ..utils.file_utils import save_image_bytes, save_text, load_text
+from ..config import (
+    UPLOAD_DIR,
+    SOURCE_PDF_NAME,
+    PAGE_IMAGE_FORMAT,
+    PAGE_IMAGE_QUALITY,
+    PAGE_IMAGE_GRAYSCALE,
+    REGION_MERGE_MARGIN,
+    REGION_MIN_CHARS,
+    REGION_TARGET_SIZE,
+    REGION_MIN_ZOOM,
+    REGION_MAX_ZOOM,
+    REGION_MAX_PER_PAGE,
+    REGION_MAX_COVERAGE
+)
+
+logger = logging.getLogger(__name__)
+
+Rect = Tuple[float, float, float, float]
+
+def _expand(rect: Rect, margin: float) -> Rect:
+    """
+    Grows a rectangle by a margin on every side.
+    """
+    return (rect[0] - margin, rect[1] - margin, rect[2] + margin, rect[3] + margin)
+
+def _intersects(a: Rect, b: Rect) -> bool:
+    """
+    Tells whether two rectangles overlap.
+    """
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def _union(a: Rect, b: Rect) -> Rect:
+    """
+    Returns the bounding rectangle of two rectangles.
+    """
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def segment_page_regions(page: fitz.Page, margin: float = REGION_MERGE_MARGIN) -> List[Dict[str, Any]]:
+    """
+    Splits a page into article regions using the geometry of its text and image blocks.
+
+    Blocks whose rectangles, grown by the margin, overlap are merged until no two regions
+    touch: paragraphs of a column join into one region, a headline spanning several
+    columns joins them, and gutters wider than twice the margin separate articles.
+
+    Args:
+        page (fitz.Page): The page to segment.
+        margin (float, optional): The merge margin in PDF points. Defaults to REGION_MERGE_MARGIN.
+
+    Returns:
+        List[Dict[str, Any]]: The regions in reading order, each with its id, bounding box
+            in PDF points and text.
+    """
+    regions: List[Dict[str, Any]] = []
+    for x0, y0, x1, y1, text, _, block_type in page.get_text("blocks", sort=True):
+        if block_type == 0 and not text.strip():
+            continue
+        regions.append({"bbox": (x0, y0, x1, y1), "texts": [text.strip()] if block_type == 0 else []})
+
+    merged = True
+    while merged:
+        merged = False
+        i = 0
+        while i < len(regions):
+            grown = _expand(regions[i]["bbox"], margin)
+            for j in range(len(regions) - 1, i, -1):
+                if _intersects(grown, regions[j]["bbox"]):
+                    regions[i]["bbox"] = _union(regions[i]["bbox"], regions[j]["bbox"])
+                    regions[i]["texts"].extend(regions.pop(j)["texts"])
+                    grown = _expand(regions[i]["bbox"], margin)
+                    merged = True
+            i += 1
+
+    regions.sort(key=lambda region: (round(region["bbox"][1]), region["bbox"][0]))
+    return [
+        {"id": i, "bbox": [round(v, 2) for v in region["bbox"]], "text": "\n".join(region["texts"])}
+        for i, region in enumerate(regions)
+    ]
+
+def get_page_regions_path(pdf_id: str, page_number: int) -> Path:
+    """
+    Returns the path of the stored regions of a page.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        page_number (int): The 1-based page number.
+
+    Returns:
+        Path: The path of the page's regions file.
+    """
+    return Path(UPLOAD_DIR) / pdf_id / f"{page_number}.regions.json"
+
+def save_page_regions(regions: List[Dict[str, Any]], path: Path) -> None:
+    """
+    Stores the regions of a page.
+
+    Args:
+        regions (List[Dict[str, Any]]): The regions, as returned by segment_page_regions.
+        path (Path): The path of the regions file.
+    """
+    save_text(json.dumps(regions, ensure_ascii=False), path)
+
+def load_page_regions(pdf_id: str, page_number: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Loads the stored regions of a page.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        page_number (int): The 1-based page number.
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: The regions, or None if the page was not segmented.
+    """
+    data = load_text(get_page_regions_path(pdf_id, page_number))
+    return json.loads(data) if data is not None else None
+
+def _area(bbox: List[float]) -> float:
+    """
+    Returns the area of a bounding box.
+    """
+    return max(0.0, bbox[2] - bbox[0]) * max(0.0, bbox[3] - bbox[1])
+
+def select_regions(
+    regions: List[Dict[str, Any]],
+    keywords: List[str],
+    fuzzy: bool = False
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Selects the regions of a page to send to the LLM instead of the full page.
+
+    Args:
+        regions (List[Dict[str, Any]]): The regions of the page.
+        keywords (List[str]): The keywords of the query.
+        fuzzy (bool, optional): Whether to allow approximate matches. Defaults to False.
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: The regions mentioning a keyword, or None if the full
+            page should be sent: no region matches, more than REGION_MAX_PER_PAGE match, or
+            the matches cover more than REGION_MAX_COVERAGE of the page's text area.
+    """
+    text_regions = [region for region in regions if len(region["text"]) >= REGION_MIN_CHARS]
+    matching = [region for region in text_regions if match_keywords(region["text"], keywords, fuzzy)]
+    if not matching or len(matching) > REGION_MAX_PER_PAGE:
+        return None
+
+    page_area = _area([
+        min(r["bbox"][0] for r in regions), min(r["bbox"][1] for r in regions),
+        max(r["bbox"][2] for r in regions), max(r["bbox"][3] for r in regions)
+    ])
+    if page_area and sum(_area(r["bbox"]) for r in matching) / page_area > REGION_MAX_COVERAGE:
+        return None
+    return matching
+
+def get_region_zoom(bbox: List[float]) -> float:
+    """
+    Returns the zoom at which a region's longest side is rendered at about REGION_TARGET_SIZE pixels.
+
+    Args:
+        bbox (List[float]): The region's bounding box in PDF points.
+
+    Returns:
+        float: The zoom, between REGION_MIN_ZOOM and REGION_MAX_ZOOM.
+    """
+    longest_side = max(bbox[2] - bbox[0], bbox[3] - bbox[1], 1.0)
+    return min(REGION_MAX_ZOOM, max(REGION_MIN_ZOOM, REGION_TARGET_SIZE / longest_side))
+
+def get_region_image_path(pdf_id: str, page_number: int, region_id: int, image_format: str) -> Path:
+    """
+    Returns the path of a cropped region image.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        page_number (int): The 1-based page number.
+        region_id (int): The id of the region on its page.
+        image_format (str): The image format.
+
+    Returns:
+        Path: The path of the region image.
+    """
+    return Path(UPLOAD_DIR) / pdf_id / f"{page_number}.r{region_id}.{get_image_extension(image_format)}"
+
+def render_region_images(
+    pdf_path: str,
+    page_number: int,
+    crops: List[Tuple[List[float], str]],
+    image_format: str,
+    quality: int,
+    grayscale: bool
+) -> int:
+    """
+    Renders regions of a page to encoded images.
+
+    Runs inside a rendering worker process. Each region is padded by the merge margin
+    and rendered at the zoom given by get_region_zoom.
+
+    Args:
+        pdf_path (str): Path of the PDF file on disk.
+        page_number (int): The 1-based page number.
+        crops (List[Tuple[List[float], str]]): The bounding box and output path of each region.
+        image_format (str): The page image encoder to use.
+        quality (int): The quality for lossy formats.
+        grayscale (bool): Whether to render in grayscale.
+
+    Returns:
+        int: The number of regions rendered.
+    """
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    with fitz.open(pdf_path) as doc:
+        page = doc.load_page(page_number - 1)
+        for bbox, output_path in crops:
+            clip = fitz.Rect(_expand(tuple(bbox), REGION_MERGE_MARGIN)) & page.rect
+            zoom = get_region_zoom(bbox)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, colorspace=colorspace, alpha=False)
+            save_image_bytes(encode_pixmap(pix, image_format, quality), output_path)
+    return len(crops)
+
+async def get_region_images(
+    pdf_id: str,
+    page_number: int,
+    regions: List[Dict[str, Any]],
+    image_format: str = PAGE_IMAGE_FORMAT
+) -> List[Dict[str, str]]:
+    """
+    Returns the images of the given regions, rendering the missing ones from the stored PDF.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        page_number (int): The 1-based page number.
+        regions (List[Dict[str, Any]]): The regions to return.
+        image_format (str, optional): The image format. Defaults to PAGE_IMAGE_FORMAT.
+
+    Returns:
+        List[Dict[str, str]]: The path and MIME type of each region image.
+    """
+    # Import the executor here to avoid circular imports
+    from .page_renderer import get_render_executor
+
+    paths = [get_region_image_path(pdf_id, page_number, region["id"], image_format) for region in regions]
+    crops = [(region["bbox"], str(path)) for region, path in zip(regions, paths) if not path.exists()]
+    if crops:
+        pdf_path = Path(UPLOAD_DIR) / pdf_id / SOURCE_PDF_NAME
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            get_render_executor(), render_region_images, str(pdf_path), page_number, crops,
+            image_format, PAGE_IMAGE_QUALITY, PAGE_IMAGE_GRAYSCALE
+        )
+        logger.info(f"Rendered {len(crops)} regions of page {page_number} of PDF {pdf_id}")
+
+    mime_type = get_image_mime_type(image_format)
+    return [{"path": str(path), "mime_type": mime_type} for path in paths]
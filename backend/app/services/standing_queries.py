@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set
+from ..utils.general_utils import load_clients
+from ..utils.metadata_store import put_standing_results
+from ..utils.request_pipeline import set_request_priority
+from ..utils.request_scheduler import PRIORITY_BACKGROUND
+from ..config import STANDING_QUERIES_ENABLED, STANDING_QUERY_MAX_CONCURRENT, STANDING_QUERY_RUN_RETENTION
+
+logger = logging.getLogger(__name__)
+
+class StandingQueryRun:
+    """
+    Tracks the background analysis of a newly ingested PDF for the subscribed clients.
+    """
+
+    def __init__(self, pdf_id: str, clients: List[str]):
+        """
+        Initializes a queued run.
+
+        Args:
+            pdf_id (str): The unique identifier of the PDF.
+            clients (List[str]): The names of the subscribed clients.
+        """
+        self.run_id: str = str(uuid.uuid4())
+        self.pdf_id: str = pdf_id
+        self.clients: List[str] = clients
+        self.status: str = "queued"
+        self.pages_analyzed: int = 0
+        self.pages_skipped: int = 0
+        self.pages_failed: int = 0
+        self.error: Optional[str] = None
+        self.created_at: float = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns a JSON-serializable view of the run.
+
+        Returns:
+            Dict[str, Any]: The run status, clients and page counters.
+        """
+        return {
+            "run_id": self.run_id,
+            "pdf_id": self.pdf_id,
+            "clients": self.clients,
+            "status": self.status,
+            "pages_analyzed": self.pages_analyzed,
+            "pages_skipped": self.pages_skipped,
+            "pages_failed": self.pages_failed,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+# Runs by id, oldest first
+_runs: "OrderedDict[str, StandingQueryRun]" = OrderedDict()
+
+# Limits how many PDFs are analyzed at the same time
+_run_slots = asyncio.Semaphore(STANDING_QUERY_MAX_CONCURRENT)
+
+# Keeps references to running tasks so they are not garbage collected
+_running_tasks: Set[asyncio.Task] = set()
+
+def _prune_runs() -> None:
+    """
+    Drops the oldest finished runs once more than STANDING_QUERY_RUN_RETENTION are tracked.
+    """
+    finished = [run_id for run_id, run in _runs.items() if run.status in ("completed", "failed")]
+    for run_id in finished[:max(0, len(_runs) - STANDING_QUERY_RUN_RETENTION)]:
+        del _runs[run_id]
+
+def get_subscribed_clients() -> Dict[str, Any]:
+    """
+    Returns the clients with a standing query subscription.
+
+    Returns:
+        Dict[str, Any]: The data of each subscribed client by client name.
+    """
+    return {name: data for name, data in load_clients().items() if data.get("subscribed")}
+
+async def _run_standing_queries(run: StandingQueryRun, clients: Dict[str, Any]) -> None:
+    """
+    Analyzes a PDF for the subscribed clients at background priority and stores the results.
+
+    Args:
+        run (StandingQueryRun): The run to execute.
+        clients (Dict[str, Any]): The data of each subscribed client by client name.
+    """
+    # Import the query route here to avoid circular imports
+    from ..routes.query import BatchClientQuery, BatchQueryRequest, query_pdf_batch
+
+    async with _run_slots:
+        run.status = "running"
+        run.started_at = time.time()
+        # Applies to every model request made by this task, so interactive queries go first
+        set_request_priority(PRIORITY_BACKGROUND)
+        try:
+            request = BatchQueryRequest(
+                clients=[BatchClientQuery(client=name, keywords=data.get("keywords", [])) for name, data in clients.items()],
+                pdf_ids=[run.pdf_id]
+            )
+            result = await query_pdf_batch(request)
+            # SQLite writes run off the event loop shared with interactive requests
+            for name, client_result in result["clients"].items():
+                await asyncio.to_thread(put_standing_results, name, run.pdf_id, {
+                    int(response["page_id"].rsplit("_", 1)[1]): response
+                    for response in client_result["responses"]
+                })
+            run.pages_analyzed = result["pages_analyzed"]
+            run.pages_skipped = result["pages_skipped"]
+            run.pages_failed = len(result["failed_pages"])
+            run.status = "completed"
+            logger.info(
+                f"Standing queries for PDF {run.pdf_id} completed: {run.pages_analyzed} pages analyzed"
+                f" for {len(clients)} clients, {run.pages_failed} failed"
+            )
+        except Exception as e:
+            run.status = "failed"
+            run.error = str(e)
+            logger.error(f"Standing queries for PDF {run.pdf_id} failed: {str(e)}")
+        finally:
+            run.finished_at = time.time()
+
+def schedule_standing_queries(pdf_id: str) -> Optional[StandingQueryRun]:
+    """
+    Schedules the background analysis of a newly ingested PDF for every subscribed client.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+
+    Returns:
+        Optional[StandingQueryRun]: The queued run, or None if standing queries are disabled
+            or no client is subscribed.
+    """
+    if not STANDING_QUERIES_ENABLED:
+        return None
+    clients = get_subscribed_clients()
+    if not clients:
+        return None
+
+    run = StandingQueryRun(pdf_id, list(clients))
+    _runs[run.run_id] = run
+    _prune_runs()
+
+    task = asyncio.create_task(_run_standing_queries(run, clients))
+    _running_tasks.add(task)
+    task.add_done_callback(_running_tasks.discard)
+
+    logger.info(f"Queued standing queries for PDF {pdf_id} and {len(clients)} clients")
+    return run
+
+def list_runs() -> List[StandingQueryRun]:
+    """
+    Returns all tracked standing query runs, oldest first.
+
+    Returns:
+        List[StandingQueryRun]: The tracked runs.
+    """
+    return list(_runs.values())
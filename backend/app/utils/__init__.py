@@ -1 +1 @@
-from . import api_utils, file_utils, general_utils, request_pipeline, request_pipeline_pro, retry_processor
\ No newline at end of file
+from . import api_utils, file_utils, general_utils, request_pipeline, request_scheduler, retry_processor, result_cache, text_index, keyword_matcher, response_parser
\ No newline at end of file
@@ -1,7 +1,11 @@
 import os
+import hashlib
+import tempfile
+from functools import lru_cache
 from PIL import Image
+from fastapi import UploadFile
 import logging
-from typing import Union
+from typing import Optional, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +29,59 @@ def save_image(image: Image.Image, path: Union[str, os.PathLike], format: str =
         logger.error(f"Failed to save image at {path}: {str(e)}")
         raise e
 
+def save_image_bytes(data: bytes, path: Union[str, os.PathLike]) -> None:
+    """
+    Saves an already encoded image to the specified path.
+
+    Args:
+        data (bytes): The encoded image.
+        path (Union[str, os.PathLike]): The path where the image should be saved.
+
+    Raises:
+        Exception: If there's an error saving the image.
+    """
+    try:
+        with open(path, 'wb') as f:
+            f.write(data)
+        logger.info(f"Image saved at {path}")
+    except Exception as e:
+        logger.error(f"Failed to save image at {path}: {str(e)}")
+        raise e
+
+def save_text(text: str, path: Union[str, os.PathLike]) -> None:
+    """
+    Saves text as UTF-8 to the specified path.
+
+    Args:
+        text (str): The text to be saved.
+        path (Union[str, os.PathLike]): The path where the text should be saved.
+
+    Raises:
+        Exception: If there's an error saving the text.
+    """
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+    except Exception as e:
+        logger.error(f"Failed to save text at {path}: {str(e)}")
+        raise e
+
+def load_text(path: Union[str, os.PathLike]) -> Optional[str]:
+    """
+    Loads UTF-8 text from the specified path.
+
+    Args:
+        path (Union[str, os.PathLike]): The path of the text file.
+
+    Returns:
+        Optional[str]: The text, or None if the file does not exist.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
 def load_image(path: Union[str, os.PathLike]) -> Image.Image:
     """
     Loads an image from the specified path.
@@ -43,4 +100,76 @@ def load_image(path: Union[str, os.PathLike]) -> Image.Image:
             return img.convert('RGB')
     except Exception as e:
         logger.error(f"Failed to load image from {path}: {str(e)}")
-        raise e
\ No newline at end of file
+        raise e
+
+async def spool_upload(
+    upload: UploadFile,
+    destination: Union[str, os.PathLike],
+    spool_dir: Union[str, os.PathLike],
+    chunk_size: int
+) -> Tuple[int, str]:
+    """
+    Streams an uploaded file to disk in chunks while computing its SHA-256 checksum.
+
+    The data is written to a temporary file in the spool directory and moved to its
+    destination only once the upload has been received completely, so memory use
+    stays bounded by the chunk size whatever the file size.
+
+    Args:
+        upload (UploadFile): The uploaded file.
+        destination (Union[str, os.PathLike]): The final path of the file.
+        spool_dir (Union[str, os.PathLike]): Directory for the temporary spool file.
+        chunk_size (int): Number of bytes read per chunk.
+
+    Returns:
+        Tuple[int, str]: The file size in bytes and its hex SHA-256 checksum.
+
+    Raises:
+        Exception: If there's an error receiving or writing the file.
+    """
+    checksum = hashlib.sha256()
+    size = 0
+    fd, spool_path = tempfile.mkstemp(dir=spool_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, 'wb') as spool:
+            while True:
+                chunk = await upload.read(chunk_size)
+                if not chunk:
+                    break
+                spool.write(chunk)
+                checksum.update(chunk)
+                size += len(chunk)
+        os.replace(spool_path, destination)
+        logger.info(f"Spooled {size} bytes to {destination}")
+        return size, checksum.hexdigest()
+    except Exception as e:
+        logger.error(f"Failed to spool upload to {destination}: {str(e)}")
+        if os.path.exists(spool_path):
+            os.remove(spool_path)
+        raise e
+
+@lru_cache(maxsize=4096)
+def _hash_file_cached(path: str, mtime_ns: int, size: int) -> str:
+    """
+    Computes the SHA-256 checksum of a file; cached per path, modification time and size.
+    """
+    checksum = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            checksum.update(chunk)
+    return checksum.hexdigest()
+
+def hash_file(path: Union[str, os.PathLike]) -> str:
+    """
+    Returns the SHA-256 checksum of a file.
+
+    Checksums are memoized in-process and recomputed only when the file changes.
+
+    Args:
+        path (Union[str, os.PathLike]): The path of the file.
+
+    Returns:
+        str: The hex SHA-256 checksum.
+    """
+    stat = os.stat(path)
+    return _hash_file_cached(str(path), stat.st_mtime_ns, stat.st_size)
@@ -1,52 +1,100 @@
 import json
 import os
-from typing import Dict, Any
-from ..config import METADATA_FILE, CLIENT_DB_FILE
+from typing import Dict, Any, List, Optional
+from . import metadata_store
+from ..config import METADATA_DB_FILE, CLIENT_DB_FILE
 import logging
 
 logger = logging.getLogger(__name__)
 
 def load_metadata() -> Dict[str, Any]:
     """
-    Loads metadata from the metadata.json file.
-    Ensures that the 'pdfs' key exists and moves any misplaced PDF entries to it.
+    Loads the metadata of every PDF from the metadata store.
+
+    Prefer get_pdf_metadata for single-record lookups; this reads the whole store.
 
     Returns:
-        Dict[str, Any]: A dictionary containing the metadata.
-    """
-    logger.info(f"Attempting to load metadata from {METADATA_FILE}")
-    if os.path.exists(METADATA_FILE):
-        try:
-            with open(METADATA_FILE, 'r') as f:
-                metadata = json.load(f)
-            # Ensure 'pdfs' key exists in metadata
-            if 'pdfs' not in metadata:
-                metadata['pdfs'] = {}
-            # Move any misplaced PDF entries to the 'pdfs' key
-            for key, value in list(metadata.items()):
-                if key != 'pdfs' and isinstance(value, dict) and 'publication_name' in value:
-                    metadata['pdfs'][key] = value
-                    del metadata[key]
-            logger.info(f"Loaded metadata with {len(metadata['pdfs'])} PDFs")
-            return metadata
-        except json.JSONDecodeError:
-            logger.error("Error decoding metadata file. Starting with empty metadata.")
-    else:
-        logger.warning(f"Metadata file not found at {METADATA_FILE}")
-    return {'pdfs': {}}
+        Dict[str, Any]: A dictionary containing the metadata under the 'pdfs' key.
+    """
+    logger.info(f"Attempting to load metadata from {METADATA_DB_FILE}")
+    metadata = {'pdfs': metadata_store.get_all_pdfs()}
+    logger.info(f"Loaded metadata with {len(metadata['pdfs'])} PDFs")
+    return metadata
 
 def save_metadata(metadata: Dict[str, Any]) -> None:
     """
-    Saves metadata to the metadata.json file.
+    Replaces the metadata of every PDF in the metadata store.
+
+    Prefer add_pdf_metadata and remove_pdf_metadata for single-record changes.
 
     Args:
         metadata (Dict[str, Any]): The metadata to be saved.
     """
     logger.info(f"Saving metadata with {len(metadata['pdfs'])} PDFs")
-    os.makedirs(os.path.dirname(METADATA_FILE), exist_ok=True)
-    with open(METADATA_FILE, 'w') as f:
-        json.dump(metadata, f, indent=2)
-    logger.info(f"Metadata saved to {METADATA_FILE}")
+    metadata_store.replace_all_pdfs(metadata['pdfs'])
+    logger.info(f"Metadata saved to {METADATA_DB_FILE}")
+
+def get_pdf_metadata(pdf_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the metadata of a single PDF.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+
+    Returns:
+        Optional[Dict[str, Any]]: The metadata, or None if the PDF is unknown.
+    """
+    return metadata_store.get_pdf(pdf_id)
+
+def find_pdf_metadata(
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    publications: Optional[List[str]] = None,
+    editions: Optional[List[str]] = None,
+    pdf_ids: Optional[List[str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the metadata of the PDFs matching the given date range, publications,
+    editions and PDF ids. Empty filters match every PDF.
+
+    Args:
+        date_from (Optional[str]): The earliest publication date (YYYY-MM-DD), inclusive.
+        date_to (Optional[str]): The latest publication date (YYYY-MM-DD), inclusive.
+        publications (Optional[List[str]]): Publication names to include.
+        editions (Optional[List[str]]): Editions to include.
+        pdf_ids (Optional[List[str]]): PDF ids to include.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The metadata of each matching PDF by PDF id.
+    """
+    pdfs = metadata_store.find_pdfs(date_from, date_to, publications, editions, pdf_ids)
+    logger.info(f"Found {len(pdfs)} PDFs matching the query scope")
+    return pdfs
+
+def add_pdf_metadata(pdf_id: str, pdf_data: Dict[str, Any]) -> None:
+    """
+    Inserts or replaces the metadata of a single PDF.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        pdf_data (Dict[str, Any]): The metadata of the PDF.
+    """
+    metadata_store.put_pdf(pdf_id, pdf_data)
+    logger.info(f"Saved metadata for PDF {pdf_id}")
+
+def remove_pdf_metadata(pdf_id: str) -> bool:
+    """
+    Deletes the metadata of a single PDF.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+
+    Returns:
+        bool: True if the PDF was known and has been removed.
+    """
+    removed = metadata_store.delete_pdf(pdf_id)
+    logger.info(f"Removed metadata for PDF {pdf_id}: {removed}")
+    return removed
 
 def get_pdf_count() -> int:
     """
@@ -55,8 +103,7 @@ def get_pdf_count() -> int:
     Returns:
         int: The count of PDFs in the metadata.
     """
-    metadata = load_metadata()
-    count = len(metadata['pdfs'])
+    count = metadata_store.count_pdfs()
     logger.info(f"PDF count: {count}")
     return count
 
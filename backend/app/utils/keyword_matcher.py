@@ -0,0 +1,159 @@
+import logging
+import re
+import threading
+import unicodedata
+from collections import deque
+from typing import Dict, Any, List, Optional, Set, Tuple
+from .general_utils import load_clients
+
+logger = logging.getLogger(__name__)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Client tags appended to keywords in batch queries, e.g. "economy [acme, globex]"
+CLIENT_TAG_PATTERN = re.compile(r"\s*\[[^\]]*\]\s*$")
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes text for keyword matching: diacritics are removed, case is folded
+    and every run of non-word characters becomes a single space.
+
+    Args:
+        text (str): The text to normalize.
+
+    Returns:
+        str: The normalized text, padded with one space on each side.
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return f" {' '.join(_WORD_PATTERN.findall(stripped.casefold()))} "
+
+class KeywordMatcher:
+    """
+    Aho-Corasick automaton matching the keywords of many clients in a single pass over a text.
+
+    Keywords and texts are normalized with normalize_text, and keywords are matched
+    on whole words only: a normalized keyword " k " can only occur in a normalized
+    text at word boundaries.
+    """
+
+    def __init__(self, client_keywords: Dict[str, List[str]]):
+        """
+        Compiles the automaton.
+
+        Args:
+            client_keywords (Dict[str, List[str]]): The keywords of each client by client name.
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Patterns ending at each state, including those reached through failure links
+        self._output: List[List[int]] = [[]]
+        # (client, keyword) pairs of each pattern
+        self._patterns: List[List[Tuple[str, str]]] = []
+        pattern_ids: Dict[str, int] = {}
+
+        for client, keywords in client_keywords.items():
+            for keyword in keywords:
+                pattern = normalize_text(keyword)
+                if not pattern.strip():
+                    continue
+                if pattern not in pattern_ids:
+                    pattern_ids[pattern] = len(self._patterns)
+                    self._patterns.append([])
+                    self._add_pattern(pattern, pattern_ids[pattern])
+                self._patterns[pattern_ids[pattern]].append((client, keyword))
+
+        self._build_failure_links()
+        self.client_count: int = len(client_keywords)
+        self.pattern_count: int = len(self._patterns)
+
+    def _add_pattern(self, pattern: str, pattern_id: int) -> None:
+        """
+        Adds a pattern to the trie.
+        """
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(pattern_id)
+
+    def _build_failure_links(self) -> None:
+        """
+        Computes the failure links breadth-first and merges the outputs along them.
+        """
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                candidate = self._goto[fail].get(char, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """
+        Finds the keywords of every client in a text.
+
+        Args:
+            text (str): The text to search.
+
+        Returns:
+            Dict[str, List[str]]: The matched keywords of each client with at least one match.
+        """
+        found: Set[int] = set()
+        state = 0
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in normalize_text(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+
+        hits: Dict[str, List[str]] = {}
+        for pattern_id in sorted(found):
+            for client, keyword in self._patterns[pattern_id]:
+                hits.setdefault(client, []).append(keyword)
+        return hits
+
+_matcher: Optional[KeywordMatcher] = None
+_lock = threading.Lock()
+
+def build_client_matcher(clients: Dict[str, Any]) -> KeywordMatcher:
+    """
+    Compiles the shared matcher from the client database.
+
+    Args:
+        clients (Dict[str, Any]): The client database, as returned by load_clients.
+
+    Returns:
+        KeywordMatcher: The new shared matcher.
+    """
+    global _matcher
+    matcher = KeywordMatcher({name: data.get("keywords", []) for name, data in clients.items()})
+    with _lock:
+        _matcher = matcher
+    logger.info(f"Compiled keyword matcher for {matcher.client_count} clients and {matcher.pattern_count} keywords")
+    return matcher
+
+def get_client_matcher() -> KeywordMatcher:
+    """
+    Returns the shared matcher, compiling it from the client database on first use.
+
+    Returns:
+        KeywordMatcher: The matcher over all clients' keywords.
+    """
+    with _lock:
+        matcher = _matcher
+    if matcher is None:
+        matcher = build_client_matcher(load_clients())
+    return matcher
@@ -0,0 +1,547 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from ..config import METADATA_DB_FILE, METADATA_FILE, PROCESSED_PAGE_VERSIONS_PER_CLIENT
+
+logger = logging.getLogger(__name__)
+
+_connection: Optional[sqlite3.Connection] = None
+_lock = threading.RLock()
+
+def _get_connection() -> sqlite3.Connection:
+    """
+    Returns the metadata database connection, creating the schema and migrating
+    an existing metadata.json on first use.
+    """
+    global _connection
+    if _connection is None:
+        connection = sqlite3.connect(str(METADATA_DB_FILE), check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS pdfs (
+                pdf_id TEXT PRIMARY KEY,
+                publication_name TEXT,
+                edition TEXT,
+                date TEXT,
+                total_pages INTEGER NOT NULL DEFAULT 0,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_pdfs_date ON pdfs (date)")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_pdfs_publication ON pdfs (publication_name, date)")
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_pdfs_edition ON pdfs (edition, date)")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS client_page_hits (
+                client_name TEXT NOT NULL,
+                pdf_id TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                keywords TEXT NOT NULL,
+                PRIMARY KEY (client_name, pdf_id, page_number)
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_client_page_hits_pdf ON client_page_hits (pdf_id)")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS standing_results (
+                client_name TEXT NOT NULL,
+                pdf_id TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                retrieval INTEGER NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (client_name, pdf_id, page_number)
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_standing_results_pdf ON standing_results (pdf_id)")
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS processed_pages (
+                client_name TEXT NOT NULL,
+                pdf_id TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                query_version TEXT NOT NULL,
+                response TEXT NOT NULL,
+                processed_at REAL NOT NULL,
+                PRIMARY KEY (client_name, query_version, pdf_id, page_number)
+            )
+        """)
+        connection.execute("CREATE INDEX IF NOT EXISTS idx_processed_pages_pdf ON processed_pages (pdf_id)")
+        connection.commit()
+        _connection = connection
+        logger.info(f"Opened metadata store at {METADATA_DB_FILE}")
+        _migrate_json_metadata(connection)
+    return _connection
+
+def _migrate_json_metadata(connection: sqlite3.Connection) -> None:
+    """
+    Imports the records of a legacy metadata.json into an empty store and renames the file.
+    """
+    if not os.path.exists(METADATA_FILE):
+        return
+    if connection.execute("SELECT COUNT(*) FROM pdfs").fetchone()[0] > 0:
+        logger.warning(f"Metadata store is not empty, skipping migration of {METADATA_FILE}")
+        return
+    try:
+        with open(METADATA_FILE, 'r') as f:
+            metadata = json.load(f)
+    except json.JSONDecodeError:
+        logger.error(f"Error decoding {METADATA_FILE}, skipping migration")
+        return
+
+    pdfs = dict(metadata.get('pdfs', {}))
+    # Older files kept some PDF entries at the top level
+    for key, value in metadata.items():
+        if key != 'pdfs' and isinstance(value, dict) and 'publication_name' in value:
+            pdfs[key] = value
+
+    with connection:
+        for pdf_id, pdf_data in pdfs.items():
+            _upsert(connection, pdf_id, pdf_data)
+    os.replace(METADATA_FILE, f"{METADATA_FILE}.migrated")
+    logger.info(f"Migrated {len(pdfs)} PDFs from {METADATA_FILE} to the metadata store")
+
+def _upsert(connection: sqlite3.Connection, pdf_id: str, pdf_data: Dict[str, Any]) -> None:
+    """
+    Inserts or replaces a single PDF record without committing.
+    """
+    connection.execute(
+        """
+        INSERT OR REPLACE INTO pdfs (pdf_id, publication_name, edition, date, total_pages, data, created_at)
+        VALUES (?, ?, ?, ?, ?, ?, COALESCE((SELECT created_at FROM pdfs WHERE pdf_id = ?), ?))
+        """,
+        (
+            pdf_id,
+            pdf_data.get("publication_name"),
+            pdf_data.get("edition"),
+            pdf_data.get("date"),
+            pdf_data.get("total_pages", 0),
+            json.dumps(pdf_data),
+            pdf_id,
+            time.time()
+        )
+    )
+
+def put_pdf(pdf_id: str, pdf_data: Dict[str, Any]) -> None:
+    """
+    Inserts or replaces the metadata of a single PDF atomically.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        pdf_data (Dict[str, Any]): The metadata of the PDF.
+    """
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            _upsert(connection, pdf_id, pdf_data)
+
+def get_pdf(pdf_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the metadata of a single PDF.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+
+    Returns:
+        Optional[Dict[str, Any]]: The metadata, or None if the PDF is unknown.
+    """
+    with _lock:
+        row = _get_connection().execute("SELECT data FROM pdfs WHERE pdf_id = ?", (pdf_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+def delete_pdf(pdf_id: str) -> bool:
+    """
+    Deletes the metadata, client page hits, standing query results and processed page records
+    of a single PDF atomically.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+
+    Returns:
+        bool: True if a record was deleted.
+    """
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            deleted = connection.execute("DELETE FROM pdfs WHERE pdf_id = ?", (pdf_id,)).rowcount
+            connection.execute("DELETE FROM client_page_hits WHERE pdf_id = ?", (pdf_id,))
+            connection.execute("DELETE FROM standing_results WHERE pdf_id = ?", (pdf_id,))
+            connection.execute("DELETE FROM processed_pages WHERE pdf_id = ?", (pdf_id,))
+    return deleted > 0
+
+def get_all_pdfs() -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the metadata of every PDF, ordered by date.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The metadata of each PDF by PDF id.
+    """
+    with _lock:
+        rows = _get_connection().execute("SELECT pdf_id, data FROM pdfs ORDER BY date, created_at").fetchall()
+    return {pdf_id: json.loads(data) for pdf_id, data in rows}
+
+def find_pdfs(
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    publications: Optional[List[str]] = None,
+    editions: Optional[List[str]] = None,
+    pdf_ids: Optional[List[str]] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Returns the metadata of the PDFs matching all given filters, using the store's indexes.
+
+    Dates are compared as ISO strings (YYYY-MM-DD); empty filters match everything.
+
+    Args:
+        date_from (Optional[str]): The earliest publication date, inclusive.
+        date_to (Optional[str]): The latest publication date, inclusive.
+        publications (Optional[List[str]]): Publication names to include.
+        editions (Optional[List[str]]): Editions to include.
+        pdf_ids (Optional[List[str]]): PDF ids to include.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: The metadata of each matching PDF by PDF id, ordered by date.
+    """
+    clauses: List[str] = []
+    params: List[Any] = []
+    if date_from:
+        clauses.append("date >= ?")
+        params.append(date_from)
+    if date_to:
+        clauses.append("date <= ?")
+        params.append(date_to)
+    for column, values in (("publication_name", publications), ("edition", editions), ("pdf_id", pdf_ids)):
+        if values:
+            clauses.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            params.extend(values)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    with _lock:
+        rows = _get_connection().execute(
+            f"SELECT pdf_id, data FROM pdfs {where} ORDER BY date, created_at", params
+        ).fetchall()
+    return {pdf_id: json.loads(data) for pdf_id, data in rows}
+
+def replace_all_pdfs(pdfs: Dict[str, Dict[str, Any]]) -> None:
+    """
+    Replaces the whole store with the given records in one transaction.
+
+    Args:
+        pdfs (Dict[str, Dict[str, Any]]): The metadata of each PDF by PDF id.
+    """
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            existing = {row[0] for row in connection.execute("SELECT pdf_id FROM pdfs")}
+            for pdf_id in existing - set(pdfs):
+                connection.execute("DELETE FROM pdfs WHERE pdf_id = ?", (pdf_id,))
+            for pdf_id, pdf_data in pdfs.items():
+                _upsert(connection, pdf_id, pdf_data)
+
+def count_pdfs() -> int:
+    """
+    Returns the number of PDFs in the store.
+
+    Returns:
+        int: The PDF count.
+    """
+    with _lock:
+        return _get_connection().execute("SELECT COUNT(*) FROM pdfs").fetchone()[0]
+
+def put_pdf_client_hits(pdf_id: str, hits: Dict[str, Dict[int, List[str]]]) -> None:
+    """
+    Replaces the client page hits of a PDF in one transaction.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        hits (Dict[str, Dict[int, List[str]]]): The matched keywords of each page number by client name.
+    """
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            connection.execute("DELETE FROM client_page_hits WHERE pdf_id = ?", (pdf_id,))
+            connection.executemany(
+                "INSERT INTO client_page_hits (client_name, pdf_id, page_number, keywords) VALUES (?, ?, ?, ?)",
+                [
+                    (client_name, pdf_id, page_number, json.dumps(keywords))
+                    for client_name, pages in hits.items()
+                    for page_number, keywords in pages.items()
+                ]
+            )
+
+def put_client_hits(client_name: str, hits: Dict[str, Dict[int, List[str]]]) -> None:
+    """
+    Replaces the page hits of a client across all PDFs in one transaction.
+
+    Args:
+        client_name (str): The name of the client.
+        hits (Dict[str, Dict[int, List[str]]]): The matched keywords of each page number by PDF id.
+    """
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            connection.execute("DELETE FROM client_page_hits WHERE client_name = ?", (client_name,))
+            connection.executemany(
+                "INSERT INTO client_page_hits (client_name, pdf_id, page_number, keywords) VALUES (?, ?, ?, ?)",
+                [
+                    (client_name, pdf_id, page_number, json.dumps(keywords))
+                    for pdf_id, pages in hits.items()
+                    for page_number, keywords in pages.items()
+                ]
+            )
+
+def delete_client_hits(client_name: str) -> None:
+    """
+    Deletes the page hits of a client.
+
+    Args:
+        client_name (str): The name of the client.
+    """
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            connection.execute("DELETE FROM client_page_hits WHERE client_name = ?", (client_name,))
+
+def get_client_hits(
+    client_name: str,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Returns the pages a client's keywords were found on, newest editions first.
+
+    Args:
+        client_name (str): The name of the client.
+        date_from (Optional[str]): The earliest publication date, inclusive.
+        date_to (Optional[str]): The latest publication date, inclusive.
+
+    Returns:
+        List[Dict[str, Any]]: The PDF id, page number, matched keywords, publication name,
+            edition and date of each page.
+    """
+    sql = """
+        SELECT h.pdf_id, h.page_number, h.keywords, p.publication_name, p.edition, p.date
+        FROM client_page_hits h JOIN pdfs p ON p.pdf_id = h.pdf_id
+        WHERE h.client_name = ?
+    """
+    params: List[Any] = [client_name]
+    if date_from:
+        sql += " AND p.date >= ?"
+        params.append(date_from)
+    if date_to:
+        sql += " AND p.date <= ?"
+        params.append(date_to)
+    sql += " ORDER BY p.date DESC, p.created_at DESC, h.page_number"
+    with _lock:
+        rows = _get_connection().execute(sql, params).fetchall()
+    return [
+        {
+            "pdf_id": pdf_id,
+            "page_number": page_number,
+            "keywords": json.loads(keywords),
+            "publication_name": publication_name,
+            "edition": edition,
+            "date": date
+        }
+        for pdf_id, page_number, keywords, publication_name, edition, date in rows
+    ]
+
+def get_pdf_client_hits(pdf_id: str) -> Dict[str, Dict[int, List[str]]]:
+    """
+    Returns the client page hits of a PDF.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+
+    Returns:
+        Dict[str, Dict[int, List[str]]]: The matched keywords of each page number by client name.
+    """
+    with _lock:
+        rows = _get_connection().execute(
+            "SELECT client_name, page_number, keywords FROM client_page_hits WHERE pdf_id = ? "
+            "ORDER BY client_name, page_number",
+            (pdf_id,)
+        ).fetchall()
+    hits: Dict[str, Dict[int, List[str]]] = {}
+    for client_name, page_number, keywords in rows:
+        hits.setdefault(client_name, {})[page_number] = json.loads(keywords)
+    return hits
+
+def put_standing_results(client_name: str, pdf_id: str, responses: Dict[int, Dict[str, Any]]) -> None:
+    """
+    Replaces the standing query results of a client for a PDF in one transaction.
+
+    Args:
+        client_name (str): The name of the client.
+        pdf_id (str): The unique identifier of the PDF.
+        responses (Dict[int, Dict[str, Any]]): The page response of each analyzed page number.
+    """
+    created_at = time.time()
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            connection.execute(
+                "DELETE FROM standing_results WHERE client_name = ? AND pdf_id = ?", (client_name, pdf_id)
+            )
+            connection.executemany(
+                "INSERT INTO standing_results (client_name, pdf_id, page_number, retrieval, response, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        client_name, pdf_id, page_number,
+                        int(bool((response.get("first_response") or {}).get("retrieval"))),
+                        json.dumps(response), created_at
+                    )
+                    for page_number, response in responses.items()
+                ]
+            )
+
+def delete_standing_results(client_name: str) -> None:
+    """
+    Deletes the standing query results of a client.
+
+    Args:
+        client_name (str): The name of the client.
+    """
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            connection.execute("DELETE FROM standing_results WHERE client_name = ?", (client_name,))
+
+def get_standing_results(
+    client_name: str,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    retrieved_only: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Returns the standing query results of a client, newest editions first.
+
+    Args:
+        client_name (str): The name of the client.
+        date_from (Optional[str]): The earliest publication date, inclusive.
+        date_to (Optional[str]): The latest publication date, inclusive.
+        retrieved_only (bool, optional): Whether to return only the pages where a keyword was
+            found. Defaults to True.
+
+    Returns:
+        List[Dict[str, Any]]: The page response of each page, with its PDF id, page number,
+            publication name, edition, date and analysis time.
+    """
+    sql = """
+        SELECT r.pdf_id, r.page_number, r.response, r.created_at, p.publication_name, p.edition, p.date
+        FROM standing_results r JOIN pdfs p ON p.pdf_id = r.pdf_id
+        WHERE r.client_name = ?
+    """
+    params: List[Any] = [client_name]
+    if retrieved_only:
+        sql += " AND r.retrieval = 1"
+    if date_from:
+        sql += " AND p.date >= ?"
+        params.append(date_from)
+    if date_to:
+        sql += " AND p.date <= ?"
+        params.append(date_to)
+    sql += " ORDER BY p.date DESC, p.created_at DESC, r.page_number"
+    with _lock:
+        rows = _get_connection().execute(sql, params).fetchall()
+    return [
+        {
+            **json.loads(response),
+            "pdf_id": pdf_id,
+            "page_number": page_number,
+            "publication_name": publication_name,
+            "edition": edition,
+            "date": date,
+            "analyzed_at": created_at
+        }
+        for pdf_id, page_number, response, created_at, publication_name, edition, date in rows
+    ]
+
+def put_processed_pages(client_name: str, query_version: str, responses: Dict[str, Dict[int, Dict[str, Any]]]) -> None:
+    """
+    Records the pages a client's query has analyzed, replacing earlier records of the same
+    pages and query version.
+
+    Only the PROCESSED_PAGE_VERSIONS_PER_CLIENT most recently recorded query versions of the
+    client are kept.
+
+    Args:
+        client_name (str): The name of the client.
+        query_version (str): The version of the query, as built by build_query_version.
+        responses (Dict[str, Dict[int, Dict[str, Any]]]): The page response of each page number by PDF id.
+    """
+    processed_at = time.time()
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO processed_pages "
+                "(client_name, pdf_id, page_number, query_version, response, processed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (client_name, pdf_id, page_number, query_version, json.dumps(response), processed_at)
+                    for pdf_id, pages in responses.items()
+                    for page_number, response in pages.items()
+                ]
+            )
+            _prune_processed_versions(connection, client_name)
+
+def _prune_processed_versions(connection: sqlite3.Connection, client_name: str) -> None:
+    """
+    Deletes the records of a client's query versions beyond the PROCESSED_PAGE_VERSIONS_PER_CLIENT
+    most recently recorded ones, without committing.
+    """
+    connection.execute(
+        """
+        DELETE FROM processed_pages WHERE client_name = ? AND query_version NOT IN (
+            SELECT query_version FROM processed_pages WHERE client_name = ?
+            GROUP BY query_version ORDER BY MAX(processed_at) DESC LIMIT ?
+        )
+        """,
+        (client_name, client_name, PROCESSED_PAGE_VERSIONS_PER_CLIENT)
+    )
+
+def get_processed_pages(
+    client_name: str,
+    query_version: str,
+    pdf_ids: List[str]
+) -> Dict[str, Dict[int, Dict[str, Any]]]:
+    """
+    Returns the stored responses of the pages a client's query has already analyzed.
+
+    Args:
+        client_name (str): The name of the client.
+        query_version (str): The version of the query; records of other versions are ignored.
+        pdf_ids (List[str]): The PDFs to look up.
+
+    Returns:
+        Dict[str, Dict[int, Dict[str, Any]]]: The page response of each processed page number by PDF id.
+    """
+    if not pdf_ids:
+        return {}
+    with _lock:
+        rows = _get_connection().execute(
+            f"""
+            SELECT pdf_id, page_number, response FROM processed_pages
+            WHERE client_name = ? AND query_version = ? AND pdf_id IN ({', '.join('?' for _ in pdf_ids)})
+            """,
+            [client_name, query_version, *pdf_ids]
+        ).fetchall()
+    processed: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    for pdf_id, page_number, response in rows:
+        processed.setdefault(pdf_id, {})[page_number] = json.loads(response)
+    return processed
+
+def delete_processed_pages(client_name: str) -> None:
+    """
+    Deletes the processed page records of a client.
+
+    Args:
+        client_name (str): The name of the client.
+    """
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            connection.execute("DELETE FROM processed_pages WHERE client_name = ?", (client_name,))
@@ -1,65 +1,80 @@
 import asyncio
+import contextvars
 import logging
-from typing import List, Dict, Any
-from collections import deque
-from time import time
-from ..config import RATE_LIMIT_INTERVAL, BATCH_SIZE
-from ..models.gemini_model import model
-from aiolimiter import AsyncLimiter
+from typing import List, Any
+from ..config import (
+    RATE_LIMIT_INTERVAL, BATCH_SIZE, TOKENS_PER_MINUTE, MAX_IN_FLIGHT,
+    RATE_LIMIT_INTERVAL_PRO, BATCH_SIZE_PRO, TOKENS_PER_MINUTE_PRO, MAX_IN_FLIGHT_PRO,
+    GEMINI_MODEL_NAME, GEMINI_PRO_MODEL_NAME
+)
+from ..models.model_backend import create_model
+from .request_scheduler import RequestScheduler, PRIORITY_INTERACTIVE
 
 logger = logging.getLogger(__name__)
 
-# Global request queue
-request_queue: asyncio.Queue = asyncio.Queue()
+# Priority of the model requests made by the current task and the tasks it starts
+request_priority: contextvars.ContextVar[int] = contextvars.ContextVar("request_priority", default=PRIORITY_INTERACTIVE)
 
-# Rate limiter
-rate_limiter = AsyncLimiter(BATCH_SIZE, RATE_LIMIT_INTERVAL)
+# Scheduler for the first model (gemini-1.5-flash)
+flash_scheduler = RequestScheduler(
+    name=GEMINI_MODEL_NAME,
+    model=create_model(GEMINI_MODEL_NAME),
+    requests_per_minute=BATCH_SIZE * 60 / RATE_LIMIT_INTERVAL,
+    tokens_per_minute=TOKENS_PER_MINUTE,
+    max_in_flight=MAX_IN_FLIGHT
+)
 
-# Sliding window buffer
-request_buffer: deque = deque()
+# Scheduler for the second model (gemini-1.5-pro-latest)
+pro_scheduler = RequestScheduler(
+    name=GEMINI_PRO_MODEL_NAME,
+    model=create_model(GEMINI_PRO_MODEL_NAME),
+    requests_per_minute=BATCH_SIZE_PRO * 60 / RATE_LIMIT_INTERVAL_PRO,
+    tokens_per_minute=TOKENS_PER_MINUTE_PRO,
+    max_in_flight=MAX_IN_FLIGHT_PRO
+)
 
-async def request_worker() -> None:
-    while True:
-        current_time = time()
-        
-        # Remove expired requests from the buffer
-        while request_buffer and current_time - request_buffer[0] >= RATE_LIMIT_INTERVAL:
-            request_buffer.popleft()
-        
-        # Process as many requests as possible
-        available_slots = BATCH_SIZE - len(request_buffer)
-        if available_slots > 0:
-            batch = []
-            for _ in range(available_slots):
-                try:
-                    task = request_queue.get_nowait()
-                    batch.append(task)
-                except asyncio.QueueEmpty:
-                    break
-            
-            if batch:
-                await process_batch(batch)
-                current_time = time()
-                request_buffer.extend([current_time] * len(batch))
-        
-        # Wait a short time before checking again
-        await asyncio.sleep(0.1)
+def start_request_workers() -> None:
+    """
+    Starts the schedulers of both models.
+    """
+    flash_scheduler.start()
+    pro_scheduler.start()
 
-async def process_batch(batch: List[Dict[str, Any]]) -> None:
-    async with rate_limiter:
-        tasks = [process_request(task) for task in batch]
-        await asyncio.gather(*tasks)
+async def stop_request_workers() -> None:
+    """
+    Stops the schedulers of both models.
+    """
+    await asyncio.gather(flash_scheduler.stop(), pro_scheduler.stop())
 
-async def process_request(task: Dict[str, Any]) -> None:
-    content = task['content']
-    future = task['future']
-    try:
-        response = await model.generate_content_async(content)
-        future.set_result(response)
-    except Exception as e:
-        future.set_exception(e)
+def set_request_priority(priority: int) -> None:
+    """
+    Sets the priority of the model requests made by the current task and the tasks it starts.
+
+    Args:
+        priority (int): The request priority; lower values are dispatched first.
+    """
+    request_priority.set(priority)
 
 def add_request_to_queue(content: List[Any]) -> asyncio.Future:
-    future = asyncio.get_event_loop().create_future()
-    request_queue.put_nowait({'content': content, 'future': future})
-    return future
\ No newline at end of file
+    """
+    Queues a request for the first model at the current task's priority.
+
+    Args:
+        content (List[Any]): The content passed to generate_content_async.
+
+    Returns:
+        asyncio.Future: Resolves to the model response.
+    """
+    return flash_scheduler.submit(content, request_priority.get())
+
+def add_request_to_queue_pro(content: List[Any]) -> asyncio.Future:
+    """
+    Queues a request for the second model at the current task's priority.
+
+    Args:
+        content (List[Any]): The content passed to generate_content_async.
+
+    Returns:
+        asyncio.Future: Resolves to the model response.
+    """
+    return pro_scheduler.submit(content, request_priority.get())
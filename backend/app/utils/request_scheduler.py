@@ -0,0 +1,460 @@
+import asyncio
+import itertools
+import logging
+import random
+import re
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Set
+from google.api_core import exceptions as google_exceptions
+from ..config import (
+    RATE_LIMIT_DECREASE_FACTOR,
+    RATE_LIMIT_INCREASE_STEP,
+    RATE_LIMIT_MIN_FRACTION,
+    RATE_LIMIT_MAX_REQUEUES,
+    RATE_LIMIT_BACKOFF_BASE,
+    RATE_LIMIT_BACKOFF_MAX,
+    RATE_LIMIT_STATS_WINDOW
+)
+
+logger = logging.getLogger(__name__)
+
+# Approximate input tokens Gemini 1.5 charges per image
+IMAGE_TOKEN_ESTIMATE = 258
+
+# Approximate number of characters per text token
+CHARS_PER_TOKEN = 4
+
+# Request priorities; lower values are dispatched first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+class SchedulerStoppedError(RuntimeError):
+    """
+    Set on the requests that were still queued or in flight when their scheduler stopped.
+    """
+
+def estimate_tokens(content: List[Any]) -> int:
+    """
+    Estimates the input tokens of a generate_content request.
+
+    Args:
+        content (List[Any]): The request content: text parts and image parts
+            (dictionaries with "mime_type" and "data").
+
+    Returns:
+        int: The estimated token count.
+    """
+    tokens = 0
+    for part in content:
+        if isinstance(part, dict) and "mime_type" in part:
+            tokens += IMAGE_TOKEN_ESTIMATE
+        else:
+            tokens += len(str(part)) // CHARS_PER_TOKEN
+    return max(1, tokens)
+
+def is_quota_error(error: Exception) -> bool:
+    """
+    Tells whether an exception from the model signals throttling (HTTP 429 / ResourceExhausted).
+
+    Args:
+        error (Exception): The exception raised by generate_content_async.
+
+    Returns:
+        bool: True for quota and rate-limit errors.
+    """
+    if isinstance(error, (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)):
+        return True
+    # Error messages are not inspected, since page ids and numbers may contain "429"
+    return getattr(error, "code", None) == 429
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Extracts the retry delay suggested by a quota error, if any.
+
+    Looks at RetryInfo details, a Retry-After response header and the usual
+    textual hints ("retry_delay { seconds: N }", "retry in N s").
+
+    Args:
+        error (Exception): The quota error.
+
+    Returns:
+        Optional[float]: The suggested delay in seconds, or None.
+    """
+    for detail in getattr(error, "details", None) or []:
+        retry_delay = getattr(detail, "retry_delay", None)
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+
+    response = getattr(error, "response", None)
+    header = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+
+    message = str(error)
+    match = re.search(r"retry_delay\s*\{\s*seconds:\s*(\d+)", message) or re.search(r"retry in ([\d.]+)\s*s", message, re.IGNORECASE)
+    return float(match.group(1)) if match else None
+
+class TokenBucket:
+    """
+    An asyncio token bucket: `rate_per_minute` tokens are added continuously up to `capacity`.
+
+    Waiters are served in FIFO order and sleep exactly until enough tokens are available,
+    so no polling is involved.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Initializes a full bucket.
+
+        Args:
+            rate_per_minute (float): The refill rate in tokens per minute.
+            capacity (Optional[float]): The maximum burst size. Defaults to one minute of tokens.
+        """
+        self.rate_per_minute: float = rate_per_minute
+        self.capacity: float = capacity if capacity is not None else rate_per_minute
+        self.tokens: float = self.capacity
+        self.updated_at: float = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        """
+        Adds the tokens accumulated since the last update.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_minute / 60)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1) -> None:
+        """
+        Waits until `amount` tokens are available and takes them.
+
+        Requests larger than the capacity are capped to the capacity so they can proceed.
+
+        Args:
+            amount (float, optional): The number of tokens to take. Defaults to 1.
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) * 60 / self.rate_per_minute)
+
+    def set_rate(self, rate_per_minute: float) -> None:
+        """
+        Changes the refill rate; the capacity follows the rate (one minute of tokens).
+
+        Args:
+            rate_per_minute (float): The new refill rate in tokens per minute.
+        """
+        self._refill()
+        self.rate_per_minute = rate_per_minute
+        self.capacity = max(1.0, rate_per_minute)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Empties the bucket so that the next token becomes available only after `seconds`.
+
+        Args:
+            seconds (float): The pause length.
+        """
+        self._refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate_per_minute / 60)
+
+    def adjust(self, amount: float) -> None:
+        """
+        Takes (or returns, if negative) tokens without waiting, e.g. to settle an estimate.
+
+        The balance may go negative, which delays later acquisitions accordingly.
+
+        Args:
+            amount (float): The number of tokens to take.
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+class RequestScheduler:
+    """
+    Rate-limited dispatcher of generate_content requests for one model.
+
+    Requests are taken from a priority queue as soon as they arrive and sent when a request
+    token, enough tokens-per-minute budget and an in-flight slot are available; interactive
+    requests go ahead of queued background work, and requests of the same priority are
+    served in FIFO order. Each request is
+    dispatched on its own, so a slow response never holds back the rest of the queue.
+
+    Quota errors (429 / ResourceExhausted) are not passed to the caller straight away: the
+    request is requeued after a jittered backoff (or the server's retry-after hint), and the
+    request rate adapts AIMD-style: it is multiplied by RATE_LIMIT_DECREASE_FACTOR on every
+    throttle and regains RATE_LIMIT_INCREASE_STEP requests per minute for every minute's
+    worth of successful requests, up to the configured quota.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: Any,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_in_flight: int
+    ):
+        """
+        Initializes the scheduler.
+
+        Args:
+            name (str): The name used in logs and statistics.
+            model (Any): The model, which must provide `generate_content_async`.
+            requests_per_minute (float): The requests-per-minute quota.
+            tokens_per_minute (float): The tokens-per-minute quota.
+            max_in_flight (int): The maximum number of concurrent requests.
+        """
+        self.name: str = name
+        self.model: Any = model
+        self.max_in_flight: int = max_in_flight
+        self.max_requests_per_minute: float = requests_per_minute
+        self.min_requests_per_minute: float = requests_per_minute * RATE_LIMIT_MIN_FRACTION
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._sequence = itertools.count()
+        self._queued_background: int = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._in_flight: int = 0
+        self._worker: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        # Futures of the requests not resolved yet, whether queued, in flight or waiting to be requeued
+        self._pending: Set[asyncio.Future] = set()
+        self.completed: int = 0
+        self.failed: int = 0
+        self.throttled: int = 0
+        self.requeued: int = 0
+        # Time requests spent queued before dispatch and waiting for the model, over all attempts
+        self.queue_wait_seconds: float = 0.0
+        self.model_seconds: float = 0.0
+        self.dispatched: int = 0
+        self.last_throttle_at: Optional[float] = None
+        self.last_retry_after: Optional[float] = None
+        # (timestamp, throttled) outcome of recent requests
+        self._outcomes: deque = deque()
+
+    def submit(self, content: List[Any], priority: int = PRIORITY_INTERACTIVE) -> asyncio.Future:
+        """
+        Queues a request.
+
+        Args:
+            content (List[Any]): The content passed to `generate_content_async`.
+            priority (int, optional): The request priority; lower values are dispatched first.
+                Defaults to PRIORITY_INTERACTIVE.
+
+        Returns:
+            asyncio.Future: Resolves to the model response, or raises the model's exception.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
+        self._enqueue({
+            'content': content,
+            'future': future,
+            'tokens': estimate_tokens(content),
+            'priority': priority,
+            'enqueued_at': time.monotonic(),
+            'attempts': 0
+        })
+        return future
+
+    def _enqueue(self, task: Dict[str, Any]) -> None:
+        """
+        Puts a request in the queue behind the requests of the same or a higher priority.
+        """
+        if task['priority'] > PRIORITY_INTERACTIVE:
+            self._queued_background += 1
+        task['queued_at'] = time.monotonic()
+        self.queue.put_nowait((task['priority'], next(self._sequence), task))
+
+    def start(self) -> None:
+        """
+        Starts the dispatch loop on the running event loop.
+        """
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+            logger.info(f"Request scheduler {self.name} started")
+
+    async def stop(self) -> None:
+        """
+        Stops the dispatch loop and cancels the requests in flight.
+
+        The requests still queued, in flight or waiting to be requeued fail with
+        SchedulerStoppedError, so their callers do not wait forever.
+        """
+        tasks = [t for t in [self._worker, *self._tasks] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker = None
+
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+        self._queued_background = 0
+        for future in list(self._pending):
+            if not future.done():
+                future.set_exception(SchedulerStoppedError(f"Request scheduler {self.name} stopped"))
+        logger.info(f"Request scheduler {self.name} stopped")
+
+    async def _run(self) -> None:
+        """
+        Takes requests from the queue and dispatches them within the limits.
+        """
+        while True:
+            priority, _, task = await self.queue.get()
+            if priority > PRIORITY_INTERACTIVE:
+                self._queued_background -= 1
+            if task['future'].done():
+                # The caller gave up (e.g. the query was cancelled)
+                self.queue.task_done()
+                continue
+
+            await self._slots.acquire()
+            await self.request_bucket.acquire(1)
+            await self.token_bucket.acquire(task['tokens'])
+            if task['future'].done():
+                self._slots.release()
+                self.queue.task_done()
+                continue
+
+            dispatch = asyncio.create_task(self._dispatch(task))
+            self._tasks.add(dispatch)
+            dispatch.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, task: Dict[str, Any]) -> None:
+        """
+        Sends a single request and resolves its future, requeueing it on quota errors.
+        """
+        future = task['future']
+        self._in_flight += 1
+        self.dispatched += 1
+        started_at = time.monotonic()
+        self.queue_wait_seconds += started_at - task['queued_at']
+        try:
+            response = await self.model.generate_content_async(task['content'])
+            self._settle_tokens(task, response)
+            self._record_success()
+            self.completed += 1
+            if not future.done():
+                future.set_result(response)
+        except Exception as e:
+            if is_quota_error(e):
+                self._record_throttle(e)
+                if task['attempts'] < RATE_LIMIT_MAX_REQUEUES and not future.done():
+                    self._schedule_requeue(task, e)
+                    return
+            self.failed += 1
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            self.model_seconds += time.monotonic() - started_at
+            self._in_flight -= 1
+            self._slots.release()
+            self.queue.task_done()
+
+    def _record_success(self) -> None:
+        """
+        Records a successful request and raises the request rate additively.
+        """
+        self._record_outcome(False)
+        current = self.request_bucket.rate_per_minute
+        if current < self.max_requests_per_minute:
+            self.request_bucket.set_rate(min(self.max_requests_per_minute, current + RATE_LIMIT_INCREASE_STEP / current))
+
+    def _record_throttle(self, error: Exception) -> None:
+        """
+        Records a quota error, lowers the request rate multiplicatively and honours the retry-after hint.
+        """
+        self._record_outcome(True)
+        self.throttled += 1
+        self.last_throttle_at = time.time()
+        self.last_retry_after = get_retry_after(error)
+
+        new_rate = max(self.min_requests_per_minute, self.request_bucket.rate_per_minute * RATE_LIMIT_DECREASE_FACTOR)
+        self.request_bucket.set_rate(new_rate)
+        if self.last_retry_after:
+            self.request_bucket.pause(self.last_retry_after)
+        logger.warning(
+            f"Request scheduler {self.name} throttled by the model: rate lowered to {new_rate:.2f} requests/minute"
+            f" (retry after: {self.last_retry_after})"
+        )
+
+    def _record_outcome(self, throttled: bool) -> None:
+        """
+        Appends a request outcome and drops those older than RATE_LIMIT_STATS_WINDOW.
+        """
+        now = time.monotonic()
+        self._outcomes.append((now, throttled))
+        while self._outcomes and now - self._outcomes[0][0] > RATE_LIMIT_STATS_WINDOW:
+            self._outcomes.popleft()
+
+    def _schedule_requeue(self, task: Dict[str, Any], error: Exception) -> None:
+        """
+        Puts a throttled request back in the queue after a jittered exponential backoff.
+        """
+        task['attempts'] += 1
+        self.requeued += 1
+        backoff = min(RATE_LIMIT_BACKOFF_MAX, RATE_LIMIT_BACKOFF_BASE * 2 ** (task['attempts'] - 1))
+        delay = max(get_retry_after(error) or 0, random.uniform(backoff / 2, backoff))
+        logger.info(f"Request scheduler {self.name}: requeueing throttled request in {delay:.1f}s (attempt {task['attempts']})")
+
+        async def requeue() -> None:
+            await asyncio.sleep(delay)
+            self._enqueue(task)
+
+        requeue_task = asyncio.create_task(requeue())
+        self._tasks.add(requeue_task)
+        requeue_task.add_done_callback(self._tasks.discard)
+
+    def _settle_tokens(self, task: Dict[str, Any], response: Any) -> None:
+        """
+        Charges the difference between the estimated and the reported token usage.
+        """
+        usage = getattr(response, "usage_metadata", None)
+        total_tokens = getattr(usage, "total_token_count", None)
+        if isinstance(total_tokens, int) and total_tokens > 0:
+            self.token_bucket.adjust(total_tokens - task['tokens'])
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Returns the scheduler's limits and counters.
+
+        Returns:
+            Dict[str, Any]: Queue length (and how much of it is background work), requests in flight, current and configured quotas,
+                completion and throttle counters, the throttle rate over the stats window, and the mean
+                time a dispatched request spent queued and waiting for the model.
+        """
+        throttles_in_window = sum(1 for _, throttled in self._outcomes if throttled)
+        return {
+            "name": self.name,
+            "queued": self.queue.qsize(),
+            "queued_background": self._queued_background,
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "requests_per_minute": round(self.request_bucket.rate_per_minute, 3),
+            "max_requests_per_minute": self.max_requests_per_minute,
+            "tokens_per_minute": self.token_bucket.rate_per_minute,
+            "completed": self.completed,
+            "failed": self.failed,
+            "throttled": self.throttled,
+            "requeued": self.requeued,
+            "throttle_rate": round(throttles_in_window / len(self._outcomes), 3) if self._outcomes else 0.0,
+            "stats_window_seconds": RATE_LIMIT_STATS_WINDOW,
+            "last_throttle_at": self.last_throttle_at,
+            "last_retry_after": self.last_retry_after,
+            "dispatched": self.dispatched,
+            "mean_queue_wait_seconds": round(self.queue_wait_seconds / self.dispatched, 4) if self.dispatched else 0.0,
+            "mean_model_seconds": round(self.model_seconds / self.dispatched, 4) if self.dispatched else 0.0
+        }
@@ -0,0 +1,390 @@
+import json
+import logging
+import re
+import threading
+from typing import Dict, Any, List, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from ..models.response_schema import LayerOneResponse, KeywordArticles, Article, LayerTwoResponse, KeywordValidation
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional, the standard library parser is used without it
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Markdown code fences around a JSON answer, e.g. ```json ... ```
+FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)\s*```", re.DOTALL)
+
+# Commas directly before a closing bracket, which JSON does not allow
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+
+class ResponseParseError(ValueError):
+    """
+    Raised when a model answer cannot be parsed or salvaged.
+    """
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Dict[str, int]] = {}
+
+def _record(layer: str, outcome: str) -> None:
+    """
+    Counts a parse outcome of a layer.
+    """
+    with _stats_lock:
+        counters = _stats.setdefault(layer, {})
+        counters[outcome] = counters.get(outcome, 0) + 1
+
+def _loads(text: str) -> Any:
+    """
+    Parses JSON with orjson when available.
+    """
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+def close_truncated_json(text: str) -> str:
+    """
+    Closes the open string, objects and arrays of a truncated JSON text.
+
+    Args:
+        text (str): The truncated JSON text.
+
+    Returns:
+        str: The text followed by the missing quote and closing brackets.
+    """
+    closers: List[str] = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]" and closers:
+            closers.pop()
+    return text + ('"' if in_string else "") + "".join(reversed(closers))
+
+def drop_incomplete_tail(text: str) -> str:
+    """
+    Cuts a truncated JSON text back to its last complete element.
+
+    The outermost list item left open by the truncation is dropped with everything in it,
+    so no partial object or string is kept; without one, the trailing member or item of
+    the innermost open object or list is dropped unless it is a closed object or list.
+
+    Args:
+        text (str): The JSON text, starting at its opening bracket.
+
+    Returns:
+        str: The text up to its last complete element, or up to the end of its first value
+            when that value is complete.
+    """
+    # Each open object or list, with the start of its current item and the end of its last closed child
+    frames: List[List[Any]] = []
+    in_string = False
+    escaped = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            frames.append([char, index + 1, -1])
+        elif char in "}]" and frames:
+            frames.pop()
+            if not frames:
+                return text[:index + 1]
+            frames[-1][2] = index + 1
+        elif char == "," and frames:
+            frames[-1][1] = index + 1
+
+    if not frames:
+        return text
+    for depth in range(1, len(frames)):
+        if frames[depth - 1][0] == "[":
+            return text[:frames[depth - 1][1]]
+    _, item_start, closed_end = frames[-1]
+    if closed_end > item_start and not text[closed_end:].strip():
+        return text
+    return text[:item_start]
+
+def repair_json(text: str) -> Any:
+    """
+    Parses a truncated or slightly malformed JSON text.
+
+    The text is cut back to its last complete element, its open brackets are closed and
+    trailing commas are removed. Elements cut off mid-value are dropped rather than closed,
+    so an answer cut off inside a summary does not come back with the partial summary.
+
+    Args:
+        text (str): The JSON text, starting at its opening bracket.
+
+    Returns:
+        Any: The parsed value.
+
+    Raises:
+        ResponseParseError: If the text cannot be repaired.
+    """
+    candidate = drop_incomplete_tail(text).rstrip().rstrip(",")
+    try:
+        return _loads(TRAILING_COMMA_PATTERN.sub(r"\1", close_truncated_json(candidate)))
+    except ValueError:
+        raise ResponseParseError("JSON could not be repaired")
+
+def load_json(text: str) -> Tuple[Any, str]:
+    """
+    Parses a model answer that should be JSON, tolerating the usual deviations.
+
+    The answer is parsed as is first; then without markdown fences; then from its first
+    opening bracket to its last closing bracket, which drops surrounding prose; and
+    finally with truncated-JSON repair.
+
+    Args:
+        text (str): The model answer.
+
+    Returns:
+        Tuple[Any, str]: The parsed value and how it was obtained: "strict", "fenced",
+            "extracted" or "repaired".
+
+    Raises:
+        ResponseParseError: If the answer holds no recoverable JSON.
+    """
+    try:
+        return _loads(text), "strict"
+    except ValueError:
+        pass
+
+    fence = FENCE_PATTERN.search(text)
+    if fence:
+        try:
+            return _loads(fence.group(1)), "fenced"
+        except ValueError:
+            pass
+
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    if not starts:
+        raise ResponseParseError("No JSON found in the response")
+    start = min(starts)
+    end = max(text.rfind("}"), text.rfind("]"))
+    if end > start:
+        try:
+            return _loads(text[start:end + 1]), "extracted"
+        except ValueError:
+            pass
+
+    # Unterminated fences are common in truncated answers
+    body = text[start:]
+    if "```" in body:
+        body = body[:body.index("```")]
+    return repair_json(body), "repaired"
+
+def _validate_items(items: Any, model: Type[BaseModel]) -> Tuple[List[BaseModel], bool]:
+    """
+    Validates the items of a list, dropping the invalid ones.
+
+    Returns:
+        Tuple[List[BaseModel], bool]: The valid items and whether any item was dropped.
+    """
+    if not isinstance(items, list):
+        return [], items is not None
+    valid = []
+    for item in items:
+        try:
+            valid.append(model.model_validate(item))
+        except ValidationError:
+            pass
+    return valid, len(valid) < len(items)
+
+def coerce_layer_one(data: Any) -> Tuple[Dict[str, Any], bool]:
+    """
+    Fits a parsed layer one answer to the layer one schema, keeping every valid part.
+
+    Invalid keyword entries and articles are dropped, and a missing or invalid "retrieval"
+    is inferred from the remaining keywords. Fields the schema does not declare are kept.
+
+    Args:
+        data (Any): The parsed answer.
+
+    Returns:
+        Tuple[Dict[str, Any], bool]: The answer and whether anything had to be salvaged.
+
+    Raises:
+        ResponseParseError: If the answer is not a JSON object.
+    """
+    if not isinstance(data, dict):
+        raise ResponseParseError("Layer one response is not a JSON object")
+    try:
+        return LayerOneResponse.model_validate(data).model_dump(), False
+    except ValidationError:
+        pass
+
+    keywords: List[KeywordArticles] = []
+    raw_keywords = data.get("keywords")
+    for entry in raw_keywords if isinstance(raw_keywords, list) else []:
+        if not isinstance(entry, dict) or not isinstance(entry.get("keyword"), str):
+            continue
+        articles, _ = _validate_items(entry.get("articles"), Article)
+        keywords.append(KeywordArticles.model_validate({**entry, "articles": articles}))
+    retrieval = data.get("retrieval")
+    if not isinstance(retrieval, bool):
+        retrieval = any(keyword.articles for keyword in keywords)
+    return LayerOneResponse.model_validate({**data, "retrieval": retrieval, "keywords": keywords}).model_dump(), True
+
+def coerce_layer_two(data: Any) -> Tuple[Dict[str, Any], bool]:
+    """
+    Fits a parsed layer two answer to the layer two schema, keeping every valid validation.
+
+    A bare list is taken as the list of keyword validations, and invalid entries are dropped.
+    Fields the schema does not declare are kept.
+
+    Args:
+        data (Any): The parsed answer.
+
+    Returns:
+        Tuple[Dict[str, Any], bool]: The answer and whether anything had to be salvaged.
+
+    Raises:
+        ResponseParseError: If the answer holds no keyword validations.
+    """
+    if isinstance(data, list):
+        data = {"keyword_validation": data}
+        salvaged = True
+    elif isinstance(data, dict):
+        salvaged = False
+    else:
+        raise ResponseParseError("Layer two response is not a JSON object")
+    try:
+        return LayerTwoResponse.model_validate(data).model_dump(), salvaged
+    except ValidationError:
+        pass
+
+    validations, _ = _validate_items(data.get("keyword_validation"), KeywordValidation)
+    return LayerTwoResponse.model_validate({**data, "keyword_validation": validations}).model_dump(), True
+
+def _parse(text: str, layer: str, coerce: Any) -> Tuple[Dict[str, Any], bool]:
+    """
+    Parses and coerces a single-page answer, counting the outcome.
+    """
+    try:
+        data, method = load_json(text)
+        result, schema_salvaged = coerce(data)
+    except ResponseParseError:
+        _record(layer, "failed")
+        raise
+    _record(layer, method)
+    if schema_salvaged:
+        _record(layer, "schema_salvaged")
+    if method != "strict" or schema_salvaged:
+        _record(layer, "salvaged")
+        logger.info(f"Salvaged {layer} response (parse: {method}, schema salvaged: {schema_salvaged})")
+    return result, method == "repaired"
+
+def parse_layer_one_response(text: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Parses the answer of the first LLM layer for one page.
+
+    Args:
+        text (str): The model answer.
+
+    Returns:
+        Tuple[Dict[str, Any], bool]: The answer, fitted to the layer one schema, and whether
+            it was truncated, in which case it holds only the elements before the cut.
+
+    Raises:
+        ResponseParseError: If the answer cannot be parsed or salvaged.
+    """
+    return _parse(text, "layer_one", coerce_layer_one)
+
+def parse_layer_two_response(text: str) -> Tuple[Dict[str, Any], bool]:
+    """
+    Parses the answer of the second LLM layer for one page.
+
+    Args:
+        text (str): The model answer.
+
+    Returns:
+        Tuple[Dict[str, Any], bool]: The answer, fitted to the layer two schema, and whether
+            it was truncated, in which case it holds only the elements before the cut.
+
+    Raises:
+        ResponseParseError: If the answer cannot be parsed or salvaged.
+    """
+    return _parse(text, "layer_two", coerce_layer_two)
+
+def parse_packed_response(text: str, key_field: str, layer: str) -> List[Tuple[Any, Dict[str, Any]]]:
+    """
+    Parses an answer covering several pages, of the form {"pages": [{key_field: ..., ...}]}.
+
+    Entries without a key or that cannot be fitted to the layer's schema are skipped.
+
+    Args:
+        text (str): The model answer.
+        key_field (str): The field identifying the page of each entry ("page" or "entry").
+        layer (str): "layer_one" or "layer_two".
+
+    Returns:
+        List[Tuple[Any, Dict[str, Any]]]: The key and the schema-fitted answer of each entry.
+
+    Raises:
+        ResponseParseError: If the answer holds no list of pages.
+    """
+    packed_layer = f"{layer}_packed"
+    try:
+        data, method = load_json(text)
+    except ResponseParseError:
+        _record(packed_layer, "failed")
+        raise
+    entries = data.get("pages") if isinstance(data, dict) else data
+    if not isinstance(entries, list):
+        _record(packed_layer, "failed")
+        raise ResponseParseError("Packed response holds no list of pages")
+    _record(packed_layer, method)
+
+    coerce = coerce_layer_one if layer == "layer_one" else coerce_layer_two
+    results = []
+    salvaged = method != "strict"
+    for entry in entries:
+        if not isinstance(entry, dict) or key_field not in entry:
+            continue
+        key = entry.pop(key_field)
+        try:
+            result, schema_salvaged = coerce(entry)
+        except ResponseParseError:
+            continue
+        if schema_salvaged:
+            _record(packed_layer, "schema_salvaged")
+            salvaged = True
+        results.append((key, result))
+    if salvaged:
+        _record(packed_layer, "salvaged")
+    return results
+
+def get_parsing_stats() -> Dict[str, Any]:
+    """
+    Returns the parse outcome counters of each layer.
+
+    Returns:
+        Dict[str, Any]: The JSON parser in use and, for each layer, the number of answers parsed
+            strictly, from fences, from surrounding text and by truncation repair, fitted to the
+            schema, salvaged in any way and failed, and the share of answers salvaged.
+    """
+    with _stats_lock:
+        stats = {layer: dict(counters) for layer, counters in _stats.items()}
+    for counters in stats.values():
+        parsed = sum(counters.get(method, 0) for method in ("strict", "fenced", "extracted", "repaired"))
+        total = parsed + counters.get("failed", 0)
+        counters["salvage_rate"] = round(counters.get("salvaged", 0) / total, 4) if total else 0.0
+    return {"json_parser": "orjson" if orjson is not None else "json", "layers": stats}
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, List, Optional
+from ..config import RESULT_CACHE_FILE, RESULT_CACHE_MAX_ENTRIES, RESULT_CACHE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Number of writes between two eviction passes
+EVICTION_INTERVAL = 100
+
+_connection: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+_writes_since_eviction = 0
+
+def _get_connection() -> sqlite3.Connection:
+    """
+    Returns the cache database connection, creating the database if needed.
+    """
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(str(RESULT_CACHE_FILE), check_same_thread=False)
+        _connection.execute("PRAGMA journal_mode=WAL")
+        _connection.execute("""
+            CREATE TABLE IF NOT EXISTS page_results (
+                cache_key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        _connection.execute("CREATE INDEX IF NOT EXISTS idx_page_results_accessed ON page_results (accessed_at)")
+        _connection.commit()
+        logger.info(f"Opened result cache at {RESULT_CACHE_FILE}")
+    return _connection
+
+def make_cache_key(image_hashes: List[str], prompts: List[str], query: str, model_names: List[str]) -> str:
+    """
+    Builds the cache key of a page analysis.
+
+    Args:
+        image_hashes (List[str]): Checksums of the images sent for the page.
+        prompts (List[str]): The system prompts and page context sent with the images.
+        query (str): The full query string.
+        model_names (List[str]): The names of the models that produce the result.
+
+    Returns:
+        str: The hex SHA-256 digest identifying the analysis.
+    """
+    payload = json.dumps([image_hashes, prompts, query, model_names], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get_cached_result(cache_key: str) -> Optional[Dict[str, Any]]:
+    """
+    Looks up a cached page analysis.
+
+    Args:
+        cache_key (str): The key built by make_cache_key.
+
+    Returns:
+        Optional[Dict[str, Any]]: The cached result, or None on a miss or an expired entry.
+    """
+    now = time.time()
+    try:
+        with _lock:
+            connection = _get_connection()
+            row = connection.execute(
+                "SELECT result FROM page_results WHERE cache_key = ? AND created_at >= ?",
+                (cache_key, now - RESULT_CACHE_TTL_SECONDS)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE page_results SET accessed_at = ? WHERE cache_key = ?", (now, cache_key))
+            connection.commit()
+        return json.loads(row[0])
+    except Exception as e:
+        logger.error(f"Result cache lookup failed: {str(e)}")
+        return None
+
+def store_result(cache_key: str, result: Dict[str, Any]) -> None:
+    """
+    Stores a page analysis in the cache, evicting old entries periodically.
+
+    Args:
+        cache_key (str): The key built by make_cache_key.
+        result (Dict[str, Any]): The result to cache.
+    """
+    global _writes_since_eviction
+    now = time.time()
+    try:
+        with _lock:
+            connection = _get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO page_results (cache_key, result, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (cache_key, json.dumps(result), now, now)
+            )
+            connection.commit()
+            _writes_since_eviction += 1
+            if _writes_since_eviction >= EVICTION_INTERVAL:
+                _evict(connection, now)
+                _writes_since_eviction = 0
+    except Exception as e:
+        logger.error(f"Result cache write failed: {str(e)}")
+
+def _evict(connection: sqlite3.Connection, now: float) -> None:
+    """
+    Removes expired entries and trims the cache to RESULT_CACHE_MAX_ENTRIES, least recently used first.
+    """
+    expired = connection.execute(
+        "DELETE FROM page_results WHERE created_at < ?", (now - RESULT_CACHE_TTL_SECONDS,)
+    ).rowcount
+    trimmed = connection.execute("""
+        DELETE FROM page_results WHERE cache_key IN (
+            SELECT cache_key FROM page_results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+        )
+    """, (RESULT_CACHE_MAX_ENTRIES,)).rowcount
+    connection.commit()
+    if expired or trimmed:
+        logger.info(f"Result cache eviction removed {expired} expired and {trimmed} least recently used entries")
+
+def evict_results() -> None:
+    """
+    Runs an eviction pass over the result cache.
+    """
+    try:
+        with _lock:
+            _evict(_get_connection(), time.time())
+    except Exception as e:
+        logger.error(f"Result cache eviction failed: {str(e)}")
@@ -1,7 +1,18 @@
 import asyncio
 import logging
+import math
+import random
+import time
 from typing import List, Dict, Any, Tuple
 from ..services.page_processor import process_page
+from ..config import (
+    QUERY_RETRY_MAX_ATTEMPTS,
+    QUERY_RETRY_BUDGET_RATIO,
+    QUERY_RETRY_BUDGET_MIN,
+    QUERY_RETRY_BACKOFF_BASE,
+    QUERY_RETRY_BACKOFF_MAX,
+    QUERY_DEADLINE_SECONDS
+)
 
 logger = logging.getLogger(__name__)
 
@@ -32,44 +43,112 @@ def identify_failed_responses(responses: List[Dict[str, Any]]) -> Tuple[List[Dic
 
     return valid_responses, failed_responses
 
-async def retry_failed_responses(failed_responses: List[Dict[str, Any]], query: str, client_name: str) -> List[Dict[str, Any]]:
+class RetryBudget:
     """
-    Retries processing for failed responses.
+    Retry allowance and deadline shared by all pages of one query.
+    """
+
+    def __init__(self, max_retries: int, deadline_seconds: float):
+        """
+        Initializes the budget.
+
+        Args:
+            max_retries (int): The total number of page retries allowed for the query.
+            deadline_seconds (float): Time after which no further retries are started.
+        """
+        self.max_retries: int = max_retries
+        self.retries_used: int = 0
+        self.deadline: float = time.monotonic() + deadline_seconds
+
+    @classmethod
+    def for_pages(cls, page_count: int) -> "RetryBudget":
+        """
+        Creates the budget of a query over the given number of pages.
+
+        Args:
+            page_count (int): The number of pages in the query.
+
+        Returns:
+            RetryBudget: A budget of QUERY_RETRY_BUDGET_RATIO retries per page (at least
+                QUERY_RETRY_BUDGET_MIN) and a deadline of QUERY_DEADLINE_SECONDS.
+        """
+        max_retries = max(QUERY_RETRY_BUDGET_MIN, math.ceil(page_count * QUERY_RETRY_BUDGET_RATIO))
+        return cls(max_retries, QUERY_DEADLINE_SECONDS)
+
+    def remaining_time(self) -> float:
+        """
+        Returns the time left until the deadline, in seconds.
+        """
+        return self.deadline - time.monotonic()
+
+    def try_consume(self) -> bool:
+        """
+        Takes one retry from the budget.
+
+        Returns:
+            bool: False if the budget is exhausted.
+        """
+        if self.retries_used >= self.max_retries:
+            return False
+        self.retries_used += 1
+        return True
+
+def get_retry_delay(attempt: int) -> float:
+    """
+    Returns the jittered exponential backoff before a retry.
 
     Args:
-        failed_responses (List[Dict[str, Any]]): A list of failed response dictionaries to be retried.
-        query (str): The query string used for processing.
-        client_name (str): The name of the client for whom the processing is being done.
+        attempt (int): The retry number, starting at 1.
 
     Returns:
-        List[Dict[str, Any]]: A list of retried response dictionaries.
+        float: The delay in seconds, drawn uniformly from [cap / 2, cap] where
+            cap = QUERY_RETRY_BACKOFF_BASE * 2^(attempt - 1), bounded by QUERY_RETRY_BACKOFF_MAX.
     """
-    logger.info(f"Retrying {len(failed_responses)} failed responses")
-    retried_responses = []
-
-    for response in failed_responses:
-        if 'page_id' not in response or 'pdf_data' not in response:
-            logger.error(f"Invalid response structure: {response}")
-            continue
-
-        page_id = response['page_id']
-        pdf_data = response.get('pdf_data', {})
-        page_number = int(page_id.split('_')[-1])
-        page = {
-            'id': page_id,
-            'number': page_number,
-            'pdf_data': pdf_data
-        }
-
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                retried_response = await process_page(page, pdf_data, query, client_name)
-                retried_responses.append(retried_response)
-                break  # Exit the retry loop on success
-            except Exception as e:
-                logger.error(f"Error retrying page {page['id']} (Attempt {attempt + 1}): {str(e)}")
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(5)  # Wait before retrying
-
-    return retried_responses
\ No newline at end of file
+    cap = min(QUERY_RETRY_BACKOFF_MAX, QUERY_RETRY_BACKOFF_BASE * 2 ** (attempt - 1))
+    return random.uniform(cap / 2, cap)
+
+async def process_page_with_retry(
+    page: Dict[str, Any],
+    pdf_data: Dict[str, Any],
+    query: str,
+    client_name: str,
+    budget: RetryBudget
+) -> Dict[str, Any]:
+    """
+    Processes a page and retries it as soon as it fails, within the query's retry budget.
+
+    Retries go through the same rate-limited request pipelines as the first attempt.
+    A page whose final attempt still fails is returned with its error and the number of retries.
+
+    Args:
+        page (Dict[str, Any]): Dictionary containing page information.
+        pdf_data (Dict[str, Any]): Metadata about the PDF containing the page.
+        query (str): The query to be applied to the page.
+        client_name (str): The name of the client.
+        budget (RetryBudget): The retry budget of the query.
+
+    Returns:
+        Dict[str, Any]: The processing result of the last attempt.
+    """
+    retries = 0
+    while True:
+        result = await process_page(dict(page), pdf_data, query, client_name)
+        valid, _ = identify_failed_responses([result])
+        if valid or not result.get("retryable", True) or retries >= QUERY_RETRY_MAX_ATTEMPTS:
+            break
+
+        delay = get_retry_delay(retries + 1)
+        if delay >= budget.remaining_time():
+            logger.warning(f"Not retrying page {page['id']}: query deadline reached")
+            break
+        if not budget.try_consume():
+            logger.warning(f"Not retrying page {page['id']}: query retry budget exhausted")
+            break
+
+        retries += 1
+        logger.info(f"Retrying page {page['id']} in {delay:.1f}s (retry {retries}): {result.get('error')}")
+        await asyncio.sleep(delay)
+
+    if retries:
+        result["retries"] = retries
+    return result
@@ -0,0 +1,235 @@
+import logging
+import re
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional
+from ..config import TEXT_INDEX_FILE
+
+logger = logging.getLogger(__name__)
+
+# Phrases in double quotes, or single terms
+_QUERY_TOKEN_PATTERN = re.compile(r'"([^"]*)"|(\S+)')
+
+_connection: Optional[sqlite3.Connection] = None
+_lock = threading.RLock()
+
+def _get_connection() -> sqlite3.Connection:
+    """
+    Returns the text index connection, creating the index if needed.
+    """
+    global _connection
+    if _connection is None:
+        connection = sqlite3.connect(str(TEXT_INDEX_FILE), check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+                text,
+                pdf_id UNINDEXED,
+                page_number UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+        """)
+        # One row per indexed page, including pages without a usable text layer
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS indexed_pages (
+                pdf_id TEXT NOT NULL,
+                page_number INTEGER NOT NULL,
+                has_text INTEGER NOT NULL,
+                PRIMARY KEY (pdf_id, page_number)
+            )
+        """)
+        connection.commit()
+        _connection = connection
+        logger.info(f"Opened text index at {TEXT_INDEX_FILE}")
+    return _connection
+
+def _delete_pdf(connection: sqlite3.Connection, pdf_id: str) -> None:
+    """
+    Removes all pages of a PDF from the index without committing.
+    """
+    connection.execute("DELETE FROM page_text WHERE pdf_id = ?", (pdf_id,))
+    connection.execute("DELETE FROM indexed_pages WHERE pdf_id = ?", (pdf_id,))
+
+def index_pdf_pages(pdf_id: str, pages: Dict[int, Optional[str]]) -> None:
+    """
+    Replaces the indexed pages of a PDF in one transaction.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+        pages (Dict[int, Optional[str]]): The text of each 1-based page number, or None
+            for pages without a usable text layer.
+    """
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            _delete_pdf(connection, pdf_id)
+            connection.executemany(
+                "INSERT INTO page_text (text, pdf_id, page_number) VALUES (?, ?, ?)",
+                [(text, pdf_id, page_number) for page_number, text in pages.items() if text is not None]
+            )
+            connection.executemany(
+                "INSERT INTO indexed_pages (pdf_id, page_number, has_text) VALUES (?, ?, ?)",
+                [(pdf_id, page_number, text is not None) for page_number, text in pages.items()]
+            )
+
+def remove_pdf_pages(pdf_id: str) -> None:
+    """
+    Removes all pages of a PDF from the index.
+
+    Args:
+        pdf_id (str): The unique identifier of the PDF.
+    """
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            _delete_pdf(connection, pdf_id)
+
+def clear_index() -> None:
+    """
+    Removes every page from the index.
+    """
+    with _lock:
+        connection = _get_connection()
+        with connection:
+            connection.execute("DELETE FROM page_text")
+            connection.execute("DELETE FROM indexed_pages")
+
+def get_indexed_pdf_ids(pdf_ids: List[str]) -> List[str]:
+    """
+    Returns which of the given PDFs are in the index.
+
+    Args:
+        pdf_ids (List[str]): The PDF ids to check.
+
+    Returns:
+        List[str]: The ids of the indexed PDFs.
+    """
+    if not pdf_ids:
+        return []
+    with _lock:
+        rows = _get_connection().execute(
+            f"SELECT DISTINCT pdf_id FROM indexed_pages WHERE pdf_id IN ({', '.join('?' for _ in pdf_ids)})",
+            pdf_ids
+        ).fetchall()
+    return [row[0] for row in rows]
+
+def _quote(text: str) -> str:
+    """
+    Quotes text as an FTS5 string, so that it is matched as a phrase of plain terms.
+    """
+    return '"' + text.replace('"', '""') + '"'
+
+def build_match_expression(query: str, match_all: bool = True) -> str:
+    """
+    Turns a search string into an FTS5 match expression.
+
+    Double-quoted parts are matched as phrases and other words as single terms;
+    FTS5 operators in the input have no special meaning.
+
+    Args:
+        query (str): The search string, e.g. 'inflation "central bank"'.
+        match_all (bool, optional): Whether pages must contain every term (AND) rather
+            than any of them (OR). Defaults to True.
+
+    Returns:
+        str: The match expression, empty if the query has no terms.
+    """
+    terms = [(phrase or word).strip() for phrase, word in _QUERY_TOKEN_PATTERN.findall(query)]
+    terms = [_quote(term) for term in terms if term]
+    return (" AND " if match_all else " OR ").join(terms)
+
+def build_keywords_expression(keywords: List[str]) -> str:
+    """
+    Builds an FTS5 match expression matching pages that contain any of the keywords,
+    each keyword being matched as a phrase.
+
+    Args:
+        keywords (List[str]): The keywords.
+
+    Returns:
+        str: The match expression, empty if there are no keywords.
+    """
+    return " OR ".join(_quote(keyword.strip()) for keyword in keywords if keyword.strip())
+
+def search_pages(
+    match_expression: str,
+    pdf_ids: Optional[List[str]] = None,
+    limit: Optional[int] = 20,
+    snippet_tokens: int = 12
+) -> List[Dict[str, Any]]:
+    """
+    Searches the index, best matches first.
+
+    Args:
+        match_expression (str): An FTS5 match expression, see build_match_expression.
+        pdf_ids (Optional[List[str]]): Restricts the search to these PDFs.
+        limit (Optional[int]): The maximum number of pages returned; None for all. Defaults to 20.
+        snippet_tokens (int, optional): The number of tokens per snippet. Defaults to 12.
+
+    Returns:
+        List[Dict[str, Any]]: The page id, PDF id, page number, snippet (matches wrapped
+            in <b> tags) and BM25 score of each matching page.
+
+    Raises:
+        sqlite3.OperationalError: If the match expression is invalid.
+    """
+    if not match_expression:
+        return []
+    sql = (
+        "SELECT pdf_id, page_number, snippet(page_text, 0, '<b>', '</b>', '...', ?), bm25(page_text) "
+        "FROM page_text WHERE page_text MATCH ?"
+    )
+    params: List[Any] = [snippet_tokens, match_expression]
+    if pdf_ids:
+        sql += f" AND pdf_id IN ({', '.join('?' for _ in pdf_ids)})"
+        params.extend(pdf_ids)
+    sql += " ORDER BY rank"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    with _lock:
+        rows = _get_connection().execute(sql, params).fetchall()
+    return [
+        {
+            "page_id": f"{pdf_id}_{page_number}",
+            "pdf_id": pdf_id,
+            "page_number": page_number,
+            "snippet": snippet,
+            "score": round(-score, 4)
+        }
+        for pdf_id, page_number, snippet, score in rows
+    ]
+
+def get_pages_without_text(pdf_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Returns the indexed pages of the given PDFs that have no usable text layer.
+
+    Args:
+        pdf_ids (List[str]): The PDF ids.
+
+    Returns:
+        List[Dict[str, Any]]: The PDF id and page number of each page.
+    """
+    if not pdf_ids:
+        return []
+    with _lock:
+        rows = _get_connection().execute(
+            f"SELECT pdf_id, page_number FROM indexed_pages WHERE has_text = 0 "
+            f"AND pdf_id IN ({', '.join('?' for _ in pdf_ids)})",
+            pdf_ids
+        ).fetchall()
+    return [{"pdf_id": pdf_id, "page_number": page_number} for pdf_id, page_number in rows]
+
+def get_index_stats() -> Dict[str, int]:
+    """
+    Returns the number of indexed PDFs and pages.
+
+    Returns:
+        Dict[str, int]: The PDF count, page count and count of pages with text.
+    """
+    with _lock:
+        pdfs, pages, with_text = _get_connection().execute(
+            "SELECT COUNT(DISTINCT pdf_id), COUNT(*), COALESCE(SUM(has_text), 0) FROM indexed_pages"
+        ).fetchone()
+    return {"pdfs": pdfs, "pages": pages, "pages_with_text": with_text}
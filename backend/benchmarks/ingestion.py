@@ -0,0 +1,259 @@
+"""
+Microbenchmark of page extraction over a sweep of rasterization and encoding settings.
+
+Every combination of zoom, image format, worker count and colour mode runs
+PDFProcessor.extract_pages over the same corpus of PDFs (generated, or read from a
+directory), each in a fresh process so its settings, CPU time and memory are measured
+in isolation. The results are written as a JSON and a CSV table.
+
+Run from the backend directory:
+
+    python -m benchmarks.ingestion --zooms 1.5 2 --formats png jpeg webp --workers 1 4
+"""
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from .query_pipeline import get_commit
+from .synthetic_pdfs import generate_corpus
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# Directory the benchmark is run from, so the configuration runs can import the app
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Columns of the result table
+RESULT_FIELDS: List[str] = [
+    "zoom", "image_format", "quality", "workers", "grayscale",
+    "pdfs", "pages", "seconds", "seconds_per_page", "pages_per_second",
+    "bytes_per_page", "cpu_seconds", "cpu_seconds_per_page",
+    "peak_rss_mb", "peak_worker_rss_mb", "error"
+]
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parses the command line options of the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--zooms", type=float, nargs="+", default=[1.5, 2.0], help="Values of PDF_EXTRACTION_ZOOM")
+    parser.add_argument("--formats", nargs="+", default=["png", "jpeg", "webp"], help="Values of PAGE_IMAGE_FORMAT")
+    parser.add_argument("--qualities", type=int, nargs="+", default=[85], help="Values of PAGE_IMAGE_QUALITY (lossy formats only)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1], help="Values of PDF_EXTRACTION_WORKERS")
+    parser.add_argument(
+        "--colour-modes", nargs="+", default=["rgb", "gray"], choices=["rgb", "gray"],
+        help="Colour modes (PAGE_IMAGE_GRAYSCALE)"
+    )
+    parser.add_argument("--corpus", type=Path, help="Directory of PDFs to extract, instead of generated ones")
+    parser.add_argument("--pdfs", type=int, default=2, help="Number of PDFs to generate")
+    parser.add_argument("--pages", type=int, default=8, help="Pages per generated PDF")
+    parser.add_argument("--seed", type=int, default=0, help="Seeds the generated PDFs")
+    parser.add_argument("--timeout", type=float, default=900, help="Seconds after which a configuration is abandoned")
+    parser.add_argument("--output", default="ingestion", help="Path of the results, without the .json and .csv extensions")
+    # Used internally to run a single configuration in its own process
+    parser.add_argument("--run-configuration", help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", type=Path, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+def build_configurations(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Returns every combination of the swept settings. PNG is lossless, so it is run once
+    whatever the qualities.
+    """
+    configurations = []
+    for zoom, image_format, workers, colour_mode in itertools.product(args.zooms, args.formats, args.workers, args.colour_modes):
+        qualities = args.qualities if image_format != "png" else args.qualities[:1]
+        for quality in qualities:
+            configurations.append({
+                "zoom": zoom,
+                "image_format": image_format.lower(),
+                "quality": quality,
+                "workers": workers,
+                "grayscale": colour_mode == "gray"
+            })
+    return configurations
+
+def get_configuration_env(configuration: Dict[str, Any], data_dir: Path) -> Dict[str, str]:
+    """
+    Returns the environment that applies a configuration to the app.
+    """
+    return {
+        **os.environ,
+        "DATA_DIR": str(data_dir),
+        "PDF_EXTRACTION_ZOOM": str(configuration["zoom"]),
+        "PAGE_IMAGE_FORMAT": configuration["image_format"],
+        "PAGE_IMAGE_QUALITY": str(configuration["quality"]),
+        "PDF_EXTRACTION_WORKERS": str(configuration["workers"]),
+        "PAGE_IMAGE_GRAYSCALE": str(configuration["grayscale"]).lower(),
+        # Extraction only, the Gemini client is never configured
+        "MODEL_BACKEND": "fake",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING")
+    }
+
+def get_cpu_seconds() -> float:
+    """
+    Returns the user and system CPU time of this process and of its finished child processes.
+    """
+    if resource is None:
+        return time.process_time()
+    return sum(
+        usage.ru_utime + usage.ru_stime
+        for usage in (resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN))
+    )
+
+def get_peak_rss_mb(who: int) -> Optional[float]:
+    """
+    Returns the peak resident set size of this process (RUSAGE_SELF) or of its largest
+    finished child process (RUSAGE_CHILDREN), in MB.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(resource.getrusage(who).ru_maxrss / unit, 1)
+
+async def extract_corpus(corpus: List[Path]) -> Dict[str, Any]:
+    """
+    Extracts the pages of every PDF of the corpus with PDFProcessor.extract_pages.
+
+    Runs inside a configuration process, with the configuration applied through the environment.
+
+    Args:
+        corpus (List[Path]): The PDFs to extract.
+
+    Returns:
+        Dict[str, Any]: The page count, wall and CPU time, image bytes and peak memory.
+    """
+    from app.services.pdf_processor import PDFProcessor
+    from app.services.page_encoder import get_image_extension
+    from app.services.page_renderer import get_render_executor
+    from app.config import PAGE_IMAGE_FORMAT
+
+    processor = PDFProcessor()
+    extension = get_image_extension(PAGE_IMAGE_FORMAT)
+    pages = 0
+    image_bytes = 0
+
+    # Leaves the interpreter start and the imports out of the CPU time
+    cpu_started_at = get_cpu_seconds()
+    started_at = time.perf_counter()
+    for index, pdf_path in enumerate(corpus):
+        pdf_id = f"benchmark-{index + 1}"
+        pages += await processor.extract_pages(pdf_path, pdf_id)
+        image_bytes += sum(path.stat().st_size for path in (processor.upload_dir / pdf_id).glob(f"*.{extension}"))
+    seconds = time.perf_counter() - started_at
+
+    # Waits for the workers to exit, so their CPU time and memory are accounted to this process
+    get_render_executor().shutdown(wait=True)
+    cpu_seconds = get_cpu_seconds() - cpu_started_at
+    return {
+        "pdfs": len(corpus),
+        "pages": pages,
+        "seconds": round(seconds, 4),
+        "seconds_per_page": round(seconds / pages, 4) if pages else None,
+        "pages_per_second": round(pages / seconds, 3) if seconds else None,
+        "bytes_per_page": round(image_bytes / pages) if pages else None,
+        "cpu_seconds": round(cpu_seconds, 3),
+        "cpu_seconds_per_page": round(cpu_seconds / pages, 4) if pages else None,
+        "peak_rss_mb": get_peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        "peak_worker_rss_mb": get_peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None
+    }
+
+def run_configuration(configuration: Dict[str, Any], corpus: List[Path], timeout: float) -> Dict[str, Any]:
+    """
+    Extracts the corpus with one configuration in a fresh process and scratch data directory.
+
+    Args:
+        configuration (Dict[str, Any]): The zoom, image format, quality, worker count and colour mode.
+        corpus (List[Path]): The PDFs to extract.
+        timeout (float): Seconds after which the configuration is abandoned.
+
+    Returns:
+        Dict[str, Any]: The configuration and its measurements, or the error that stopped it.
+    """
+    with tempfile.TemporaryDirectory(prefix="newspaper-reader-ingestion-") as temp_dir:
+        result_file = Path(temp_dir) / "result.json"
+        command = [
+            sys.executable, "-m", "benchmarks.ingestion",
+            "--run-configuration", json.dumps(configuration),
+            "--result-file", str(result_file),
+            "--corpus", str(corpus[0].parent)
+        ]
+        try:
+            completed = subprocess.run(
+                command,
+                cwd=BACKEND_DIR,
+                env=get_configuration_env(configuration, Path(temp_dir) / "DATA"),
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            return {**configuration, "error": f"Timed out after {timeout} seconds"}
+        if completed.returncode != 0 or not result_file.exists():
+            error_lines = completed.stderr.strip().splitlines()
+            return {**configuration, "error": error_lines[-1] if error_lines else f"Exit code {completed.returncode}"}
+        return {**configuration, **json.loads(result_file.read_text(encoding="utf-8"))}
+
+def list_corpus(directory: Path) -> List[Path]:
+    """
+    Returns the PDFs of a corpus directory, in name order.
+    """
+    return sorted(directory.glob("*.pdf"))
+
+def write_results(results: List[Dict[str, Any]], report: Dict[str, Any], output: str) -> None:
+    """
+    Writes the results as a JSON report and a CSV table.
+    """
+    Path(f"{output}.json").write_text(json.dumps({**report, "results": results}, indent=2) + "\n", encoding="utf-8")
+    with open(f"{output}.csv", "w", newline="", encoding="utf-8") as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Runs the sweep, or a single configuration when invoked by the sweep.
+    """
+    args = parse_args(argv)
+
+    if args.run_configuration:
+        result = asyncio.run(extract_corpus(list_corpus(args.corpus)))
+        args.result_file.write_text(json.dumps(result), encoding="utf-8")
+        return
+
+    configurations = build_configurations(args)
+    started_at = time.time()
+    with tempfile.TemporaryDirectory(prefix="newspaper-reader-corpus-") as temp_dir:
+        corpus = list_corpus(args.corpus) if args.corpus else generate_corpus(Path(temp_dir), args.pdfs, args.pages, seed=args.seed)
+        if not corpus:
+            raise SystemExit(f"No PDFs found in {args.corpus}")
+
+        results = []
+        for number, configuration in enumerate(configurations, start=1):
+            print(f"[{number}/{len(configurations)}] {json.dumps(configuration)}", file=sys.stderr)
+            results.append(run_configuration(configuration, corpus, args.timeout))
+
+    report = {
+        "benchmark": "ingestion",
+        "commit": get_commit(),
+        "started_at": started_at,
+        "corpus": str(args.corpus) if args.corpus else f"generated: {args.pdfs} PDFs of {args.pages} pages",
+        "cpu_count": os.cpu_count()
+    }
+    write_results(results, report, args.output)
+    print(f"Wrote {args.output}.json and {args.output}.csv", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+End-to-end benchmark of the upload and query pipeline against the offline model backend.
+
+Synthetic newspaper PDFs are uploaded through /upload-pdf (PDFProcessor) and queried
+through /query (process_page, both request pipelines and the retry path), with the fake
+model backend injecting latency, quota errors and malformed answers. The results are
+written as JSON, so runs can be compared across commits.
+
+Run from the backend directory:
+
+    python -m benchmarks.query_pipeline --pdfs 2 --pages 8 --output query_pipeline.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from .synthetic_pdfs import generate_corpus
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# Keywords the synthetic pages mention and the benchmark client queries
+DEFAULT_KEYWORDS: List[str] = ["Acme Corp", "Zeta Bank", "Harbour Authority"]
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parses the command line options of the benchmark.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pdfs", type=int, default=2, help="Number of synthetic PDFs to upload")
+    parser.add_argument("--pages", type=int, default=8, help="Pages per PDF")
+    parser.add_argument("--queries", type=int, default=1, help="Number of times the query is run")
+    parser.add_argument("--keywords", nargs="+", default=DEFAULT_KEYWORDS, help="Keywords of the benchmark client")
+    parser.add_argument("--prefilter", action="store_true", help="Enable the text-layer keyword prefilter")
+    parser.add_argument("--seed", type=int, default=0, help="Seeds the PDFs and the fake model")
+    parser.add_argument("--latency-distribution", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--latency-mean", type=float, default=0.2, help="Mean fake model latency in seconds")
+    parser.add_argument("--latency-spread", type=float, default=0.5, help="Uniform half-width in seconds or lognormal sigma")
+    parser.add_argument("--quota-error-rate", type=float, default=0.02, help="Share of model requests failing with a 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.05, help="Share of model answers that are not clean JSON")
+    parser.add_argument("--retrieval-rate", type=float, default=0.3, help="Share of page and keyword pairs reported as found")
+    parser.add_argument(
+        "--requests-per-minute", type=float, default=6000,
+        help="Request quota of both models; 0 keeps the configured quotas"
+    )
+    parser.add_argument("--data-dir", type=Path, help="Data directory to use instead of a temporary one")
+    parser.add_argument(
+        "--output", default="query_pipeline.json",
+        help="File to write the JSON results to, or - for stdout (the page renderer may print to stdout too)"
+    )
+    return parser.parse_args(argv)
+
+def configure_environment(args: argparse.Namespace, data_dir: Path) -> None:
+    """
+    Points the app at the fake model backend and a scratch data directory.
+
+    Must run before the app is imported, since the configuration is read at import time.
+    """
+    os.environ.update({
+        "DATA_DIR": str(data_dir),
+        "MODEL_BACKEND": "fake",
+        "FAKE_MODEL_SEED": str(args.seed),
+        "FAKE_MODEL_LATENCY_DISTRIBUTION": args.latency_distribution,
+        "FAKE_MODEL_LATENCY_MEAN": str(args.latency_mean),
+        "FAKE_MODEL_LATENCY_SPREAD": str(args.latency_spread),
+        "FAKE_MODEL_QUOTA_ERROR_RATE": str(args.quota_error_rate),
+        "FAKE_MODEL_MALFORMED_RATE": str(args.malformed_rate),
+        "FAKE_MODEL_RETRIEVAL_RATE": str(args.retrieval_rate),
+        # Every query must reach the models, and nothing may run behind the benchmark's back
+        "RESULT_CACHE_ENABLED": "false",
+        "STANDING_QUERIES_ENABLED": "false",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "CRITICAL")
+    })
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Returns the q-th percentile (0-100) of the values, interpolating between ranks.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return round(ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower), 4)
+
+def summarize_latencies(values: List[float]) -> Dict[str, Optional[float]]:
+    """
+    Returns the mean, p50, p95, p99 and maximum of latencies in seconds.
+    """
+    return {
+        "mean": round(sum(values) / len(values), 4) if values else None,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": round(max(values), 4) if values else None
+    }
+
+def get_peak_rss_mb() -> Dict[str, Optional[float]]:
+    """
+    Returns the peak resident set size of the benchmark process and of its finished child
+    processes (the page rendering workers), in MB.
+    """
+    if resource is None:
+        return {"self": None, "children": None}
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1),
+        "children": round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit, 1)
+    }
+
+def get_commit() -> Optional[str]:
+    """
+    Returns the git commit of the working tree, if available.
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def set_scheduler_quota(scheduler: Any, requests_per_minute: float) -> None:
+    """
+    Replaces the request and token quotas of a request scheduler before it is started,
+    so the benchmark measures the pipeline rather than the production rate limits.
+    """
+    from app.utils.request_scheduler import TokenBucket
+    from app.config import RATE_LIMIT_MIN_FRACTION
+
+    scheduler.max_requests_per_minute = requests_per_minute
+    scheduler.min_requests_per_minute = requests_per_minute * RATE_LIMIT_MIN_FRACTION
+    scheduler.request_bucket = TokenBucket(requests_per_minute)
+    scheduler.token_bucket = TokenBucket(requests_per_minute * 100000)
+
+def snapshot_scheduler(scheduler: Any) -> Dict[str, float]:
+    """
+    Returns the cumulative counters of a request scheduler.
+    """
+    return {
+        "dispatched": scheduler.dispatched,
+        "completed": scheduler.completed,
+        "failed": scheduler.failed,
+        "throttled": scheduler.throttled,
+        "requeued": scheduler.requeued,
+        "queue_wait_seconds": scheduler.queue_wait_seconds,
+        "model_seconds": scheduler.model_seconds
+    }
+
+def diff_scheduler(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Returns the scheduler activity between two snapshots, with the mean queue wait and model time per request.
+    """
+    delta = {key: after[key] - before[key] for key in after}
+    dispatched = delta["dispatched"]
+    delta["queue_wait_seconds"] = round(delta["queue_wait_seconds"], 4)
+    delta["model_seconds"] = round(delta["model_seconds"], 4)
+    delta["mean_queue_wait_seconds"] = round(delta["queue_wait_seconds"] / dispatched, 4) if dispatched else None
+    delta["mean_model_seconds"] = round(delta["model_seconds"] / dispatched, 4) if dispatched else None
+    return delta
+
+def run_benchmark(args: argparse.Namespace, data_dir: Path) -> Dict[str, Any]:
+    """
+    Uploads the synthetic corpus, runs the queries and collects the measurements.
+
+    Args:
+        args (argparse.Namespace): The benchmark options.
+        data_dir (Path): The scratch data directory of the app.
+
+    Returns:
+        Dict[str, Any]: The benchmark results.
+    """
+    configure_environment(args, data_dir)
+
+    # The app is imported only now that the environment is configured
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.routes import query as query_route
+    from app.utils import retry_processor
+    from app.utils.request_pipeline import flash_scheduler, pro_scheduler
+    from app.utils.response_parser import get_parsing_stats
+
+    if args.requests_per_minute > 0:
+        set_scheduler_quota(flash_scheduler, args.requests_per_minute)
+        set_scheduler_quota(pro_scheduler, args.requests_per_minute)
+
+    corpus = generate_corpus(data_dir / "corpus", args.pdfs, args.pages, args.keywords, args.seed)
+
+    # Times every page of a query, including its retries, and counts the analysis attempts
+    page_timings: List[Dict[str, float]] = []
+    attempts = {"count": 0}
+    process_page_with_retry = query_route.process_page_with_retry
+    process_page = retry_processor.process_page
+
+    async def timed_process_page_with_retry(*call_args: Any, **call_kwargs: Any) -> Dict[str, Any]:
+        started_at = time.perf_counter()
+        result = await process_page_with_retry(*call_args, **call_kwargs)
+        page_timings.append({"started_at": started_at, "finished_at": time.perf_counter()})
+        return result
+
+    async def counted_process_page(*call_args: Any, **call_kwargs: Any) -> Dict[str, Any]:
+        attempts["count"] += 1
+        return await process_page(*call_args, **call_kwargs)
+
+    query_route.process_page_with_retry = timed_process_page_with_retry
+    retry_processor.process_page = counted_process_page
+
+    results: Dict[str, Any] = {}
+    with TestClient(app) as client:
+        # Ingestion
+        pdf_ids = []
+        upload_latencies = []
+        ingestion_started_at = time.perf_counter()
+        for index, pdf_path in enumerate(corpus):
+            started_at = time.perf_counter()
+            with open(pdf_path, "rb") as pdf_file:
+                response = client.post(
+                    "/upload-pdf",
+                    files={"file": (pdf_path.name, pdf_file, "application/pdf")},
+                    data={"publication_name": "Synthetic Herald", "edition": f"Edition {index + 1}", "date": "2024-01-01"}
+                )
+            response.raise_for_status()
+            upload_latencies.append(time.perf_counter() - started_at)
+            pdf_ids.append(response.json()["pdf_id"])
+        ingestion_seconds = time.perf_counter() - ingestion_started_at
+        total_pages = args.pdfs * args.pages
+        results["ingestion"] = {
+            "pdfs": args.pdfs,
+            "pages": total_pages,
+            "seconds": round(ingestion_seconds, 4),
+            "pages_per_second": round(total_pages / ingestion_seconds, 3) if ingestion_seconds else None,
+            "upload_latency_seconds": summarize_latencies(upload_latencies)
+        }
+
+        # Queries
+        runs = []
+        schedulers_before = {"flash": snapshot_scheduler(flash_scheduler), "pro": snapshot_scheduler(pro_scheduler)}
+        for _ in range(args.queries):
+            page_timings.clear()
+            attempts["count"] = 0
+            started_at = time.perf_counter()
+            response = client.post("/query", json={
+                "client": "benchmark",
+                "keywords": args.keywords,
+                "pdf_ids": pdf_ids,
+                "prefilter": args.prefilter
+            })
+            response.raise_for_status()
+            seconds = time.perf_counter() - started_at
+            body = response.json()
+            pages = len(page_timings)
+            first_result = min((timing["finished_at"] for timing in page_timings), default=None)
+            runs.append({
+                "seconds": round(seconds, 4),
+                "pages_analyzed": pages,
+                "pages_per_second": round(pages / seconds, 3) if seconds else None,
+                "time_to_first_result_seconds": round(first_result - started_at, 4) if first_result else None,
+                "page_latency_seconds": summarize_latencies(
+                    [timing["finished_at"] - timing["started_at"] for timing in page_timings]
+                ),
+                "responses": len(body.get("responses", [])),
+                "failed_pages": len(body.get("failed_pages", [])),
+                "retries": max(0, attempts["count"] - pages)
+            })
+        results["queries"] = runs
+        results["pipelines"] = {
+            "flash": diff_scheduler(schedulers_before["flash"], snapshot_scheduler(flash_scheduler)),
+            "pro": diff_scheduler(schedulers_before["pro"], snapshot_scheduler(pro_scheduler))
+        }
+        results["parsing"] = get_parsing_stats()["layers"]
+
+    query_route.process_page_with_retry = process_page_with_retry
+    retry_processor.process_page = process_page
+    results["peak_rss_mb"] = get_peak_rss_mb()
+    return results
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Runs the benchmark and writes its results as JSON.
+    """
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="newspaper-reader-benchmark-") as temp_dir:
+        data_dir = args.data_dir or Path(temp_dir)
+        started_at = time.time()
+        results = run_benchmark(args, data_dir)
+
+    report = {
+        "benchmark": "query_pipeline",
+        "commit": get_commit(),
+        "started_at": started_at,
+        "parameters": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+        **results
+    }
+    output = json.dumps(report, indent=2)
+    if args.output == "-":
+        print(output)
+    else:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
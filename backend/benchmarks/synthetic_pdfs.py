@@ -0,0 +1,118 @@
+import random
+from pathlib import Path
+from typing import List, Optional
+import fitz  # PyMuPDF
+
+# Words the article text is drawn from
+FILLER_WORDS: List[str] = (
+    "the city council said on monday that the new budget would fund schools roads and "
+    "hospitals while critics argued the plan raised taxes for families and small business "
+    "owners across the region officials expect the vote next week after months of debate "
+    "in parliament over inflation wages energy prices housing and public transport"
+).split()
+
+# Page size of a tabloid newspaper, in PDF points
+PAGE_WIDTH = 842
+PAGE_HEIGHT = 1191
+MARGIN = 36
+COLUMNS = 4
+COLUMN_GAP = 14
+
+def make_sentence(rng: random.Random, keywords: List[str], keyword_rate: float) -> str:
+    """
+    Builds a sentence of filler words, sometimes mentioning one of the keywords.
+
+    Args:
+        rng (random.Random): The random generator.
+        keywords (List[str]): The keywords articles may mention.
+        keyword_rate (float): The share of sentences mentioning a keyword.
+
+    Returns:
+        str: The sentence.
+    """
+    words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(8, 18))]
+    if keywords and rng.random() < keyword_rate:
+        words.insert(rng.randrange(len(words)), rng.choice(keywords))
+    return " ".join(words).capitalize() + "."
+
+def draw_page(page: fitz.Page, rng: random.Random, page_number: int, keywords: List[str], keyword_rate: float, images: bool) -> None:
+    """
+    Lays out a newspaper page: a header, then articles with headlines in columns, and photos.
+    """
+    page.insert_text((MARGIN, MARGIN + 24), "THE SYNTHETIC HERALD", fontsize=28, fontname="tibo")
+    page.insert_text((PAGE_WIDTH - MARGIN - 60, MARGIN + 24), f"Page {page_number}", fontsize=10)
+    page.draw_line((MARGIN, MARGIN + 34), (PAGE_WIDTH - MARGIN, MARGIN + 34))
+
+    column_width = (PAGE_WIDTH - 2 * MARGIN - (COLUMNS - 1) * COLUMN_GAP) / COLUMNS
+    for column in range(COLUMNS):
+        x0 = MARGIN + column * (column_width + COLUMN_GAP)
+        y = MARGIN + 48
+        while y < PAGE_HEIGHT - MARGIN - 120:
+            headline = " ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(3, 6))).title()
+            if keywords and rng.random() < keyword_rate:
+                headline = f"{rng.choice(keywords)}: {headline}"
+            page.insert_textbox(fitz.Rect(x0, y, x0 + column_width, y + 44), headline, fontsize=13, fontname="tibo")
+            y += 46
+            if images and rng.random() < 0.3:
+                # A grey photo placeholder, so pages are not text only
+                shade = rng.uniform(0.3, 0.8)
+                page.draw_rect(fitz.Rect(x0, y, x0 + column_width, y + 90), color=None, fill=(shade, shade, shade))
+                y += 96
+            body = " ".join(make_sentence(rng, keywords, keyword_rate) for _ in range(rng.randint(3, 8)))
+            height = min(rng.randint(140, 320), PAGE_HEIGHT - MARGIN - y)
+            if height < 40:
+                break
+            page.insert_textbox(fitz.Rect(x0, y, x0 + column_width, y + height), body, fontsize=8, fontname="tiro")
+            y += height + 12
+
+def generate_newspaper_pdf(
+    path: Path,
+    pages: int,
+    keywords: Optional[List[str]] = None,
+    keyword_rate: float = 0.05,
+    seed: int = 0,
+    images: bool = True
+) -> Path:
+    """
+    Writes a synthetic multi-page newspaper PDF with a text layer.
+
+    The same arguments always produce the same pages.
+
+    Args:
+        path (Path): Where to write the PDF.
+        pages (int): The number of pages.
+        keywords (Optional[List[str]], optional): Keywords some headlines and sentences mention. Defaults to None.
+        keyword_rate (float, optional): The share of headlines and sentences mentioning a keyword. Defaults to 0.05.
+        seed (int, optional): Seeds the page content. Defaults to 0.
+        images (bool, optional): Whether to add photo placeholders. Defaults to True.
+
+    Returns:
+        Path: The path of the PDF.
+    """
+    rng = random.Random(f"{seed}|{path.name}")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with fitz.open() as doc:
+        for page_number in range(1, pages + 1):
+            page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            draw_page(page, rng, page_number, keywords or [], keyword_rate, images)
+        doc.save(str(path), deflate=True)
+    return path
+
+def generate_corpus(directory: Path, pdfs: int, pages: int, keywords: Optional[List[str]] = None, seed: int = 0) -> List[Path]:
+    """
+    Writes several synthetic newspaper PDFs.
+
+    Args:
+        directory (Path): The directory to write the PDFs to.
+        pdfs (int): The number of PDFs.
+        pages (int): The number of pages of each PDF.
+        keywords (Optional[List[str]], optional): Keywords the pages mention. Defaults to None.
+        seed (int, optional): Seeds the page content. Defaults to 0.
+
+    Returns:
+        List[Path]: The paths of the PDFs.
+    """
+    return [
+        generate_newspaper_pdf(directory / f"synthetic_{index + 1}.pdf", pages, keywords, seed=seed)
+        for index in range(pdfs)
+    ]
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# The app reads its configuration at import time, so the tests point it at a scratch data
+# directory and an offline model that answers at once and reports every keyword it is asked for
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="newspaper-reader-tests-"))
+os.environ.setdefault("MODEL_BACKEND", "fake")
+os.environ.setdefault("FAKE_MODEL_LATENCY_MEAN", "0")
+os.environ.setdefault("FAKE_MODEL_RETRIEVAL_RATE", "1")
+os.environ.setdefault("FAKE_MODEL_VALIDATION_RATE", "1")
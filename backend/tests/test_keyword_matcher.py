@@ -0,0 +1,36 @@
+import random
+from app.utils.keyword_matcher import KeywordMatcher, normalize_text
+
+def test_nested_and_overlapping_keywords_all_match():
+    matcher = KeywordMatcher({
+        "acme": ["New York", "York", "New York Times"],
+        "globex": ["times reported", "reported"]
+    })
+    assert matcher.match("The New York Times reported on Monday") == {
+        "acme": ["New York", "York", "New York Times"],
+        "globex": ["times reported", "reported"]
+    }
+
+def test_keywords_sharing_a_word_both_match():
+    matcher = KeywordMatcher({"acme": ["budget vote", "vote delay"]})
+    assert matcher.match("The budget vote delay angered critics") == {"acme": ["budget vote", "vote delay"]}
+
+def test_only_whole_words_match():
+    matcher = KeywordMatcher({"acme": ["york", "tax"]})
+    assert matcher.match("Yorkshire taxpayers") == {}
+    assert matcher.match("York, taxes and tax.") == {"acme": ["york", "tax"]}
+
+def test_keywords_are_normalized_and_shared_between_clients():
+    matcher = KeywordMatcher({"acme": ["Zürich"], "globex": ["zurich", "Bern"], "initech": []})
+    assert matcher.pattern_count == 2
+    assert matcher.match("ZURICH stocks rise") == {"acme": ["Zürich"], "globex": ["zurich"]}
+
+def test_matches_agree_with_substring_search():
+    rng = random.Random(0)
+    words = ["a", "b", "ab", "ba", "aa", "b a"]
+    keywords = sorted({" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))) for _ in range(40)})
+    matcher = KeywordMatcher({"client": keywords})
+    for _ in range(200):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(1, 12)))
+        expected = [keyword for keyword in keywords if normalize_text(keyword) in normalize_text(text)]
+        assert sorted(matcher.match(text).get("client", [])) == sorted(expected)
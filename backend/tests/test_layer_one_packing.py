@@ -0,0 +1,98 @@
+import asyncio
+import json
+import re
+from app.models.fake_model import FakeResponse
+from app.services import llm_layer_one
+from app.services.llm_layer_one import LayerOnePacker
+
+PDF_DATA = {"publication_name": "Herald", "edition": "Morning", "date": "2031-01-01"}
+
+def make_page(number):
+    return {"id": f"pdf_{number}", "number": number}
+
+def make_answering_model(sent, skip_pages=()):
+    """
+    Returns a stand-in for the flash queue that reports one article on every requested page.
+    """
+    async def add_request_to_queue(content):
+        sent.append(content)
+        numbers = [int(number) for number in re.search(r"Pages: ([\d, ]+)", content[-1]).group(1).split(",")]
+        return FakeResponse(json.dumps({"pages": [
+            {
+                "page": number,
+                "retrieval": True,
+                "keywords": [{"keyword": "budget", "articles": [{"headline": f"Page {number}", "summary": "Budget."}]}]
+            }
+            for number in numbers
+            if number not in skip_pages
+        ]}), 1)
+    return add_request_to_queue
+
+def patch_layer_one(monkeypatch, sent, skip_pages=()):
+    monkeypatch.setattr(llm_layer_one, "add_request_to_queue", make_answering_model(sent, skip_pages))
+    monkeypatch.setattr(llm_layer_one, "get_system_prompt", lambda: "Analyze.")
+    monkeypatch.setattr(llm_layer_one, "load_page_images", lambda page: [{"mime_type": "image/png", "data": b""}])
+    single_pages = []
+
+    async def analyze_single_page(page, pdf_data, query, client_name):
+        single_pages.append(page["number"])
+        return {"page_id": page["id"], "first_response": {"retrieval": False, "keywords": []}}
+
+    monkeypatch.setattr(llm_layer_one, "analyze_single_page", analyze_single_page)
+    return single_pages
+
+def submit_pages(packer, numbers, client_name="acme"):
+    async def run():
+        return await asyncio.gather(*(
+            packer.submit(make_page(number), PDF_DATA, "Keywords: budget", client_name) for number in numbers
+        ))
+    return asyncio.run(run())
+
+def test_pages_of_a_pdf_share_one_request(monkeypatch):
+    sent = []
+    single_pages = patch_layer_one(monkeypatch, sent)
+    packer = LayerOnePacker(max_pages=3, max_images=10, max_tokens=100000, linger_seconds=10)
+    results = submit_pages(packer, [1, 2, 3])
+    assert len(sent) == 1
+    assert [result["page_id"] for result in results] == ["pdf_1", "pdf_2", "pdf_3"]
+    assert [result["first_response"]["keywords"][0]["articles"][0]["headline"] for result in results] == ["Page 1", "Page 2", "Page 3"]
+    assert single_pages == []
+    assert packer.packed_requests == 1
+
+def test_page_missing_from_the_answer_is_sent_alone(monkeypatch):
+    sent = []
+    single_pages = patch_layer_one(monkeypatch, sent, skip_pages={2})
+    packer = LayerOnePacker(max_pages=3, max_images=10, max_tokens=100000, linger_seconds=10)
+    results = submit_pages(packer, [1, 2, 3])
+    assert single_pages == [2]
+    assert results[1] == {"page_id": "pdf_2", "first_response": {"retrieval": False, "keywords": []}}
+    assert results[2]["first_response"]["retrieval"] is True
+    assert packer.fallback_pages == 1
+
+def test_full_pack_is_sent_and_the_rest_waits_for_the_linger(monkeypatch):
+    sent = []
+    single_pages = patch_layer_one(monkeypatch, sent)
+    packer = LayerOnePacker(max_pages=10, max_images=2, max_tokens=100000, linger_seconds=0.01)
+    results = submit_pages(packer, [1, 2, 3])
+    # Pages 1 and 2 fill the image budget; page 3 is alone in its pack and sent as a single page
+    assert len(sent) == 1
+    assert "Pages: 1, 2" in sent[0][-1]
+    assert single_pages == [3]
+    assert [result["page_id"] for result in results] == ["pdf_1", "pdf_2", "pdf_3"]
+
+def test_clients_are_packed_separately(monkeypatch):
+    sent = []
+    patch_layer_one(monkeypatch, sent)
+    packer = LayerOnePacker(max_pages=2, max_images=10, max_tokens=100000, linger_seconds=10)
+
+    async def run():
+        return await asyncio.gather(
+            packer.submit(make_page(1), PDF_DATA, "Keywords: budget", "acme"),
+            packer.submit(make_page(1), PDF_DATA, "Keywords: budget", "globex"),
+            packer.submit(make_page(2), PDF_DATA, "Keywords: budget", "acme"),
+            packer.submit(make_page(2), PDF_DATA, "Keywords: budget", "globex")
+        )
+
+    results = asyncio.run(run())
+    assert len(sent) == 2
+    assert [result["page_id"] for result in results] == ["pdf_1", "pdf_1", "pdf_2", "pdf_2"]
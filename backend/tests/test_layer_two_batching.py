@@ -0,0 +1,84 @@
+import asyncio
+import json
+from app.models.fake_model import FakeResponse
+from app.services import llm_layer_two
+from app.services.llm_layer_two import LayerTwoBatcher, build_batch_input
+
+def make_first_response(keyword):
+    return {
+        "retrieval": True,
+        "keywords": [{"keyword": keyword, "articles": [{"headline": f"{keyword} news", "summary": "Summary."}]}]
+    }
+
+def make_validating_model(sent, skip_entries=()):
+    """
+    Returns a stand-in for the pro queue that validates every keyword of each batch entry.
+    """
+    async def add_request_to_queue_pro(content):
+        sent.append(content)
+        first_responses = json.loads(content[-1].split("JSON Input:", 1)[1])
+        return FakeResponse(json.dumps({"pages": [
+            {
+                "entry": entry,
+                "keyword_validation": [
+                    {"keyword": keyword["keyword"], "valid": True, "reason": "Present."}
+                    for keyword in first_response["keywords"]
+                ]
+            }
+            for entry, first_response in first_responses.items()
+            if entry not in skip_entries
+        ]}), 1)
+    return add_request_to_queue_pro
+
+def validated_keywords(result):
+    return [validation["keyword"] for validation in result["second_response"]["keyword_validation"]]
+
+def test_build_batch_input_keeps_entries_of_the_same_page():
+    batch_input = build_batch_input([("pdf_1", make_first_response("acme")), ("pdf_1", make_first_response("globex"))])
+    entries = json.loads(batch_input.split("JSON Input:", 1)[1])
+    assert list(entries) == ["0", "1"]
+
+def test_same_page_from_two_clients_gets_its_own_validation(monkeypatch):
+    sent = []
+    monkeypatch.setattr(llm_layer_two, "add_request_to_queue_pro", make_validating_model(sent))
+    monkeypatch.setattr(llm_layer_two, "get_second_system_prompt", lambda: "Validate.")
+    batcher = LayerTwoBatcher(max_pages=10, max_tokens=100000, linger_seconds=0.01)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit("pdf_1", make_first_response("acme"), "acme"),
+            batcher.submit("pdf_1", make_first_response("globex"), "globex")
+        )
+
+    acme, globex = asyncio.run(run())
+    assert len(sent) == 1
+    assert acme["page_id"] == globex["page_id"] == "pdf_1"
+    assert validated_keywords(acme) == ["acme"]
+    assert validated_keywords(globex) == ["globex"]
+    assert batcher.batched_requests == 1
+    assert batcher.fallback_pages == 0
+
+def test_entry_missing_from_the_answer_is_validated_alone(monkeypatch):
+    sent = []
+    monkeypatch.setattr(llm_layer_two, "add_request_to_queue_pro", make_validating_model(sent, skip_entries={"1"}))
+    monkeypatch.setattr(llm_layer_two, "get_second_system_prompt", lambda: "Validate.")
+    single_pages = []
+
+    async def validate_single_page(page_id, llm_one_response, client_name):
+        single_pages.append((page_id, client_name))
+        return {"page_id": page_id, "second_response": {"keyword_validation": []}}
+
+    monkeypatch.setattr(llm_layer_two, "validate_single_page", validate_single_page)
+    batcher = LayerTwoBatcher(max_pages=2, max_tokens=100000, linger_seconds=10)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit("pdf_1", make_first_response("acme"), "acme"),
+            batcher.submit("pdf_1", make_first_response("globex"), "globex")
+        )
+
+    acme, globex = asyncio.run(run())
+    assert validated_keywords(acme) == ["acme"]
+    assert validated_keywords(globex) == []
+    assert single_pages == [("pdf_1", "globex")]
+    assert batcher.fallback_pages == 1
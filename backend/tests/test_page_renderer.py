@@ -0,0 +1,36 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from app.services import page_renderer
+from app.services.page_renderer import render_pdf, split_page_ranges
+
+def test_split_page_ranges():
+    assert split_page_ranges(10, 4) == [(0, 4), (4, 8), (8, 10)]
+    assert split_page_ranges(0, 4) == []
+
+def test_failed_range_waits_for_the_running_ranges_before_raising(monkeypatch, tmp_path):
+    executor = ThreadPoolExecutor(max_workers=2)
+    started = []
+    finished = []
+
+    def render_page_range(pdf_path, output_dir, start, stop, *args):
+        started.append(start)
+        if start == 0:
+            raise RuntimeError("Corrupt page")
+        time.sleep(0.2)
+        finished.append(start)
+        return stop - start
+
+    monkeypatch.setattr(page_renderer, "get_render_executor", lambda: executor)
+    monkeypatch.setattr(page_renderer, "count_pages", lambda pdf_path: 40)
+    monkeypatch.setattr(page_renderer, "render_page_range", render_page_range)
+    monkeypatch.setattr(page_renderer, "PDF_EXTRACTION_CHUNK_SIZE", 4)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(render_pdf(tmp_path / "source.pdf", tmp_path, image_format="png"))
+    finished_when_raised = sorted(finished)
+    executor.shutdown()
+    # Every range a worker had started is done, and the ranges still queued were cancelled
+    assert finished_when_raised == sorted(start for start in started if start != 0)
+    assert len(started) < 10
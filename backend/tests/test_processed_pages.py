@@ -0,0 +1,56 @@
+import itertools
+from types import SimpleNamespace
+import pytest
+from app.utils import metadata_store
+from app.utils.metadata_store import put_processed_pages, get_processed_pages, delete_processed_pages
+
+def make_response(pdf_id, page_number, keyword="budget"):
+    return {"page_id": f"{pdf_id}_{page_number}", "first_response": {"retrieval": True, "keywords": [{"keyword": keyword}]}}
+
+@pytest.fixture(autouse=True)
+def metadata_db(tmp_path, monkeypatch):
+    """
+    Gives every test its own metadata database, and a clock that ticks once per write.
+    """
+    monkeypatch.setattr(metadata_store, "METADATA_DB_FILE", tmp_path / "metadata.sqlite3")
+    monkeypatch.setattr(metadata_store, "METADATA_FILE", tmp_path / "metadata.json")
+    monkeypatch.setattr(metadata_store, "_connection", None)
+    clock = itertools.count(1000)
+    monkeypatch.setattr(metadata_store, "time", SimpleNamespace(time=lambda: next(clock)))
+    yield tmp_path / "metadata.sqlite3"
+    if metadata_store._connection is not None:
+        metadata_store._connection.close()
+
+def test_records_are_kept_per_query_version():
+    put_processed_pages("acme", "v1", {"pdf": {1: make_response("pdf", 1, "v1")}})
+    put_processed_pages("acme", "v2", {"pdf": {1: make_response("pdf", 1, "v2"), 2: make_response("pdf", 2, "v2")}})
+    put_processed_pages("globex", "v1", {"pdf": {3: make_response("pdf", 3)}})
+
+    assert get_processed_pages("acme", "v1", ["pdf"]) == {"pdf": {1: make_response("pdf", 1, "v1")}}
+    assert set(get_processed_pages("acme", "v2", ["pdf"])["pdf"]) == {1, 2}
+    assert get_processed_pages("acme", "v2", ["other"]) == {}
+    assert get_processed_pages("acme", "v1", []) == {}
+
+    delete_processed_pages("acme")
+    assert get_processed_pages("acme", "v2", ["pdf"]) == {}
+    assert get_processed_pages("globex", "v1", ["pdf"]) == {"pdf": {3: make_response("pdf", 3)}}
+
+def test_only_the_most_recent_versions_are_kept(monkeypatch):
+    monkeypatch.setattr(metadata_store, "PROCESSED_PAGE_VERSIONS_PER_CLIENT", 2)
+    for version in ("v1", "v2", "v3"):
+        put_processed_pages("acme", version, {"pdf": {1: make_response("pdf", 1, version)}})
+    assert get_processed_pages("acme", "v1", ["pdf"]) == {}
+    assert get_processed_pages("acme", "v2", ["pdf"])
+
+    # Recording v2 again makes it the most recent, so v3 is the one dropped next
+    put_processed_pages("acme", "v2", {"pdf": {2: make_response("pdf", 2, "v2")}})
+    put_processed_pages("acme", "v4", {"pdf": {1: make_response("pdf", 1, "v4")}})
+    assert get_processed_pages("acme", "v3", ["pdf"]) == {}
+    assert set(get_processed_pages("acme", "v2", ["pdf"])["pdf"]) == {1, 2}
+
+def test_truncated_results_are_not_recorded():
+    from app.routes.query import record_processed_pages
+
+    complete = {**make_response("pdf", 1), "second_response": None}
+    record_processed_pages("acme", "v1", [complete, {**make_response("pdf", 2), "truncated": True}])
+    assert get_processed_pages("acme", "v1", ["pdf"]) == {"pdf": {1: complete}}
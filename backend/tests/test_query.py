@@ -0,0 +1,42 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from benchmarks.synthetic_pdfs import generate_newspaper_pdf
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def pdf_id(client, tmp_path):
+    path = generate_newspaper_pdf(tmp_path / "herald.pdf", pages=2, keywords=["budget", "taxes"])
+    with open(path, "rb") as pdf_file:
+        response = client.post(
+            "/upload-pdf",
+            files={"file": ("herald.pdf", pdf_file, "application/pdf")},
+            data={"publication_name": "Herald", "edition": "Morning", "date": "2031-01-01"}
+        )
+    assert response.status_code == 200
+    return response.json()["pdf_id"]
+
+def test_batch_query_routes_keywords_to_their_clients(client, pdf_id):
+    response = client.post("/query/batch", json={
+        "pdf_ids": [pdf_id],
+        "prefilter": False,
+        "clients": [
+            {"client": "acme", "keywords": ["budget"]},
+            {"client": "globex", "keywords": ["budget", "taxes"]}
+        ]
+    })
+    assert response.status_code == 200
+    result = response.json()
+    assert result["failed_pages"] == []
+
+    for name, keywords in (("acme", ["budget"]), ("globex", ["budget", "taxes"])):
+        responses = result["clients"][name]["responses"]
+        assert len(responses) == 2
+        for page in responses:
+            assert page["first_response"]["retrieval"] is True
+            assert [keyword["keyword"] for keyword in page["first_response"]["keywords"]] == keywords
+            assert sorted(validation["keyword"] for validation in page["second_response"]["keyword_validation"]) == keywords
@@ -0,0 +1,177 @@
+import asyncio
+import time
+import pytest
+from google.api_core import exceptions as google_exceptions
+from app.models.fake_model import FakeResponse
+from app.utils import request_scheduler
+from app.utils.request_scheduler import (
+    RequestScheduler,
+    TokenBucket,
+    is_quota_error,
+    get_retry_after,
+    SchedulerStoppedError,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE
+)
+
+class RecordingModel:
+    """
+    Answers every request at once and records the order in which the requests arrived.
+    """
+
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_content_async(self, contents):
+        self.prompts.append(contents[0])
+        return FakeResponse("{}", 1)
+
+class ThrottledModel:
+    """
+    Fails the first `quota_errors` requests with a quota error, then answers.
+    """
+
+    def __init__(self, quota_errors):
+        self.quota_errors = quota_errors
+        self.requests = 0
+
+    async def generate_content_async(self, contents):
+        self.requests += 1
+        if self.requests <= self.quota_errors:
+            raise google_exceptions.ResourceExhausted("429 Quota exceeded for page 429")
+        return FakeResponse("{}", 1)
+
+class SlowModel:
+    """
+    Answers after a long delay.
+    """
+
+    async def generate_content_async(self, contents):
+        await asyncio.sleep(60)
+        return FakeResponse("{}", 1)
+
+def test_token_bucket_waits_for_the_refill():
+    async def run():
+        bucket = TokenBucket(rate_per_minute=600, capacity=1)
+        started_at = time.monotonic()
+        await bucket.acquire()
+        await bucket.acquire()
+        return time.monotonic() - started_at
+
+    # One token every 0.1 seconds, and the bucket starts with one
+    assert 0.08 <= asyncio.run(run()) < 0.5
+
+def test_token_bucket_negative_balance_delays_the_next_acquisition():
+    async def run():
+        bucket = TokenBucket(rate_per_minute=600, capacity=10)
+        bucket.adjust(11)
+        started_at = time.monotonic()
+        await bucket.acquire()
+        return time.monotonic() - started_at
+
+    assert 0.15 <= asyncio.run(run()) < 0.6
+
+def test_interactive_requests_are_dispatched_before_background_ones():
+    model = RecordingModel()
+
+    async def run():
+        scheduler = RequestScheduler("test", model, requests_per_minute=6000, tokens_per_minute=10 ** 7, max_in_flight=1)
+        futures = [
+            scheduler.submit(["background 1"], PRIORITY_BACKGROUND),
+            scheduler.submit(["background 2"], PRIORITY_BACKGROUND),
+            scheduler.submit(["interactive"], PRIORITY_INTERACTIVE)
+        ]
+        scheduler.start()
+        await asyncio.gather(*futures)
+        await scheduler.stop()
+        return scheduler.get_stats()
+
+    stats = asyncio.run(run())
+    assert model.prompts == ["interactive", "background 1", "background 2"]
+    assert stats["completed"] == 3
+    assert stats["queued"] == 0
+
+def test_stop_fails_the_queued_and_in_flight_requests():
+    async def run():
+        scheduler = RequestScheduler("test", SlowModel(), requests_per_minute=6000, tokens_per_minute=10 ** 7, max_in_flight=1)
+        scheduler.start()
+        futures = [scheduler.submit([f"prompt {index}"], PRIORITY_BACKGROUND) for index in range(3)]
+        await asyncio.sleep(0.05)
+        in_flight = scheduler.get_stats()["in_flight"]
+        await scheduler.stop()
+        outcomes = await asyncio.wait_for(asyncio.gather(*futures, return_exceptions=True), timeout=1)
+        return in_flight, outcomes, scheduler.get_stats()
+
+    in_flight, outcomes, stats = asyncio.run(run())
+    assert in_flight == 1
+    assert all(isinstance(outcome, SchedulerStoppedError) for outcome in outcomes)
+    assert (stats["queued"], stats["queued_background"], stats["in_flight"]) == (0, 0, 0)
+
+def test_stop_fails_the_requests_waiting_to_be_requeued(monkeypatch):
+    monkeypatch.setattr(request_scheduler, "RATE_LIMIT_BACKOFF_BASE", 60)
+
+    async def run():
+        scheduler = RequestScheduler("test", ThrottledModel(quota_errors=1), requests_per_minute=600, tokens_per_minute=10 ** 7, max_in_flight=1)
+        scheduler.start()
+        future = scheduler.submit(["prompt"])
+        await asyncio.sleep(0.05)
+        requeued = scheduler.get_stats()["requeued"]
+        await scheduler.stop()
+        with pytest.raises(SchedulerStoppedError):
+            await asyncio.wait_for(future, timeout=1)
+        return requeued
+
+    assert asyncio.run(run()) == 1
+
+@pytest.fixture
+def short_backoff(monkeypatch):
+    monkeypatch.setattr(request_scheduler, "RATE_LIMIT_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(request_scheduler, "RATE_LIMIT_BACKOFF_MAX", 0.02)
+
+def run_request(model, requests_per_minute=600):
+    """
+    Sends one request through a fresh scheduler and returns its response or exception and the stats.
+    """
+    async def run():
+        scheduler = RequestScheduler("test", model, requests_per_minute=requests_per_minute, tokens_per_minute=10 ** 7, max_in_flight=1)
+        scheduler.start()
+        try:
+            outcome = await scheduler.submit(["prompt"])
+        except Exception as e:
+            outcome = e
+        await scheduler.stop()
+        return outcome, scheduler.get_stats()
+
+    return asyncio.run(run())
+
+def test_request_is_requeued_after_a_quota_error(short_backoff):
+    model = ThrottledModel(quota_errors=1)
+    response, stats = run_request(model)
+    assert isinstance(response, FakeResponse)
+    assert model.requests == 2
+    assert (stats["throttled"], stats["requeued"], stats["completed"], stats["failed"]) == (1, 1, 1, 0)
+    # Halved by the throttle, then raised additively by the success
+    assert 300 < stats["requests_per_minute"] < 301
+
+def test_quota_error_is_passed_on_after_the_last_requeue(short_backoff, monkeypatch):
+    monkeypatch.setattr(request_scheduler, "RATE_LIMIT_MAX_REQUEUES", 3)
+    model = ThrottledModel(quota_errors=10)
+    error, stats = run_request(model, requests_per_minute=100)
+    assert isinstance(error, google_exceptions.ResourceExhausted)
+    assert model.requests == 4
+    assert (stats["throttled"], stats["requeued"], stats["failed"]) == (4, 3, 1)
+    # Halved on every throttle (50, 25, 12.5) but never below RATE_LIMIT_MIN_FRACTION of the configured rate
+    assert stats["requests_per_minute"] == 10
+
+def test_quota_errors_are_detected_by_type_and_code():
+    class CodedError(Exception):
+        code = 429
+
+    assert is_quota_error(google_exceptions.ResourceExhausted("Quota exceeded"))
+    assert is_quota_error(google_exceptions.TooManyRequests("Too many requests"))
+    assert is_quota_error(CodedError())
+    assert not is_quota_error(ValueError("Invalid JSON response for page pdf_429"))
+
+def test_retry_after_hint_is_read_from_the_message():
+    assert get_retry_after(google_exceptions.ResourceExhausted("Quota exceeded, retry in 7.5s")) == 7.5
+    assert get_retry_after(google_exceptions.ResourceExhausted("Quota exceeded")) is None
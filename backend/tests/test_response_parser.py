@@ -0,0 +1,92 @@
+import json
+import pytest
+from app.utils.response_parser import (
+    load_json,
+    repair_json,
+    parse_layer_one_response,
+    parse_layer_two_response,
+    parse_packed_response,
+    ResponseParseError
+)
+
+ANSWER = {
+    "retrieval": True,
+    "keywords": [
+        {"keyword": "budget", "articles": [{"headline": "Budget passes", "summary": "The council passed the budget."}]},
+        {"keyword": "taxes", "articles": [{"headline": "Taxes rise", "summary": "Hello, world."}]}
+    ]
+}
+
+def test_strict_answer():
+    assert load_json(json.dumps(ANSWER)) == (ANSWER, "strict")
+
+def test_fenced_answer():
+    assert load_json(f"```json\n{json.dumps(ANSWER)}\n```") == (ANSWER, "fenced")
+
+def test_answer_surrounded_by_prose():
+    text = f"Here is the analysis you asked for:\n{json.dumps(ANSWER)}\nLet me know if you need anything else."
+    assert load_json(text) == (ANSWER, "extracted")
+
+def test_answer_without_json():
+    with pytest.raises(ResponseParseError):
+        load_json("I am sorry, but I cannot analyze this request.")
+
+def test_trailing_commas_are_removed():
+    assert repair_json('{"a": [1, 2,], "b": {"c": true,},}') == {"a": [1, 2], "b": {"c": True}}
+
+def test_truncated_string_is_dropped_with_its_article():
+    text = json.dumps(ANSWER)
+    truncated = text[:text.index("Hello, world") + len("Hello, wor")]
+    data, method = load_json(truncated)
+    assert method == "repaired"
+    # The keyword entry left open by the cut is dropped whole, the complete one is kept
+    assert data == {"retrieval": True, "keywords": ANSWER["keywords"][:1]}
+    assert "Hello, wor" not in json.dumps(data)
+
+def test_truncated_fenced_answer():
+    text = json.dumps(ANSWER)
+    truncated = "```json\n" + text[:text.index('"taxes"')]
+    assert load_json(truncated) == ({"retrieval": True, "keywords": ANSWER["keywords"][:1]}, "repaired")
+
+def test_truncated_member_is_dropped():
+    assert repair_json('{"a": {"b": 1, "c": "par') == {"a": {"b": 1}}
+    assert repair_json('{"retrieval": tr') == {}
+
+def test_closed_item_before_the_cut_is_kept():
+    assert repair_json('[{"x": 1} ,') == [{"x": 1}]
+    assert repair_json('{"pages": [{"page": 1}') == {"pages": [{"page": 1}]}
+
+def test_truncated_layer_one_answer_is_flagged():
+    text = json.dumps(ANSWER)
+    result, truncated = parse_layer_one_response(text[:text.index("Hello, wor") + 10])
+    assert truncated
+    assert [keyword["keyword"] for keyword in result["keywords"]] == ["budget"]
+
+    result, truncated = parse_layer_one_response(f"```json\n{text}\n```")
+    assert not truncated
+    assert result == ANSWER
+
+def test_layer_one_schema_salvage_keeps_valid_parts_and_extra_fields():
+    text = json.dumps({
+        "keywords": [
+            {"keyword": "budget", "articles": [{"headline": "Budget passes", "summary": "Passed."}, {"headline": 3}]},
+            {"articles": []}
+        ],
+        "confidence": 0.9
+    })
+    result, truncated = parse_layer_one_response(text)
+    assert not truncated
+    assert result["retrieval"] is True
+    assert result["keywords"] == [{"keyword": "budget", "articles": [{"headline": "Budget passes", "summary": "Passed."}]}]
+    assert result["confidence"] == 0.9
+
+def test_layer_two_bare_list():
+    validations = [{"keyword": "budget", "valid": True, "reason": "Present."}]
+    result, truncated = parse_layer_two_response(json.dumps(validations))
+    assert not truncated
+    assert result == {"keyword_validation": validations}
+
+def test_truncated_packed_answer_keeps_complete_pages():
+    text = json.dumps({"pages": [{"page": 1, "retrieval": False}, {"page": 2, **ANSWER}]})
+    results = parse_packed_response(text[:text.index("Hello")], "page", "layer_one")
+    assert results == [(1, {"retrieval": False, "keywords": []})]